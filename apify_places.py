@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Extraction Google Maps via l'actor Apify (compass/crawler-google-places)
+Une ou plusieurs recherches par run d'actor, runs démarrés en parallèle et
+datasets lus au fil de l'eau, items étiquetés par recherche d'origine et
+dédoublonnés entre recherches avant l'enrichissement
+"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from config import (
+    APIFY_ACTOR_ID, APIFY_DATASET_PAGE_SIZE, APIFY_MAX_CONCURRENT_RUNS,
+    APIFY_POLL_INTERVAL, APIFY_QUERIES_PER_RUN, DEFAULT_LANGUAGE
+)
+from lead_store import place_key
+from log_setup import get_logger
+
+
+logger = get_logger('apify_places')
+
+# Statuts d'un run d'actor terminé
+TERMINAL_STATUSES = {'SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT'}
+
+# Champs d'un lieu lus par le pipeline: seuls ceux-ci sont demandés au
+# dataset (horaires, photos, avis... ne sont ni transférés ni décodés)
+PLACE_FIELDS = [
+    'title', 'address', 'phone', 'website', 'totalScore', 'reviewsCount',
+    'categoryName', 'url', 'placeId', 'searchString',
+]
+
+
+def compact_place(item: Dict, fields: List[str] = PLACE_FIELDS) -> Dict:
+    """
+    Réduit un item du dataset aux champs utiles
+
+    Args:
+        item: Item du dataset (éventuellement complet)
+        fields: Champs conservés
+
+    Returns:
+        Dict limité aux champs présents parmi fields
+    """
+    return {field: item[field] for field in fields if field in item}
+
+
+def load_queries(path: str) -> List[str]:
+    """
+    Lit un fichier de recherches (une par ligne)
+
+    Les lignes vides et les commentaires (#) sont ignorés, les doublons
+    supprimés en conservant l'ordre.
+
+    Args:
+        path: Chemin du fichier texte
+
+    Returns:
+        Liste des recherches
+    """
+    with open(path, encoding='utf-8') as f:
+        lines = (line.strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line and not line.startswith('#')))
+
+
+def parse_queries(text: str) -> List[str]:
+    """
+    Interprète une saisie utilisateur: "@fichier.txt" ou recherches séparées par « ; »
+
+    Args:
+        text: Saisie (ex: "plombiers Lyon; plombiers Grenoble")
+
+    Returns:
+        Liste des recherches (vide si la saisie est vide)
+    """
+    text = text.strip()
+    if text.startswith('@'):
+        return load_queries(text[1:].strip())
+    return list(dict.fromkeys(q.strip() for q in text.split(';') if q.strip()))
+
+
+def build_run_input(queries: List[str], max_results: int) -> Dict:
+    """
+    Paramètres d'un run de l'actor
+
+    Args:
+        queries: Recherches soumises dans ce run
+        max_results: Nombre maximum de lieux par recherche
+
+    Returns:
+        run_input de l'actor
+    """
+    return {
+        "searchStringsArray": list(queries),
+        "maxCrawledPlacesPerSearch": max_results,
+        "language": DEFAULT_LANGUAGE,
+        "deeperCityScrape": False,
+        "scrapeReviewerName": False,
+        "scrapeReviewerId": False,
+        "scrapeReviewId": False,
+        "scrapeReviewUrl": False,
+        "scrapeResponseFromOwnerText": False,
+        "scrapeReviewsPersonalData": False,
+    }
+
+
+def chunk_queries(queries: List[str], per_run: int = APIFY_QUERIES_PER_RUN) -> List[List[str]]:
+    """
+    Répartit les recherches entre runs d'actor
+
+    Args:
+        queries: Toutes les recherches
+        per_run: Nombre maximum de recherches par run
+
+    Returns:
+        Liste de lots de recherches
+    """
+    per_run = max(1, per_run)
+    return [queries[i:i + per_run] for i in range(0, len(queries), per_run)]
+
+
+def tag_source_query(item: Dict, queries: List[str]) -> Dict:
+    """
+    Renseigne la recherche d'origine d'un item (champ source_query)
+
+    L'actor indique la recherche dans searchString; pour un run à une
+    seule recherche, elle est déduite du run.
+
+    Args:
+        item: Item du dataset
+        queries: Recherches du run qui a produit l'item
+
+    Returns:
+        L'item, modifié sur place
+    """
+    source = item.get('searchString') or (queries[0] if len(queries) == 1 else '')
+    item['source_query'] = source
+    return item
+
+
+def iter_unique(items: Iterable[Dict], on_duplicate: Callable[[], None] = None) -> Iterator[Dict]:
+    """
+    Produit chaque lieu une seule fois, au fil des items reçus
+
+    Le premier item de chaque lieu (place_key) est produit; source_queries
+    liste toutes les recherches qui l'ont trouvé (complétée sur l'item déjà
+    produit quand un doublon arrive plus tard).
+
+    Args:
+        items: Items étiquetés par tag_source_query
+        on_duplicate: Appelée à chaque doublon écarté (optionnel)
+
+    Yields:
+        Items uniques, dans l'ordre de première apparition
+    """
+    seen = {}
+    for item in items:
+        key = place_key(item)
+        source = item.get('source_query', '')
+
+        kept = seen.get(key) if key else None
+        if kept is not None:
+            if source and source not in kept['source_queries']:
+                kept['source_queries'].append(source)
+            if on_duplicate:
+                on_duplicate()
+            continue
+
+        item['source_queries'] = [source] if source else []
+        if key:
+            seen[key] = item
+        yield item
+
+
+def dedupe_places(items: Iterable[Dict]) -> List[Dict]:
+    """
+    Supprime les lieux trouvés par plusieurs recherches (voir iter_unique)
+
+    Args:
+        items: Items étiquetés par tag_source_query
+
+    Returns:
+        Items uniques, dans l'ordre de première apparition
+    """
+    return list(iter_unique(items))
+
+
+def lead_base_data(item: Dict) -> Dict:
+    """
+    Données de base d'un lead à partir d'un lieu du dataset
+
+    Args:
+        item: Lieu (étiqueté par tag_source_query)
+
+    Returns:
+        Dict name, address, phone, website, rating... avant enrichissement
+    """
+    return {
+        'name': item.get('title', ''),
+        'address': item.get('address', ''),
+        'phone': item.get('phone', ''),
+        'website': item.get('website', ''),
+        'rating': item.get('totalScore', ''),
+        'reviews_count': item.get('reviewsCount', ''),
+        'category': item.get('categoryName', ''),
+        'url': item.get('url', ''),
+        'place_id': item.get('placeId', ''),
+        'search_query': item.get('source_query', ''),
+    }
+
+
+class ActorRunPool:
+    """
+    Runs d'actor démarrés en parallèle, datasets lus au fil de l'eau
+
+    Les runs sont lancés avec start() (non bloquant) dans la limite de
+    max_concurrency runs simultanés (plafond du compte Apify); les suivants
+    attendent en file. stream() lit le dataset de chaque run actif par
+    pages (offset), produit les items dès qu'ils apparaissent, quel que soit
+    le run, puis signale la fin de chaque run. Seuls les champs
+    PLACE_FIELDS sont demandés à l'API dataset (projection côté Apify), par
+    pages de APIFY_DATASET_PAGE_SIZE items. Des runs peuvent être ajoutés
+    pendant l'itération (ex: subdivision d'une tuile saturée).
+
+    Avec un point de reprise (checkpoint.RunCheckpoint), chaque run lancé y
+    est enregistré; un run déjà lancé avec le même run_input est rattaché
+    (son dataset relu depuis Apify) au lieu d'être redémarré.
+
+    Usage:
+        pool = ActorRunPool(client)
+        pool.submit(build_run_input(['plombiers Lyon'], 50), tag='Lyon')
+        for event, tag, data in pool.stream():
+            if event == 'item':
+                ...
+    """
+
+    def __init__(self, apify_client, actor_id: str = APIFY_ACTOR_ID,
+                 max_concurrency: int = APIFY_MAX_CONCURRENT_RUNS,
+                 poll_interval: float = APIFY_POLL_INTERVAL,
+                 page_size: int = APIFY_DATASET_PAGE_SIZE, metrics=None, checkpoint=None,
+                 fields: List[str] = PLACE_FIELDS):
+        """
+        Args:
+            apify_client: ApifyClient
+            actor_id: Actor Apify
+            max_concurrency: Nombre maximum de runs simultanés
+            poll_interval: Attente entre deux tours de lecture sans nouvel item (secondes)
+            page_size: Nombre d'items lus par appel au dataset
+            metrics: RunMetrics (durée des runs apify.run, pages apify.dataset)
+            checkpoint: RunCheckpoint enregistrant les runs lancés (optionnel)
+            fields: Champs demandés au dataset (None pour l'item complet)
+        """
+        self.client = apify_client
+        self.actor_id = actor_id
+        self.max_concurrency = max(1, max_concurrency)
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.metrics = metrics
+        self.checkpoint = checkpoint
+        self.fields = fields
+        self._queue = deque()
+        self._active = []
+
+    def submit(self, run_input: Dict, tag=None):
+        """
+        Ajoute un run à lancer
+
+        Args:
+            run_input: Paramètres de l'actor
+            tag: Valeur renvoyée avec chaque événement de ce run (recherches, tuile...)
+        """
+        self._queue.append((run_input, tag))
+
+    def _start_pending(self):
+        """Démarre les runs en file dans la limite de concurrence"""
+        while self._queue and len(self._active) < self.max_concurrency:
+            run_input, tag = self._queue.popleft()
+            known = self.checkpoint.find_run(run_input) if self.checkpoint else None
+            if known:
+                logger.info("♻️  Reprise du run Apify %s", known['run_id'])
+                run = {'id': known['run_id'], 'defaultDatasetId': known['dataset_id']}
+            else:
+                run = self.client.actor(self.actor_id).start(run_input=run_input)
+                if self.checkpoint:
+                    self.checkpoint.record_run(run_input, run['id'], run['defaultDatasetId'])
+            self._active.append({
+                'id': run['id'], 'dataset_id': run['defaultDatasetId'], 'tag': tag,
+                'offset': 0, 'started_at': time.perf_counter(),
+            })
+
+    def _read_page(self, run: Dict) -> List[Dict]:
+        """Lit les items suivants du dataset d'un run (projetés sur self.fields)"""
+        start = time.perf_counter()
+        page = self.client.dataset(run['dataset_id']).list_items(
+            offset=run['offset'], limit=self.page_size, fields=self.fields, skip_empty=True
+        )
+        items = page.items
+        if self.fields:
+            # Filet de sécurité si l'API renvoie des champs non demandés
+            items = [compact_place(item, self.fields) for item in items]
+        if self.metrics:
+            self.metrics.record('apify.dataset', time.perf_counter() - start)
+        run['offset'] += len(page.items)
+        return items
+
+    def stream(self) -> Iterator[Tuple[str, object, Dict]]:
+        """
+        Lance les runs et produit leurs résultats dès qu'ils sont disponibles
+
+        Yields:
+            ('item', tag, item) pour chaque item d'un dataset, puis
+            ('done', tag, {'count', 'status'}) à la fin de chaque run
+        """
+        while self._queue or self._active:
+            self._start_pending()
+            progressed = False
+
+            for run in list(self._active):
+                items = self._read_page(run)
+                if items:
+                    progressed = True
+                    for item in items:
+                        yield 'item', run['tag'], item
+                    continue
+
+                status = self.client.run(run['id']).get()['status']
+                if status not in TERMINAL_STATUSES:
+                    continue
+
+                # Items écrits entre la dernière lecture et la fin du run
+                items = self._read_page(run)
+                while items:
+                    for item in items:
+                        yield 'item', run['tag'], item
+                    items = self._read_page(run)
+
+                self._active.remove(run)
+                progressed = True
+                if self.metrics:
+                    self.metrics.record('apify.run', time.perf_counter() - run['started_at'],
+                                        error=status != 'SUCCEEDED')
+                if status != 'SUCCEEDED':
+                    logger.warning("⚠️  Run Apify %s terminé en %s (%d items récupérés)",
+                                   run['id'], status, run['offset'])
+                yield 'done', run['tag'], {'count': run['offset'], 'status': status}
+
+            if not progressed and self._active:
+                time.sleep(self.poll_interval)
+
+
+def iter_places(apify_client, queries: List[str], max_results: int,
+                per_run: int = APIFY_QUERIES_PER_RUN, metrics=None,
+                actor_id: str = APIFY_ACTOR_ID, checkpoint=None) -> Iterator[Dict]:
+    """
+    Lance l'actor pour toutes les recherches et produit les lieux au fil de l'eau
+
+    Les recherches sont regroupées par lots de per_run dans un même run,
+    ce qui amortit le démarrage de l'actor sur une campagne entière; les
+    lots sont exécutés en parallèle (ActorRunPool).
+
+    Args:
+        apify_client: ApifyClient
+        queries: Recherches à effectuer
+        max_results: Nombre maximum de lieux par recherche
+        per_run: Nombre maximum de recherches par run d'actor
+        metrics: RunMetrics (apify.run / apify.dataset, optionnel)
+        actor_id: Actor Apify
+        checkpoint: RunCheckpoint (reprise des runs déjà lancés, optionnel)
+
+    Yields:
+        Items étiquetés par recherche d'origine (non dédoublonnés)
+    """
+    pool = ActorRunPool(apify_client, actor_id, metrics=metrics, checkpoint=checkpoint)
+    for chunk in chunk_queries(queries, per_run):
+        pool.submit(build_run_input(chunk, max_results), tag=chunk)
+
+    for event, chunk, item in pool.stream():
+        if event == 'item':
+            yield tag_source_query(item, chunk)
+
+
+def fetch_places(apify_client, queries: List[str], max_results: int,
+                 per_run: int = APIFY_QUERIES_PER_RUN, metrics=None, stage=None,
+                 actor_id: str = APIFY_ACTOR_ID) -> List[Dict]:
+    """
+    Lance l'actor pour toutes les recherches et récupère les lieux (voir iter_places)
+
+    Args:
+        apify_client: ApifyClient
+        queries: Recherches à effectuer
+        max_results: Nombre maximum de lieux par recherche
+        per_run: Nombre maximum de recherches par run d'actor
+        metrics: RunMetrics (apify.run / apify.dataset, optionnel)
+        stage: Stage du pipeline avancé à chaque item (optionnel)
+        actor_id: Actor Apify
+
+    Returns:
+        Items étiquetés par recherche d'origine (non dédoublonnés)
+    """
+    results = []
+    for item in iter_places(apify_client, queries, max_results, per_run, metrics, actor_id):
+        results.append(item)
+        if stage:
+            stage.advance()
+    return results
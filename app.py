@@ -3,13 +3,14 @@
 
 import streamlit as st
 
-from scraper import GoogleMapsScraper
+from scraper_service import get_service
 
 
 def run_scraper(search_query: str, max_results: int) -> None:
     """Exécute le scraper avec les paramètres fournis."""
 
-    scraper = GoogleMapsScraper()
+    # Le service est conservé entre les reruns Streamlit (module importé une fois)
+    scraper = get_service().get_scraper()
     scraper.run(search_query, max_results)
 
 
@@ -13,7 +13,8 @@ import os
 # Ajouter le répertoire courant au path pour importer le scraper
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from scraper import GoogleMapsScraper
+from pipeline_events import PipelineEvents
+from scraper_service import get_service
 
 class ScraperGUI:
     def __init__(self, root):
@@ -131,12 +132,16 @@ class ScraperGUI:
         try:
             self.log("🚀 Démarrage du scraping...")
             
-            # Créer le scraper
-            scraper = GoogleMapsScraper()
+            # Scraper propre à ce run (clients Apify et Google Sheets partagés)
+            scraper = get_service().get_scraper()
+            
+            # Durée de chaque étape dans le journal
+            events = PipelineEvents()
+            events.subscribe(self.log_stage_event)
             
             # Scraper Google Maps
             self.log("📥 Recherche sur Google Maps...")
-            results = scraper.scrape_google_maps(search_query, max_results)
+            results = scraper.scrape_google_maps(search_query, max_results, events=events)
             
             if not results:
                 self.log("❌ Aucun résultat trouvé")
@@ -147,17 +152,17 @@ class ScraperGUI:
             
             # Traiter les résultats
             self.log("🔄 Traitement des résultats...")
-            processed_data = scraper.process_results(results)
+            processed_data = scraper.process_results(results, events=events)
             
             self.log(f"📧 {sum(1 for b in processed_data if b['contact_email'])} emails trouvés")
             
             # Sauvegarder dans Google Sheets
             self.log("📝 Sauvegarde dans Google Sheets...")
-            scraper.save_to_google_sheets(processed_data)
+            scraper.save_to_google_sheets(processed_data, events=events)
             
             # Envoyer vers GoHighLevel
             self.log("📤 Envoi vers GoHighLevel (si configuré)...")
-            scraper.send_to_gohighlevel(processed_data)
+            scraper.send_to_gohighlevel(processed_data, events=events)
             
             self.log("")
             self.log("🎉 SCRAPING TERMINÉ AVEC SUCCÈS!")
@@ -170,6 +175,12 @@ class ScraperGUI:
         finally:
             self.finish_scraping()
     
+    def log_stage_event(self, event_type, data):
+        """Journalise la fin de chaque étape du pipeline (durée et débit)"""
+        if event_type == 'stage_end':
+            self.log(f"   ⏱️  {data['stage']}: {data['count']} éléments en "
+                     f"{data['duration']:.1f}s ({data['rate']:.1f}/s)")
+    
     def finish_scraping(self):
         """Réactive l'interface après le scraping"""
         self.is_running = False
@@ -177,6 +188,7 @@ class ScraperGUI:
 
 def main():
     """Fonction principale"""
+    get_service().warm_up()
     root = tk.Tk()
     app = ScraperGUI(root)
     root.mainloop()
@@ -8,6 +8,9 @@ import os
 import sys
 from datetime import datetime
 
+import apify_places
+import geo_tiling
+
 
 def clear_screen():
     """Efface l'écran"""
@@ -57,14 +60,37 @@ def get_prospection_params():
     print("   - entreprises rénovation Toulouse")
     print()
 
-    search_query = input("🔍 Votre recherche: ").strip()
+    print("💡 Campagne multi-villes: séparez les recherches par « ; »")
+    print("   ou indiquez un fichier d'une recherche par ligne: @recherches.txt")
+    print()
 
-    if not search_query:
+    try:
+        queries = apify_places.parse_queries(input("🔍 Votre recherche: "))
+    except OSError as e:
+        print(f"❌ Fichier de recherches illisible: {e}")
+        return None
+
+    if not queries:
         print("❌ Recherche vide")
         return None
 
+    search_query = queries[0] if len(queries) == 1 else queries
+
+    print("\n🗺️  Découpage géographique (grandes villes, recherches tronquées)")
+    print("   Saisissez la recherche sans la ville (ex: 'restaurants') puis la zone:")
+    print(f"   {', '.join(geo_tiling.AREAS)} (par arrondissement) ou sud,ouest,nord,est (grille)")
+    try:
+        area = geo_tiling.parse_area(input("   Zone [aucune]: "))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None
+
     print("\n📊 Nombre d'entreprises à scraper")
     print("   Recommandation: 200 entreprises pour obtenir ~50 contacts qualifiés")
+    if len(queries) > 1:
+        print(f"   ({len(queries)} recherches: nombre appliqué à chacune)")
+    if area:
+        print("   (zone découpée: nombre appliqué à chaque tuile)")
     max_results_input = input("   Nombre d'entreprises [200]: ").strip()
     max_results = int(max_results_input) if max_results_input else 200
 
@@ -78,10 +104,25 @@ def get_prospection_params():
     min_score_input = input("   Score minimum [50]: ").strip()
     min_score = int(min_score_input) if min_score_input else 50
 
+    print("\n♻️  Mode incrémental")
+    print("   Réutilise les enrichissements récents des entreprises déjà connues")
+    print("   (site web, téléphone et note inchangés): idéal pour les relances hebdo")
+    incremental_input = input("   Activer le mode incrémental ? [o/N]: ").strip().lower()
+    incremental = incremental_input in ('o', 'oui', 'y', 'yes')
+
+    print("\n🔬 Profilage (diagnostic)")
+    print("   Enregistre un profil CPU (cProfile) et mémoire (tracemalloc) par étape")
+    print("   dans le dossier 'profiles/' (à ouvrir avec snakeviz ou pstats)")
+    profile_input = input("   Activer le profilage ? [o/N]: ").strip().lower()
+    profile = profile_input in ('o', 'oui', 'y', 'yes')
+
     return {
         'search_query': search_query,
         'max_results': max_results,
-        'min_score': min_score
+        'min_score': min_score,
+        'incremental': incremental,
+        'profile': profile,
+        'area': area
     }
 
 
@@ -337,9 +378,16 @@ def run_prospection():
     # Confirmation
     print("\n✅ RÉCAPITULATIF")
     print("-"*70)
-    print(f"  Recherche: {params['search_query']}")
+    if isinstance(params['search_query'], list):
+        print(f"  Recherches: {len(params['search_query'])} (ex: {params['search_query'][0]})")
+    else:
+        print(f"  Recherche: {params['search_query']}")
     print(f"  Entreprises à scraper: {params['max_results']}")
     print(f"  Score minimum: {params['min_score']}")
+    print(f"  Mode incrémental: {'Oui' if params['incremental'] else 'Non'}")
+    print(f"  Profilage: {'Oui' if params['profile'] else 'Non'}")
+    if params['area']:
+        print(f"  Zone découpée: {params['area']}")
     print()
 
     confirm = input("👉 Lancer la prospection ? [O/n]: ").strip().lower()
@@ -355,14 +403,23 @@ def run_prospection():
     print("="*70)
     print()
 
+    checkpoint = None
     try:
+        from checkpoint import RunCheckpoint
         from scraper_pro import GoogleMapsScraperPro
 
+        # Point de reprise: un run interrompu se reprend avec scraper_pro.py --resume
+        checkpoint = RunCheckpoint.create(params)
+
         scraper = GoogleMapsScraperPro(min_score=params['min_score'])
         result = scraper.run(
             params['search_query'],
             params['max_results'],
-            params['min_score']
+            params['min_score'],
+            incremental=params['incremental'],
+            profile=params['profile'],
+            area=params['area'],
+            checkpoint=checkpoint
         )
 
         # Résumé final
@@ -378,10 +435,14 @@ def run_prospection():
         print(f"✅ Les contacts qualifiés ont été exportés:")
         print(f"   - Google Sheets (feuille 'Prospection')")
         print(f"   - Fichier CSV local")
+        if result.get('profile_dir'):
+            print(f"🔬 Profils: {result['profile_dir']}")
         print()
 
     except Exception as e:
         print(f"\n❌ Erreur: {e}")
+        if checkpoint and checkpoint.exists:
+            print(f"   Reprise possible: python scraper_pro.py --resume {checkpoint.id}")
         import traceback
         traceback.print_exc()
 
@@ -11,7 +11,8 @@ import sys
 # Ajouter le répertoire courant au path pour importer le scraper
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from scraper import GoogleMapsScraper
+from pipeline_events import PipelineEvents
+from scraper_service import get_service
 
 app = Flask(__name__)
 
@@ -25,6 +26,37 @@ scraping_status = {
     "error": None
 }
 
+# Plage de progression (en %) et libellé de chaque étape du pipeline
+STAGES = {
+    'scrape': (0, 40, "Scraping Google Maps en cours"),
+    'enrichment': (40, 80, "Recherche des emails"),
+    'google_sheets': (80, 90, "Sauvegarde dans Google Sheets"),
+    'gohighlevel': (90, 100, "Envoi vers GoHighLevel (si configuré)"),
+}
+
+def update_status_from_event(event_type, data):
+    """Met à jour scraping_status depuis un événement PipelineEvents"""
+    if data.get('stage') not in STAGES:
+        return
+    
+    low, high, label = STAGES[data['stage']]
+    
+    if event_type == 'stage_start':
+        scraping_status["progress"] = low
+        scraping_status["message"] = f"{label}..."
+    
+    elif event_type == 'item':
+        index, total = data['index'], data.get('total')
+        message = f"{label} ({index}/{total})" if total else f"{label} ({index})"
+        if data.get('eta') is not None:
+            message += f" - reste ~{int(data['eta'])}s"
+        scraping_status["message"] = message
+        if total:
+            scraping_status["progress"] = low + int((high - low) * min(index / total, 1))
+    
+    elif event_type == 'stage_end':
+        scraping_status["progress"] = high
+
 def run_scraper_async(search_query, max_results):
     """Exécute le scraper en arrière-plan"""
     global scraping_status
@@ -37,30 +69,22 @@ def run_scraper_async(search_query, max_results):
         scraping_status["results"] = []
         scraping_status["error"] = None
         
-        # Créer et exécuter le scraper
-        scraper = GoogleMapsScraper()
+        # Scraper propre à ce run (clients Apify et Google Sheets partagés)
+        scraper = get_service().get_scraper()
         
-        # Simuler la progression (le scraper réel n'a pas de callback)
-        scraping_status["message"] = "Scraping Google Maps en cours..."
+        # Progression réelle publiée par chaque étape du pipeline
+        events = PipelineEvents()
+        events.subscribe(update_status_from_event)
         
         # Exécuter le scraper
-        results = scraper.scrape_google_maps(search_query, max_results)
+        results = scraper.scrape_google_maps(search_query, max_results, events=events)
         
         if results:
-            scraping_status["message"] = "Traitement des résultats..."
-            scraping_status["progress"] = 50
-            
-            processed_data = scraper.process_results(results)
-            
-            scraping_status["message"] = "Sauvegarde dans Google Sheets..."
-            scraping_status["progress"] = 80
-            
-            scraper.save_to_google_sheets(processed_data)
-            
-            scraping_status["message"] = "Envoi vers GoHighLevel (si configuré)..."
-            scraping_status["progress"] = 90
+            scraping_status["total"] = len(results)
             
-            scraper.send_to_gohighlevel(processed_data)
+            processed_data = scraper.process_results(results, events=events)
+            scraper.save_to_google_sheets(processed_data, events=events)
+            scraper.send_to_gohighlevel(processed_data, events=events)
             
             scraping_status["progress"] = 100
             scraping_status["message"] = "✅ Scraping terminé avec succès !"
@@ -397,4 +421,5 @@ if __name__ == '__main__':
     print("📱 Ouvrez votre navigateur sur: http://localhost:5000")
     print("⏹️  Arrêtez avec Ctrl+C")
     
+    get_service().warm_up()
     app.run(host='127.0.0.1', port=5000, debug=False)
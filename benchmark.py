@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark hors-ligne du pipeline de scraping
+Lance les fixtures locales (fixtures.py) qui servent un corpus généré de sites de PME
+(pages équipe, mentions légales, liens mailto, hôtes lents ou morts) ainsi que de fausses
+API SIRENE et GoHighLevel, un DNS (MX) et un serveur SMTP, remplace Apify (places_source)
+et Google Sheets par des faux en mémoire, puis mesure
+le débit (leads/s) et la latence de chaque étape pour les deux scrapers
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+
+from fixtures import FixtureServer, prepare_scraper
+from pipeline_events import PipelineEvents
+from places_source import InMemorySource, apify_items, generate_corpus
+
+
+def run_benchmark(kind: str, corpus: List[Dict], fixture: FixtureServer,
+                  sheet_latency: float = 0.05, actor_delay: float = 0.0,
+                  stream: bool = False, workers: int = 1, smtp: bool = False,
+                  smtp_interval: float = 0.0) -> Dict:
+    """
+    Exécute un run complet d'un scraper sur les fixtures
+
+    Args:
+        kind: 'standard' (GoogleMapsScraper) ou 'pro' (GoogleMapsScraperPro)
+        corpus: Corpus généré
+        fixture: Serveur de fixtures démarré
+        sheet_latency: Latence d'un appel Google Sheets simulé
+        actor_delay: Durée d'un run d'actor simulé
+        stream: Enrichir pendant le scraping (scraper pro uniquement)
+        workers: Processus d'enrichissement (scraper pro uniquement)
+        smtp: Vérification SMTP des emails construits (scraper pro uniquement)
+        smtp_interval: Intervalle minimal entre deux RCPT (secondes)
+
+    Returns:
+        Dict avec leads, durée, leads/s, durée par étape et rapport de métriques
+    """
+    from scraper import GoogleMapsScraper
+    from scraper_pro import GoogleMapsScraperPro
+
+    workdir = tempfile.mkdtemp(prefix='benchmark_')
+    previous_dir = os.getcwd()
+    # Sans credentials.json dans le dossier courant, aucun vrai Google Sheet n'est ouvert
+    os.chdir(workdir)
+
+    try:
+        store_path = os.path.join(workdir, 'leads.db')
+        # Lieux du corpus servis sans Apify: aucune clé API n'est requise
+        source = InMemorySource(apify_items(corpus), actor_delay)
+        if kind == 'pro':
+            scraper = GoogleMapsScraperPro(min_score=0, store_path=store_path, places_source=source)
+        else:
+            scraper = GoogleMapsScraper(store_path=store_path, places_source=source)
+        prepare_scraper(scraper, fixture, sheet_latency, smtp, smtp_interval)
+
+        events = PipelineEvents()
+        options = {'stream': stream, 'workers': workers} if kind == 'pro' else {}
+        start = time.perf_counter()
+        scraper.run(f"benchmark {kind}", len(corpus), events=events, **options)
+        duration = time.perf_counter() - start
+
+        leads = events.timings.get('enrichment', {}).get('count', 0)
+        return {
+            'scraper': kind,
+            'leads': leads,
+            'duration': round(duration, 3),
+            'leads_per_second': round(leads / duration, 3) if duration else 0.0,
+            'stages': events.summary(),
+            'metrics': scraper.metrics.report(),
+        }
+
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_results(results: List[Dict]) -> str:
+    """Tableau récapitulatif des benchmarks"""
+    lines = []
+    for result in results:
+        lines.append(f"\n📊 {result['scraper'].upper()}: {result['leads']} leads en "
+                     f"{result['duration']:.1f}s → {result['leads_per_second']:.2f} leads/s")
+        lines.append(f"   {'Étape':<16}{'Éléments':>10}{'Durée (s)':>12}")
+        for stage in result['stages']:
+            lines.append(f"   {stage['stage']:<16}{stage['count']:>10}{stage['duration']:>12.2f}")
+
+        operations = result['metrics']['operations']
+        lines.append(f"   {'Opération':<22}{'Appels':>8}{'Erreurs':>9}{'p50':>8}{'p95':>8}{'p99':>8}")
+        for name, op in operations.items():
+            if name.startswith('stage.'):
+                continue
+            lines.append(f"   {name:<22}{op['count']:>8}{op['errors']:>9}"
+                         f"{op['p50']:>8.3f}{op['p95']:>8.3f}{op['p99']:>8.3f}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne des scrapers")
+    parser.add_argument('--count', type=int, default=30, help="Nombre d'entreprises du corpus")
+    parser.add_argument('--scraper', choices=['standard', 'pro', 'both'], default='both')
+    parser.add_argument('--seed', type=int, default=42, help="Graine du corpus")
+    parser.add_argument('--slow-delay', type=float, default=2.0,
+                        help="Latence des hôtes lents (secondes)")
+    parser.add_argument('--sheet-latency', type=float, default=0.05,
+                        help="Latence d'un appel Google Sheets simulé (secondes)")
+    parser.add_argument('--actor-delay', type=float, default=0.0,
+                        help="Durée d'un run d'actor Apify simulé (secondes)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Enrichir pendant le scraping (scraper pro)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processus d'enrichissement (scraper pro)")
+    parser.add_argument('--smtp', action='store_true',
+                        help="Vérification SMTP des emails construits (scraper pro)")
+    parser.add_argument('--smtp-interval', type=float, default=0.0,
+                        help="Intervalle minimal entre deux RCPT sur le serveur SMTP (secondes)")
+    parser.add_argument('--output', help="Fichier JSON des résultats (optionnel)")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.count, args.seed)
+    kinds = ['standard', 'pro'] if args.scraper == 'both' else [args.scraper]
+
+    print(f"\n⏱️  Benchmark hors-ligne: {args.count} entreprises, scraper(s): {', '.join(kinds)}")
+
+    results = []
+    with FixtureServer(corpus, slow_delay=args.slow_delay) as fixture:
+        for kind in kinds:
+            results.append(run_benchmark(kind, corpus, fixture, args.sheet_latency,
+                                         args.actor_delay, args.stream, args.workers,
+                                         args.smtp, args.smtp_interval))
+
+    print("\n" + "="*60)
+    print("📈 RÉSULTATS DU BENCHMARK")
+    print("="*60)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 Résultats enregistrés: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Points de reprise des runs de prospection
+Conserve les runs Apify lancés (run / dataset ID) et les entreprises déjà
+enrichies, pour reprendre un run interrompu sans re-crawler ni ré-enrichir
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import CHECKPOINT_DIR
+
+
+class RunCheckpoint:
+    """
+    Point de reprise d'un run, dans un dossier checkpoints/<id>/
+
+    - state.json: paramètres du run et runs d'actor lancés, indexés par leur
+      run_input (un run relancé avec les mêmes paramètres est rattaché au
+      run existant au lieu d'être redémarré)
+    - enriched.jsonl: une ligne par entreprise enrichie (clé + lead complet),
+      ajoutée dès la fin de son enrichissement
+
+    Le dossier n'est écrit qu'au premier run d'actor ou à la première
+    entreprise enregistrée: un run qui échoue ou ne trouve rien avant ne
+    laisse pas de point de reprise vide.
+
+    Usage:
+        checkpoint = RunCheckpoint.create({'search_query': ..., 'max_results': ...})
+        scraper.run(..., checkpoint=checkpoint)
+        # Après une interruption:
+        checkpoint = RunCheckpoint.load()
+    """
+
+    STATE_FILE = 'state.json'
+    ENRICHED_FILE = 'enriched.jsonl'
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Dossier du point de reprise (créé à la première écriture)
+        """
+        self.directory = directory
+
+        state_path = os.path.join(directory, self.STATE_FILE)
+        if os.path.exists(state_path):
+            with open(state_path, encoding='utf-8') as f:
+                self.state = json.load(f)
+        else:
+            self.state = {'params': {}, 'runs': {}}
+
+        self._enriched = None
+
+    @property
+    def id(self) -> str:
+        """Identifiant du point de reprise (nom du dossier)"""
+        return os.path.basename(os.path.normpath(self.directory))
+
+    @property
+    def exists(self) -> bool:
+        """Le point de reprise a été écrit (il peut être repris)"""
+        return os.path.exists(os.path.join(self.directory, self.STATE_FILE))
+
+    @property
+    def params(self) -> Dict:
+        """Paramètres du run (search_query, max_results, ...)"""
+        return self.state['params']
+
+    @classmethod
+    def create(cls, params: Dict, base_dir: str = CHECKPOINT_DIR) -> 'RunCheckpoint':
+        """
+        Crée un point de reprise pour un nouveau run
+
+        Args:
+            params: Paramètres du run, JSON-sérialisables
+            base_dir: Dossier parent des points de reprise
+
+        Returns:
+            RunCheckpoint dans base_dir/<horodatage>/ (écrit à la première mise à jour)
+        """
+        checkpoint_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        checkpoint = cls(os.path.join(base_dir, checkpoint_id))
+        checkpoint.state = {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'params': params,
+            'runs': {},
+        }
+        return checkpoint
+
+    @classmethod
+    def load(cls, checkpoint_id: str = None, base_dir: str = CHECKPOINT_DIR) -> Optional['RunCheckpoint']:
+        """
+        Ouvre un point de reprise existant
+
+        Args:
+            checkpoint_id: Identifiant ou chemin du dossier (le plus récent si None)
+            base_dir: Dossier parent des points de reprise
+
+        Returns:
+            RunCheckpoint, ou None s'il n'existe pas
+        """
+        if checkpoint_id and os.path.isdir(checkpoint_id):
+            directory = checkpoint_id
+        elif checkpoint_id:
+            directory = os.path.join(base_dir, checkpoint_id)
+        else:
+            candidates = sorted(os.listdir(base_dir)) if os.path.isdir(base_dir) else []
+            directory = os.path.join(base_dir, candidates[-1]) if candidates else None
+
+        if not directory or not os.path.exists(os.path.join(directory, cls.STATE_FILE)):
+            return None
+        return cls(directory)
+
+    def _save_state(self):
+        """Écrit state.json (remplacement atomique)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self.STATE_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _run_key(run_input: Dict) -> str:
+        return json.dumps(run_input, sort_keys=True, ensure_ascii=False, default=str)
+
+    def find_run(self, run_input: Dict) -> Optional[Dict]:
+        """
+        Run d'actor déjà lancé avec ces paramètres
+
+        Returns:
+            Dict run_id / dataset_id, ou None
+        """
+        return self.state['runs'].get(self._run_key(run_input))
+
+    def record_run(self, run_input: Dict, run_id: str, dataset_id: str):
+        """Enregistre un run d'actor lancé"""
+        self.state['runs'][self._run_key(run_input)] = {'run_id': run_id, 'dataset_id': dataset_id}
+        self._save_state()
+
+    def enriched_leads(self) -> Dict[str, Dict]:
+        """
+        Entreprises déjà enrichies
+
+        Une dernière ligne tronquée (arrêt pendant l'écriture) est ignorée.
+
+        Returns:
+            Dict clé du lieu → lead enrichi et scoré
+        """
+        if self._enriched is None:
+            self._enriched = {}
+            path = os.path.join(self.directory, self.ENRICHED_FILE)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        self._enriched[entry['key']] = entry['lead']
+        return self._enriched
+
+    @property
+    def enriched_count(self) -> int:
+        """Nombre d'entreprises déjà enrichies"""
+        return len(self.enriched_leads())
+
+    def record_enriched(self, key: str, lead: Dict):
+        """
+        Enregistre une entreprise enrichie (ajout immédiat au fichier)
+
+        Args:
+            key: Clé du lieu (lead_store.place_key)
+            lead: Lead enrichi et scoré
+        """
+        if not key:
+            return
+
+        if not self.exists:
+            self._save_state()
+        with open(os.path.join(self.directory, self.ENRICHED_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'lead': lead}, ensure_ascii=False, default=str) + '\n')
+        self.enriched_leads()[key] = lead
+
+    def clear(self):
+        """Supprime le point de reprise (run terminé)"""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -7,6 +7,22 @@ APIFY_ACTOR_ID = "compass/crawler-google-places"
 DEFAULT_MAX_RESULTS = 50
 DEFAULT_LANGUAGE = "fr"
 
+# Mode multi-recherches: nombre maximum de recherches soumises dans un même run d'actor
+APIFY_QUERIES_PER_RUN = 25
+
+# Runs d'actor démarrés sans attendre leur fin: attente entre deux lectures des
+# datasets sans nouvel item (secondes) et nombre d'items lus par page (items
+# réduits aux champs utiles, voir apify_places.PLACE_FIELDS)
+APIFY_POLL_INTERVAL = 2.0
+APIFY_DATASET_PAGE_SIZE = 1000
+
+# Découpage géographique et runs parallèles: runs d'actor simultanés (plafond du
+# compte Apify), grille par défaut (n × n tuiles)
+# et niveaux de subdivision (2 × 2) des tuiles saturées
+APIFY_MAX_CONCURRENT_RUNS = 4
+GEO_GRID_SIZE = 3
+GEO_TILE_MAX_DEPTH = 1
+
 # Configuration Google Sheets
 SHEET_NAME = "Entreprises"
 SHEET_HEADERS = [
@@ -19,18 +35,90 @@ SHEET_HEADERS = [
     'Catégorie',
     'Nom Contact',
     'Email Contact',
+    'Confiance Email',
     'Poste Contact',
     'Date Ajout',
     'URL Google Maps'
 ]
 
+# Nombre de lignes par appel API lors des écritures groupées
+SHEETS_BATCH_SIZE = 500
+
+# Nouvelles tentatives sur erreur 429 / 5xx (Google Sheets, GoHighLevel)
+SHEETS_MAX_RETRIES = 3
+GHL_MAX_RETRIES = 3
+
 # Configuration GoHighLevel
 GHL_API_URL = "https://rest.gohighlevel.com/v1/contacts/"
 GHL_TAGS = ["Google Maps Scraper", "Lead"]
 
+# API publique de recherche d'entreprises (SIRENE)
+SIRENE_API_URL = "https://recherche-entreprises.api.gouv.fr/search"
+
 # Configuration Hunter.io
 HUNTER_API_URL = "https://api.hunter.io/v2/domain-search"
 
+# Stockage local des leads (SQLite)
+LEAD_STORE_PATH = "leads.db"
+
+# Statistiques des patterns d'emails vérifiés, partagées entre les runs (SQLite)
+EMAIL_PATTERNS_PATH = "email_patterns.db"
+
+# Mode incrémental: durée de validité d'un enrichissement (en jours)
+INCREMENTAL_TTL_DAYS = 30
+
+# Serveur web: nombre de jobs de scraping exécutés en parallèle
+SERVER_MAX_WORKERS = 2
+
+# Enrichissement multi-processus (sharded_enrichment): nombre de processus
+# (1 = enrichissement dans le processus courant) et entreprises en attente par processus
+ENRICH_WORKERS = 1
+ENRICH_QUEUE_DEPTH = 4
+
+# File de travail distribuée (work_queue): backend (sqlite:///chemin, redis://hôte:port/0
+# ou memory://), durée de réservation d'un lieu par un worker (secondes) et tentatives max
+WORK_QUEUE_URL = "sqlite:///work_queue.db"
+WORK_QUEUE_LEASE = 300
+WORK_QUEUE_MAX_ATTEMPTS = 3
+
+# Journalisation: niveau (DEBUG pour le détail par entreprise) et format ('text' ou 'json')
+# Surchargeables par les variables d'environnement LOG_LEVEL / LOG_FORMAT
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "text"
+
+# Dossier des rapports de fin de run (métriques JSON)
+RUN_REPORT_DIR = "reports"
+
+# Dossier des profils cProfile / tracemalloc (runs lancés avec profile=True)
+PROFILE_DIR = "profiles"
+
+# Dossier des points de reprise des runs interrompus (scraper_pro.py --resume)
+CHECKPOINT_DIR = "checkpoints"
+
+# Durée de vie des scrapers partagés entre jobs par les interfaces (en secondes)
+SCRAPER_SERVICE_MAX_AGE = 3600
+
+# Vérification MX des emails construits (mx_verifier): activée, délai d'une
+# résolution (secondes), résolutions simultanées et durée du cache par domaine (secondes)
+MX_VERIFY = True
+MX_TIMEOUT = 3.0
+MX_CONCURRENCY = 200
+MX_CACHE_TTL = 3600
+
+# Vérification SMTP (RCPT TO) des emails candidats (smtp_verifier), désactivée par
+# défaut: le port 25 sortant est souvent bloqué et les serveurs surveillent ces sondes.
+# Port, délai d'une commande (secondes), connexions simultanées et intervalle
+# minimal entre deux RCPT par serveur MX (secondes), durée du cache des verdicts (secondes)
+SMTP_VERIFY = False
+SMTP_PORT = 25
+SMTP_TIMEOUT = 10.0
+SMTP_MX_CONNECTIONS = 2
+SMTP_MX_INTERVAL = 0.5
+SMTP_VERDICT_TTL = 7 * 24 * 3600
+# Expéditeur des sondes ('' = expéditeur nul <>) et nom annoncé en EHLO (nom de la machine si vide)
+SMTP_MAIL_FROM = ""
+SMTP_HELO_HOSTNAME = ""
+
 # Rate limiting (en secondes)
 RATE_LIMIT_GOOGLE_SHEETS = 0.5
 RATE_LIMIT_GOHIGHLEVEL = 0.5
@@ -12,6 +12,19 @@ import time
 from typing import Dict, List, Optional
 import json
 
+from config import EMAIL_PATTERNS_PATH, MX_VERIFY, SIRENE_API_URL, SMTP_MX_INTERVAL, SMTP_PORT, SMTP_VERIFY
+from email_finder import EmailFinder
+from email_patterns import (
+    PATTERNS, PatternStats, build_email, classify_email, normalize_name, size_bucket
+)
+from instrumentation import PROCESS_METRICS, RunMetrics
+from log_setup import get_logger
+from mx_verifier import MXVerifier, grade_confidence
+from smtp_verifier import SMTPVerifier, best_candidate
+
+
+logger = get_logger('contact_enricher')
+
 
 class ContactEnricher:
     """Enrichit les contacts d'entreprises avec des données décisionnaires"""
@@ -49,12 +62,38 @@ class ContactEnricher:
         'apprenti', 'apprentie',
     ]
 
-    def __init__(self):
-        """Initialise l'enrichisseur de contacts"""
+    def __init__(self, metrics: RunMetrics = None, sirene_url: str = SIRENE_API_URL,
+                 mx_verify: bool = MX_VERIFY, dns_nameservers: List[str] = None,
+                 dns_port: int = 53, smtp_verify: bool = SMTP_VERIFY,
+                 smtp_port: int = SMTP_PORT, smtp_connect_host: str = None,
+                 smtp_interval: float = SMTP_MX_INTERVAL,
+                 pattern_store: Optional[str] = EMAIL_PATTERNS_PATH):
+        """
+        Initialise l'enrichisseur de contacts
+
+        Args:
+            metrics: RunMetrics partagé avec le scraper (optionnel)
+            sirene_url: URL de recherche de l'API SIRENE
+            mx_verify: Vérifier les MX du domaine des emails construits
+            dns_nameservers: Serveurs DNS de la vérification MX (système si None)
+            dns_port: Port des serveurs DNS
+            smtp_verify: Vérifier les emails construits auprès des serveurs MX (RCPT TO)
+            smtp_port: Port SMTP des serveurs MX
+            smtp_connect_host: Serveur SMTP contacté à la place des MX (serveur de test)
+            smtp_interval: Intervalle minimal entre deux RCPT par serveur MX (secondes)
+            pattern_store: Base des patterns d'emails vérifiés (None: ordre a priori, sans apprentissage)
+        """
+        self.metrics = metrics or RunMetrics(parent=PROCESS_METRICS)
+        self.sirene_url = sirene_url
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        # Pages équipe des sites web, sauf l'API SIRENE mesurée à part
+        self.metrics.instrument_session(
+            self.session, 'http.team_pages',
+            hosts={urlparse(sirene_url).netloc: 'http.sirene'}
+        )
 
         # Patterns pour extraire emails
         self.email_pattern = re.compile(
@@ -69,6 +108,23 @@ class ContactEnricher:
         # Cache pour éviter les appels répétés
         self.cache = {}
 
+        # Chercheur d'emails réutilisé (une seule session HTTP)
+        self.email_finder = EmailFinder(metrics=self.metrics)
+
+        # Vérification MX, cache partagé par toutes les entreprises du run
+        self.mx_verifier = None
+        if mx_verify:
+            self.mx_verifier = MXVerifier(dns_nameservers, dns_port, metrics=self.metrics)
+
+        # Vérification SMTP (opt-in: sondes RCPT TO vers les serveurs des prospects)
+        self.smtp_verifier = None
+        if smtp_verify and self.mx_verifier:
+            self.smtp_verifier = SMTPVerifier(port=smtp_port, min_interval=smtp_interval,
+                                              connect_host=smtp_connect_host, metrics=self.metrics)
+
+        # Patterns d'emails appris des emails vérifiés, tous runs confondus
+        self.pattern_stats = PatternStats(pattern_store) if pattern_store else None
+
     def extract_domain(self, website: str) -> Optional[str]:
         """
         Extrait le domaine propre d'une URL
@@ -122,13 +178,13 @@ class ContactEnricher:
                 # - L'API Google Custom Search
 
                 # PLACEHOLDER - À implémenter avec une vraie API
-                print(f"  🔍 LinkedIn: Recherche '{title}' pour {company_name[:30]}...")
+                logger.debug("🔍 LinkedIn: Recherche '%s' pour %s...", title, company_name[:30])
 
                 # Pause pour éviter rate limiting
                 time.sleep(0.5)
 
             except Exception as e:
-                print(f"  ⚠️  Erreur LinkedIn search: {e}")
+                logger.warning("⚠️  Erreur LinkedIn search: %s", e)
                 continue
 
         return result
@@ -152,7 +208,9 @@ class ContactEnricher:
         # Cache check
         cache_key = f"team_{website}"
         if cache_key in self.cache:
+            self.metrics.incr('cache_lookups', cache='team_pages', result='hit')
             return self.cache[cache_key]
+        self.metrics.incr('cache_lookups', cache='team_pages', result='miss')
 
         if not website.startswith(('http://', 'https://')):
             website = 'https://' + website
@@ -173,7 +231,7 @@ class ContactEnricher:
             '',  # Page d'accueil en dernier
         ]
 
-        print(f"  👥 Scraping équipe sur {website[:50]}...")
+        logger.debug("👥 Scraping équipe sur %s...", website[:50])
 
         for page in priority_pages:
             url = urljoin(website, page)
@@ -192,7 +250,7 @@ class ContactEnricher:
 
                 if members:
                     team_members.extend(members)
-                    print(f"  ✓ Trouvé {len(members)} membre(s) sur {page or '/'}")
+                    logger.debug("✓ Trouvé %d membre(s) sur %s", len(members), page or '/')
                     break  # On a trouvé, pas besoin de continuer
 
                 time.sleep(0.5)  # Rate limiting
@@ -356,7 +414,8 @@ class ContactEnricher:
 
         return decision_makers
 
-    def build_email_from_name(self, name: str, website: str, found_emails: List[str] = None) -> Dict:
+    def build_email_from_name(self, name: str, website: str, found_emails: List[str] = None,
+                              employees: str = '') -> Dict:
         """
         Construit l'email d'une personne à partir de son nom
 
@@ -364,6 +423,7 @@ class ContactEnricher:
             name: Nom complet (ex: "Jean Dupont")
             website: Site web de l'entreprise
             found_emails: Liste d'emails trouvés sur le site (pour détecter le pattern)
+            employees: Effectif SIRENE (ex: '10-19'), pour les statistiques par taille
 
         Returns:
             Dict avec email, pattern, confiance
@@ -378,47 +438,120 @@ class ContactEnricher:
         if len(parts) < 2:
             return {'email': '', 'pattern': '', 'confidence': 'none'}
 
-        first_name = parts[0].lower()
-        last_name = parts[-1].lower()
-
-        # Détecter le pattern utilisé par l'entreprise
-        detected_pattern = self._detect_email_pattern(found_emails, domain) if found_emails else None
-
-        # Générer les patterns possibles (par ordre de probabilité)
-        patterns = [
-            f"{first_name}.{last_name}@{domain}",      # prenom.nom (le plus commun en France)
-            f"{first_name}@{domain}",                   # prenom
-            f"{last_name}@{domain}",                    # nom
-            f"{first_name[0]}.{last_name}@{domain}",   # p.nom
-            f"{first_name}{last_name}@{domain}",        # prenomnom
-            f"{first_name[0]}{last_name}@{domain}",    # pnom
-            f"{first_name}.{last_name[0]}@{domain}",   # prenom.n
-        ]
+        first_name = normalize_name(parts[0])
+        last_name = normalize_name(parts[-1])
+        if not first_name or not last_name:
+            return {'email': '', 'pattern': '', 'confidence': 'none'}
+
+        mx = self.mx_verifier.lookup(domain) if self.mx_verifier else None
+        provider = mx['provider'] if mx else ''
+        size = size_bucket(employees)
+
+        # Générer les patterns possibles, classés d'après les emails vérifiés
+        # (domaine, hébergeur, taille) ou par ordre de probabilité a priori
+        if self.pattern_stats:
+            ranking = [pattern for pattern, _ in self.pattern_stats.predict(domain, provider, size)]
+        else:
+            ranking = list(PATTERNS)
+        patterns = [(pattern, build_email(pattern, first_name, last_name, domain)) for pattern in ranking]
+
+        # Détecter le pattern utilisé par l'entreprise: sur son site, sinon
+        # d'après les emails du domaine vérifiés lors des runs précédents
+        detected_pattern = None
+        if found_emails:
+            detected_pattern = self._detect_email_pattern(found_emails, domain, first_name, last_name)
+        if not detected_pattern and self.pattern_stats:
+            detected_pattern = self.pattern_stats.domain_pattern(domain)
+
+        # L'email de la personne publié sur le site est vérifié: on l'apprend
+        if self.pattern_stats:
+            for email in found_emails or []:
+                pattern = classify_email(email, first_name, last_name)
+                if pattern and email.lower().endswith('@' + domain):
+                    self.pattern_stats.observe(email, pattern, domain, provider, size)
 
         # Si on a détecté un pattern, le mettre en premier
         if detected_pattern:
             # Appliquer le pattern détecté
             email = self._apply_pattern(detected_pattern, first_name, last_name, domain)
-            return {
+            result = {
                 'email': email,
                 'pattern': detected_pattern,
                 'confidence': 'high'
             }
+        else:
+            # Sinon, retourner le pattern le plus probable
+            result = {
+                'email': patterns[0][1],
+                'pattern': patterns[0][0],
+                'confidence': 'medium'
+            }
 
-        # Sinon, retourner le pattern le plus probable (prenom.nom)
-        return {
-            'email': patterns[0],
-            'pattern': 'prenom.nom@domaine',
-            'confidence': 'medium'
-        }
+        result = self._check_mx(result, domain)
+        return self._check_smtp(result, domain, patterns, size)
+
+    def _check_mx(self, result: Dict, domain: str) -> Dict:
+        """
+        Ajoute la vérification MX du domaine à un email construit
+
+        Returns:
+            result complété de mx_status / mx_provider, confiance abaissée
+            si le domaine ne peut pas recevoir d'email
+        """
+        mx = self.mx_verifier.lookup(domain) if self.mx_verifier else None
+        result['mx_status'] = mx['status'] if mx else ''
+        result['mx_provider'] = mx['provider'] if mx else ''
+        result['confidence'] = grade_confidence(result['confidence'], mx)
+        return result
 
-    def _detect_email_pattern(self, emails: List[str], domain: str) -> Optional[str]:
+    def _check_smtp(self, result: Dict, domain: str, patterns: List[tuple], size: str = '') -> Dict:
+        """
+        Vérifie l'email construit et les autres patterns auprès du serveur MX
+
+        Le candidat retenu est testé en premier, puis les autres patterns dans
+        leur ordre de probabilité, dans une même session SMTP.
+
+        Returns:
+            result complété de smtp_verdict: 'valid' (email remplacé par le
+            candidat accepté, confiance 'high'), 'catch_all' (le domaine accepte
+            tout, confiance inchangée), 'invalid' (tous refusés, confiance 'low'),
+            'unknown' ou '' sans vérification. Un email accepté enrichit les
+            statistiques de patterns (size: tranche de taille de l'entreprise)
+        """
+        result['smtp_verdict'] = ''
+        if not self.smtp_verifier or result['mx_status'] != 'ok':
+            return result
+
+        candidates = [(result['pattern'], result['email'])]
+        candidates += [(pattern, email) for pattern, email in patterns if email != result['email']]
+        mx = self.mx_verifier.lookup(domain)
+        check = self.smtp_verifier.verify(domain, mx['hosts'], [email for _, email in candidates])
+
+        best = best_candidate(candidates, check)
+        if not best:
+            result['smtp_verdict'] = 'unknown'
+        elif best['verdict'] == 'valid':
+            result.update(email=best['email'], pattern=best['pattern'], confidence='high')
+            result['smtp_verdict'] = 'valid'
+            if self.pattern_stats:
+                self.pattern_stats.observe(best['email'], best['pattern'], domain,
+                                           result['mx_provider'], size)
+        else:
+            result['smtp_verdict'] = best['verdict']
+            if best['verdict'] == 'invalid':
+                result['confidence'] = 'low'
+        return result
+
+    def _detect_email_pattern(self, emails: List[str], domain: str, first_name: str = '',
+                              last_name: str = '') -> Optional[str]:
         """
         Détecte le pattern d'email utilisé par l'entreprise
 
         Args:
             emails: Liste d'emails trouvés
             domain: Domaine de l'entreprise
+            first_name: Prénom normalisé de la personne cherchée (optionnel)
+            last_name: Nom normalisé de la personne cherchée (optionnel)
 
         Returns:
             Pattern détecté ou None
@@ -432,6 +565,12 @@ class ContactEnricher:
         if not company_emails:
             return None
 
+        # Email de la personne elle-même: pattern exact
+        for email in company_emails:
+            pattern = classify_email(email, first_name, last_name)
+            if pattern:
+                return pattern
+
         # Analyser les patterns
         for email in company_emails:
             local_part = email.split('@')[0].lower()
@@ -454,15 +593,7 @@ class ContactEnricher:
 
     def _apply_pattern(self, pattern: str, first_name: str, last_name: str, domain: str) -> str:
         """Applique un pattern pour générer un email"""
-        patterns_map = {
-            'prenom.nom@domaine': f"{first_name}.{last_name}@{domain}",
-            'p.nom@domaine': f"{first_name[0]}.{last_name}@{domain}",
-            'prenomnom@domaine': f"{first_name}{last_name}@{domain}",
-            'prenom@domaine': f"{first_name}@{domain}",
-            'nom@domaine': f"{last_name}@{domain}",
-        }
-
-        return patterns_map.get(pattern, f"{first_name}.{last_name}@{domain}")
+        return build_email(pattern, first_name, last_name, domain)
 
     def validate_email_pattern(self, email: str, website: str) -> str:
         """
@@ -475,20 +606,27 @@ class ContactEnricher:
         Returns:
             Confiance: 'high', 'medium', 'low'
         """
-        # Pour l'instant, on retourne medium par défaut
-        # Dans une vraie implémentation, on pourrait :
-        # - Vérifier le MX record du domaine
-        # - Faire une validation SMTP (attention au rate limiting)
-        # - Comparer avec les emails trouvés sur le site
-
         if not email or '@' not in email:
             return 'none'
 
         domain = self.extract_domain(website)
-        if domain and domain in email:
-            return 'medium'
-
-        return 'low'
+        if not domain or domain not in email:
+            return 'low'
+
+        # Le domaine de l'email doit avoir un serveur de messagerie
+        email_domain = email.split('@')[1]
+        mx = self.mx_verifier.lookup(email_domain) if self.mx_verifier else None
+        confidence = grade_confidence('medium', mx)
+
+        # Puis la boîte doit être acceptée par ce serveur (vérification SMTP cadencée par MX)
+        if self.smtp_verifier and mx and mx['status'] == 'ok':
+            check = self.smtp_verifier.verify(email_domain, mx['hosts'], [email])
+            verdict = check['verdicts'].get(email.lower())
+            if verdict == 'valid':
+                confidence = 'high'
+            elif verdict == 'invalid':
+                confidence = 'low'
+        return confidence
 
     def enrich_with_api(self, company_name: str, website: str = None,
                         address: str = None) -> Dict:
@@ -515,12 +653,12 @@ class ContactEnricher:
             'api_source': ''
         }
 
-        print(f"  🔍 Recherche SIRET/SIREN pour {company_name[:30]}...")
+        logger.debug("🔍 Recherche SIRET/SIREN pour %s...", company_name[:30])
 
         try:
             # API 1: entreprise.data.gouv.fr (API publique gratuite)
             # Rechercher l'entreprise par nom
-            search_url = "https://recherche-entreprises.api.gouv.fr/search"
+            search_url = self.sirene_url
             params = {
                 'q': company_name,
                 'per_page': 1
@@ -551,10 +689,10 @@ class ContactEnricher:
                     if effectifs:
                         result['employees'] = effectifs
 
-                    print(f"  ✓ SIRET trouvé: {result['siret']}")
+                    logger.debug("✓ SIRET trouvé: %s", result['siret'])
 
         except Exception as e:
-            print(f"  ⚠️  Erreur API entreprise.data.gouv.fr: {e}")
+            logger.warning("⚠️  Erreur API entreprise.data.gouv.fr: %s", e)
 
         # Pause pour rate limiting
         time.sleep(0.5)
@@ -574,7 +712,7 @@ class ContactEnricher:
         Returns:
             Dict complet avec toutes les infos enrichies
         """
-        print(f"\n🔍 Enrichissement: {company_name}")
+        logger.debug("🔍 Enrichissement: %s", company_name)
 
         enriched = {
             # Contact
@@ -584,6 +722,9 @@ class ContactEnricher:
             'contact_phone': '',
             'contact_linkedin': '',
             'email_confidence': 'none',
+            'email_mx': '',
+            'email_provider': '',
+            'email_smtp': '',
 
             # Entreprise
             'siret': '',
@@ -598,6 +739,9 @@ class ContactEnricher:
             'data_sources': []
         }
 
+        # Données légales d'abord: l'effectif sert à classer les patterns d'emails
+        api_data = self.enrich_with_api(company_name, website, address)
+
         # 1. Chercher l'équipe sur le site web
         team = self.extract_team_from_website(website, company_name)
 
@@ -610,19 +754,21 @@ class ContactEnricher:
 
             # 2. Construire l'email à partir du nom
             # D'abord, scraper le site pour trouver des emails
-            from email_finder import EmailFinder
-            email_finder = EmailFinder()
-            found_emails = email_finder.scrape_website_for_emails(website)
+            found_emails = self.email_finder.scrape_website_for_emails(website)
 
             # Construire l'email du décideur
             email_result = self.build_email_from_name(
                 decision_maker['name'],
                 website,
-                found_emails
+                found_emails,
+                employees=api_data['employees']
             )
 
             enriched['contact_email'] = email_result['email']
             enriched['email_confidence'] = email_result['confidence']
+            enriched['email_mx'] = email_result.get('mx_status', '')
+            enriched['email_provider'] = email_result.get('mx_provider', '')
+            enriched['email_smtp'] = email_result.get('smtp_verdict', '')
 
             if email_result['confidence'] in ['high', 'medium']:
                 enriched['data_sources'].append('email_constructed')
@@ -634,8 +780,6 @@ class ContactEnricher:
         #     enriched['data_sources'].append('linkedin')
 
         # 4. Enrichir avec les APIs publiques
-        api_data = self.enrich_with_api(company_name, website, address)
-
         enriched['siret'] = api_data['siret']
         enriched['siren'] = api_data['siren']
         enriched['legal_form'] = api_data['legal_form']
@@ -655,15 +799,30 @@ class ContactEnricher:
             # Construire l'email
             email_result = self.build_email_from_name(
                 api_data['legal_manager'],
-                website
+                website,
+                employees=api_data['employees']
             )
             enriched['contact_email'] = email_result['email']
             enriched['email_confidence'] = email_result['confidence']
+            enriched['email_mx'] = email_result.get('mx_status', '')
+            enriched['email_provider'] = email_result.get('mx_provider', '')
+            enriched['email_smtp'] = email_result.get('smtp_verdict', '')
 
-        print(f"  ✅ Enrichissement terminé - Sources: {', '.join(enriched['data_sources'])}")
+        self.metrics.incr(f"emails.{enriched['email_confidence']}")
+
+        logger.debug("✅ Enrichissement terminé - Sources: %s", ', '.join(enriched['data_sources']))
 
         return enriched
 
+    def close(self):
+        """
+        Ferme les connexions SMTP inactives (fin d'un lot d'enrichissement)
+
+        L'enricher reste utilisable: les connexions sont rouvertes au besoin.
+        """
+        if self.smtp_verifier:
+            self.smtp_verifier.close()
+
 
 if __name__ == "__main__":
     # Test du module
@@ -34,7 +34,7 @@ class ContactScorer:
         - Email HIGH confidence + nom vérifié: 40 points
         - Email MEDIUM + nom probable: 25 points
         - Email LOW générique: 10 points
-        - Pas d'email: 0 points
+        - Pas d'email, ou domaine sans serveur de messagerie (MX): 0 points
 
         Args:
             contact_data: Dict avec email, email_confidence, contact_name
@@ -49,6 +49,14 @@ class ContactScorer:
         if not email:
             return 0
 
+        # Domaine inexistant ou sans MX: l'email ne peut pas être délivré
+        if contact_data.get('email_mx') in ('nxdomain', 'no_mx'):
+            return 0
+
+        # Boîte refusée par le serveur MX (vérification SMTP)
+        if contact_data.get('email_smtp') == 'invalid':
+            return 0
+
         # Vérifier si l'email est personnalisé (pas générique)
         generic_emails = ['contact', 'info', 'hello', 'bonjour', 'commercial', 'accueil']
         is_generic = any(gen in email.lower() for gen in generic_emails)
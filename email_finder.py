@@ -9,14 +9,25 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import time
+from instrumentation import PROCESS_METRICS, RunMetrics
+from log_setup import get_logger
+
+logger = get_logger('email_finder')
 
 class EmailFinder:
-    def __init__(self):
-        """Initialise le chercheur d'emails"""
+    def __init__(self, metrics=None):
+        """
+        Initialise le chercheur d'emails
+        
+        Args:
+            metrics: RunMetrics partagé avec le scraper (optionnel)
+        """
+        self.metrics = metrics or RunMetrics(parent=PROCESS_METRICS)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        self.metrics.instrument_session(self.session, 'http.website')
         
         # Regex pour trouver des emails
         self.email_pattern = re.compile(
@@ -226,7 +237,7 @@ class EmailFinder:
         
         # 1. Essayer de scraper le site web
         if website:
-            print(f"  🔍 Scraping {website[:50]}...")
+            logger.debug("🔍 Scraping %s...", website[:50])
             scraped_emails = self.scrape_website_for_emails(website)
             
             if scraped_emails:
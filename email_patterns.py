@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Apprentissage des patterns d'emails d'une entreprise à l'autre
+Chaque email vérifié (trouvé sur le site pour la personne, ou accepté par le
+serveur SMTP) est enregistré avec son pattern, son domaine, l'hébergeur de
+messagerie et la taille de l'entreprise. Les fréquences sont chargées en
+mémoire au démarrage: les prédictions ne font ni requête SQL ni appel réseau
+"""
+
+import argparse
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import EMAIL_PATTERNS_PATH
+
+# Patterns de construction, par ordre de probabilité a priori (le plus commun en France d'abord)
+PATTERNS = {
+    'prenom.nom@domaine': lambda first, last: f"{first}.{last}",
+    'prenom@domaine': lambda first, last: first,
+    'nom@domaine': lambda first, last: last,
+    'p.nom@domaine': lambda first, last: f"{first[0]}.{last}",
+    'prenomnom@domaine': lambda first, last: f"{first}{last}",
+    'pnom@domaine': lambda first, last: f"{first[0]}{last}",
+    'prenom.n@domaine': lambda first, last: f"{first}.{last[0]}",
+}
+
+# Poids a priori de chaque pattern (décroissant dans l'ordre de PATTERNS)
+PRIOR = {pattern: 1.0 / (rank + 2) for rank, pattern in enumerate(PATTERNS)}
+
+# Poids des statistiques par portée: un email vérifié sur le domaine même
+# l'emporte sur les tendances de l'hébergeur ou de la taille d'entreprise
+SCOPE_WEIGHTS = (('domain', 8.0), ('provider', 2.0), ('size', 1.0), ('global', 1.0))
+
+# Nombre d'observations à partir duquel une portée pèse la moitié de son poids
+SMOOTHING = 3.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    email TEXT PRIMARY KEY,
+    pattern TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    size TEXT NOT NULL,
+    observed_at TEXT NOT NULL
+);
+"""
+
+
+def normalize_name(name: str) -> str:
+    """Partie de nom utilisable dans un email (minuscules, sans accents ni espaces)"""
+    name = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z-]', '', name.lower())
+
+
+def build_email(pattern: str, first_name: str, last_name: str, domain: str) -> str:
+    """
+    Email d'une personne selon un pattern
+
+    Args:
+        pattern: Clé de PATTERNS (prenom.nom@domaine par défaut si inconnue)
+        first_name: Prénom normalisé
+        last_name: Nom normalisé
+        domain: Domaine de l'entreprise
+
+    Returns:
+        Email construit
+    """
+    build = PATTERNS.get(pattern, PATTERNS['prenom.nom@domaine'])
+    return f"{build(first_name, last_name)}@{domain}"
+
+
+def classify_email(email: str, first_name: str, last_name: str) -> Optional[str]:
+    """
+    Pattern d'un email connu pour une personne connue
+
+    Returns:
+        Clé de PATTERNS, ou None si l'email ne correspond à aucun pattern du nom
+    """
+    local_part = email.split('@')[0].lower()
+    if not first_name or not last_name:
+        return None
+    for pattern, build in PATTERNS.items():
+        if build(first_name, last_name) == local_part:
+            return pattern
+    return None
+
+
+def size_bucket(employees: str) -> str:
+    """
+    Tranche de taille d'une entreprise d'après son effectif SIRENE (ex: '10-19')
+
+    Returns:
+        'tpe' (moins de 10), 'pme' (moins de 250), 'eti' ou '' si inconnu
+    """
+    match = re.search(r'\d+', employees or '')
+    if not match:
+        return ''
+    count = int(match.group())
+    if count < 10:
+        return 'tpe'
+    return 'pme' if count < 250 else 'eti'
+
+
+class PatternStats:
+    """
+    Fréquences des patterns d'emails vérifiés, par domaine, hébergeur MX et taille
+
+    Les observations sont écrites dans SQLite (un email n'est compté qu'une
+    fois, quel que soit le nombre de runs qui le retrouvent) et les
+    fréquences sont tenues en mémoire. L'objet peut être partagé entre
+    threads; plusieurs processus peuvent utiliser la même base.
+
+    Usage:
+        stats = PatternStats()
+        stats.observe('j.dupont@example.fr', 'p.nom@domaine', 'example.fr', provider='ovh', size='pme')
+        stats.predict('autre.fr', provider='ovh', size='pme')
+        # [('p.nom@domaine', 0.41), ('prenom.nom@domaine', 0.19), ...]
+    """
+
+    def __init__(self, path: str = EMAIL_PATTERNS_PATH):
+        """
+        Args:
+            path: Chemin de la base SQLite (':memory:' pour les tests)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._totals = {}
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self._load()
+
+    def _load(self):
+        """Charge les fréquences de toutes les observations en mémoire"""
+        rows = self.conn.execute(
+            'SELECT pattern, domain, provider, size, COUNT(*) FROM observations '
+            'GROUP BY pattern, domain, provider, size'
+        ).fetchall()
+        for pattern, domain, provider, size, count in rows:
+            self._count(pattern, domain, provider, size, count)
+
+    def _count(self, pattern: str, domain: str, provider: str, size: str, n: int = 1):
+        for scope, key in (('domain', domain), ('provider', provider), ('size', size), ('global', '')):
+            if scope != 'global' and not key:
+                continue
+            counts = self._counts.setdefault((scope, key), {})
+            counts[pattern] = counts.get(pattern, 0) + n
+            self._totals[(scope, key)] = self._totals.get((scope, key), 0) + n
+
+    def observe(self, email: str, pattern: str, domain: str, provider: str = '',
+                size: str = '') -> bool:
+        """
+        Enregistre un email vérifié
+
+        Args:
+            email: Email vérifié
+            pattern: Son pattern (clé de PATTERNS)
+            domain: Domaine de l'entreprise
+            provider: Hébergeur de messagerie (mx_verifier.mx_provider)
+            size: Tranche de taille (size_bucket)
+
+        Returns:
+            False si l'email était déjà connu (les fréquences sont inchangées)
+        """
+        if pattern not in PATTERNS:
+            return False
+
+        domain = domain.lower()
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO observations '
+                    '(email, pattern, domain, provider, size, observed_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (email.lower(), pattern, domain, provider or '', size or '', now)
+                )
+            if cursor.rowcount != 1:
+                return False
+            self._count(pattern, domain, provider or '', size or '')
+        return True
+
+    def domain_pattern(self, domain: str) -> Optional[str]:
+        """
+        Pattern le plus souvent vérifié sur un domaine
+
+        Returns:
+            Clé de PATTERNS, ou None si aucun email du domaine n'a été vérifié
+        """
+        with self._lock:
+            counts = self._counts.get(('domain', (domain or '').lower()))
+            if not counts:
+                return None
+            return max(PATTERNS, key=lambda pattern: (counts.get(pattern, 0), PRIOR[pattern]))
+
+    def predict(self, domain: str = '', provider: str = '', size: str = '') -> List[Tuple[str, float]]:
+        """
+        Patterns classés par probabilité pour une entreprise
+
+        Mélange l'a priori (PRIOR) et les fréquences observées sur le domaine,
+        l'hébergeur, la tranche de taille et l'ensemble des entreprises; chaque
+        portée pèse d'autant plus qu'elle compte d'observations.
+
+        Args:
+            domain: Domaine de l'entreprise
+            provider: Hébergeur de messagerie
+            size: Tranche de taille
+
+        Returns:
+            [(pattern, probabilité)], du plus probable au moins probable
+        """
+        scores = dict(PRIOR)
+        keys = {'domain': (domain or '').lower(), 'provider': provider, 'size': size, 'global': ''}
+
+        with self._lock:
+            for scope, weight in SCOPE_WEIGHTS:
+                counts = self._counts.get((scope, keys[scope]))
+                if not counts or (scope != 'global' and not keys[scope]):
+                    continue
+                total = self._totals[(scope, keys[scope])]
+                evidence = weight * total / (total + SMOOTHING)
+                for pattern, count in counts.items():
+                    scores[pattern] += evidence * count / total
+
+        norm = sum(scores.values())
+        ranking = sorted(scores.items(), key=lambda item: (-item[1], -PRIOR[item[0]]))
+        return [(pattern, score / norm) for pattern, score in ranking]
+
+    def summary(self) -> Dict:
+        """
+        Fréquences globales et par hébergeur
+
+        Returns:
+            Dict observations (total), global {pattern: nombre} et providers
+            {hébergeur: {pattern: nombre}}
+        """
+        with self._lock:
+            return {
+                'observations': self._totals.get(('global', ''), 0),
+                'global': dict(self._counts.get(('global', ''), {})),
+                'providers': {key: dict(counts) for (scope, key), counts in self._counts.items()
+                              if scope == 'provider'},
+            }
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """Affiche les statistiques apprises et les patterns prédits pour une entreprise"""
+    parser = argparse.ArgumentParser(description="Statistiques des patterns d'emails vérifiés")
+    parser.add_argument('--db', default=EMAIL_PATTERNS_PATH, help="Base des patterns")
+    parser.add_argument('--domain', default='', help="Domaine de l'entreprise")
+    parser.add_argument('--provider', default='', help="Hébergeur de messagerie (google, ovh...)")
+    parser.add_argument('--size', default='', choices=['', 'tpe', 'pme', 'eti'],
+                        help="Tranche de taille")
+    args = parser.parse_args()
+
+    stats = PatternStats(args.db)
+    summary = stats.summary()
+    print(f"\n📊 {summary['observations']} emails vérifiés")
+    for pattern, count in sorted(summary['global'].items(), key=lambda item: -item[1]):
+        print(f"   {pattern:<22}{count:>8}")
+
+    print(f"\n🔮 Prédiction (domaine={args.domain or '-'}, hébergeur={args.provider or '-'}, "
+          f"taille={args.size or '-'})")
+    for pattern, probability in stats.predict(args.domain, args.provider, args.size):
+        print(f"   {pattern:<22}{probability:>8.1%}")
+    stats.close()
+
+
+if __name__ == "__main__":
+    main()
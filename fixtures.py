@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Fixtures locales du corpus synthétique (places_source.generate_corpus)
+Serveur HTTP utilisé comme proxy (sites *.bench.local, faux SIRENE et faux
+GoHighLevel), DNS (MX) et SMTP locaux, et classeur Google Sheets en mémoire:
+le benchmark et les runs --source synthetic s'exécutent sans réseau
+"""
+
+import json
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+from config import EMAIL_PATTERNS_PATH
+from contact_enricher import ContactEnricher
+from places_source import SITE_SUFFIX
+
+# Domaines servis par le serveur de fixtures (utilisé comme proxy HTTP)
+SIRENE_HOST = f'sirene.{SITE_SUFFIX}'
+GHL_HOST = f'ghl.{SITE_SUFFIX}'
+
+
+def render_page(site: Dict, path: str):
+    """
+    Contenu d'une page d'un site du corpus
+
+    Returns:
+        (statut HTTP, HTML)
+    """
+    first_name, last_name = site['manager'].split(' ', 1)
+    email_local = f"{first_name[0]}.{last_name}".lower()
+    home = (f"<html><body><h1>{site['name']}</h1>"
+            f"<p>Votre artisan à {site['city']} depuis 1998.</p>")
+
+    if path in ('', '/'):
+        if site['kind'] == 'mailto':
+            home += f'<a href="mailto:contact@{site["domain"]}">Écrivez-nous</a>'
+        return 200, home + "</body></html>"
+
+    if path in ('/equipe', '/team') and site['kind'] in ('team', 'slow'):
+        return 200, (f'<html><body><div class="team">\n{site["manager"]}\nGérant\n</div>'
+                     f"<p>{site['manager']} - Directeur Commercial</p>"
+                     f"<p>Contact : {email_local}@{site['domain']}</p></body></html>")
+
+    if path == '/mentions-legales' and site['kind'] == 'legal':
+        return 200, (f"<html><body><p>Gérant : {site['manager']}</p>"
+                     f"<p>SIREN {site['siren']} - contact@{site['domain']}</p></body></html>")
+
+    return 404, "<html><body>Page introuvable</body></html>"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Proxy HTTP de fixtures: sites du corpus, faux SIRENE et faux GoHighLevel"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _target(self):
+        """(hôte, chemin, query) de la requête (URL absolue en mode proxy)"""
+        parsed = urlparse(self.path)
+        host = (parsed.netloc or self.headers.get('Host', '')).split(':')[0]
+        return host, parsed.path, parse_qs(parsed.query)
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        host, path, query = self._target()
+        server = self.server
+
+        if host == SIRENE_HOST:
+            time.sleep(server.sirene_delay)
+            self._send(200, json.dumps(server.sirene_response(query.get('q', [''])[0])),
+                       'application/json')
+            return
+
+        site = server.sites.get(host.replace('www.', '', 1))
+        if not site:
+            self._send(404, "<html><body>Hôte inconnu</body></html>")
+            return
+
+        if site['kind'] == 'dead':
+            # Hôte mort: connexion fermée sans réponse
+            self.close_connection = True
+            return
+
+        if site['kind'] == 'slow':
+            time.sleep(server.slow_delay)
+
+        status, html = render_page(site, path)
+        self._send(status, html)
+
+    def do_POST(self):
+        host, _, _ = self._target()
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+
+        if host == GHL_HOST:
+            time.sleep(self.server.ghl_delay)
+            self._send(201, json.dumps({'contact': {'id': 'bench'}}), 'application/json')
+        else:
+            self._send(404, "{}", 'application/json')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serveur local des fixtures, utilisé comme proxy HTTP par les sessions
+    des scrapers
+
+    Usage:
+        with FixtureServer(corpus) as fixture:
+            session.proxies = fixture.proxies
+    """
+
+    daemon_threads = True
+
+    def __init__(self, corpus: List[Dict], slow_delay: float = 2.0,
+                 sirene_delay: float = 0.05, ghl_delay: float = 0.02):
+        """
+        Args:
+            corpus: Entreprises générées par generate_corpus()
+            slow_delay: Latence des hôtes lents (secondes)
+            sirene_delay: Latence du faux SIRENE (secondes)
+            ghl_delay: Latence du faux GoHighLevel (secondes)
+        """
+        super().__init__(('127.0.0.1', 0), FixtureHandler)
+        self.sites = {site['domain']: site for site in corpus}
+        self.by_name = {site['name']: site for site in corpus}
+        self.slow_delay = slow_delay
+        self.sirene_delay = sirene_delay
+        self.ghl_delay = ghl_delay
+        self.dns = DNSStub(self.sites)
+        self.smtp = SMTPStub(self.sites)
+        self._thread = None
+
+    @property
+    def proxies(self) -> Dict[str, str]:
+        """Configuration proxies pour requests"""
+        return {'http': f"http://127.0.0.1:{self.server_port}"}
+
+    @property
+    def sirene_url(self) -> str:
+        return f"http://{SIRENE_HOST}/search"
+
+    @property
+    def ghl_url(self) -> str:
+        return f"http://{GHL_HOST}/v1/contacts/"
+
+    def sirene_response(self, query: str) -> Dict:
+        """Réponse au format recherche-entreprises.api.gouv.fr"""
+        site = self.by_name.get(query)
+        if not site:
+            return {'results': [], 'total_results': 0}
+
+        first_name, last_name = site['manager'].split(' ', 1)
+        return {'results': [{
+            'siren': site['siren'],
+            'siege': {'siret': site['siren'] + '00012'},
+            'nature_juridique': '5499',
+            'date_creation': '1998-03-01',
+            'dirigeants': [{'nom': last_name.upper(), 'prenom': first_name, 'qualite': 'Gérant'}],
+            'matching_etablissements': [{'effectif': '10-19'}],
+        }], 'total_results': 1}
+
+    def start(self):
+        self.dns.start()
+        self.smtp.start()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.dns.stop()
+        self.smtp.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class DNSStub:
+    """
+    Serveur DNS local (UDP) des fixtures pour la vérification MX
+
+    Chaque site du corpus a un MX, sauf les hôtes morts (NXDOMAIN).
+    """
+
+    def __init__(self, sites: Dict[str, Dict]):
+        """
+        Args:
+            sites: Sites du corpus par domaine
+        """
+        self.sites = sites
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.port = self.socket.getsockname()[1]
+        self._running = False
+
+    def response(self, wire: bytes) -> bytes:
+        """Réponse DNS à une requête"""
+        query = dns.message.from_wire(wire)
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        site = self.sites.get(question.name.to_text().rstrip('.').lower())
+
+        if not site or site['kind'] == 'dead':
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif question.rdtype == dns.rdatatype.MX:
+            response.answer.append(dns.rrset.from_text(
+                question.name, 300, 'IN', 'MX', f"10 mx.{SITE_SUFFIX}."
+            ))
+        return response.to_wire()
+
+    def _serve(self):
+        while self._running:
+            try:
+                wire, address = self.socket.recvfrom(4096)
+            except OSError:
+                return
+            self.socket.sendto(self.response(wire), address)
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.socket.close()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Session SMTP minimale: EHLO, MAIL, RCPT, RSET, NOOP, QUIT"""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        self.reply(f"220 mx.{SITE_SUFFIX} ESMTP")
+
+        for raw in self.rfile:
+            command = raw.decode('ascii', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply(f"250 mx.{SITE_SUFFIX}")
+            elif verb == 'RCPT':
+                with server.lock:
+                    server.rcpts += 1
+                address = command.partition(':')[2].strip().strip('<>').lower()
+                if server.accepts(address):
+                    self.reply("250 2.1.5 OK")
+                else:
+                    self.reply("550 5.1.1 User unknown")
+            elif verb in ('MAIL', 'RSET', 'NOOP'):
+                self.reply("250 2.0.0 OK")
+            elif verb == 'QUIT':
+                self.reply("221 2.0.0 Bye")
+                return
+            else:
+                self.reply("502 5.5.2 Command not recognized")
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """
+    Serveur SMTP local des fixtures pour la vérification SMTP
+
+    Accepte l'email p.nom du gérant de chaque site; les hôtes lents acceptent
+    toutes les adresses (catch-all).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, sites: Dict[str, Dict]):
+        """
+        Args:
+            sites: Sites du corpus par domaine
+        """
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.port = self.server_address[1]
+        self.sites = sites
+        self.mailboxes = set()
+        for domain, site in sites.items():
+            first_name, last_name = site['manager'].split(' ', 1)
+            self.mailboxes.add(f"{first_name[0]}.{last_name}@{domain}".lower())
+        self.lock = threading.Lock()
+        self.sessions = 0
+        self.rcpts = 0
+
+    def accepts(self, address: str) -> bool:
+        site = self.sites.get(address.rpartition('@')[2])
+        if site and site['kind'] == 'slow':
+            return True
+        return address in self.mailboxes
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeWorksheet:
+    """Feuille Google Sheets en mémoire, avec une latence par appel API"""
+
+    def __init__(self, headers: List[str], latency: float = 0.05):
+        self.rows = [list(headers)]
+        self.latency = latency
+        self.api_calls = 0
+
+    def _call(self):
+        self.api_calls += 1
+        time.sleep(self.latency)
+
+    def col_values(self, column: int) -> List[str]:
+        self._call()
+        return [row[column - 1] if len(row) >= column else '' for row in self.rows]
+
+    def append_rows(self, rows: List[List]):
+        self._call()
+        self.rows.extend(list(row) for row in rows)
+
+    def batch_update(self, updates: List[Dict]):
+        self._call()
+
+
+class FakeSpreadsheet:
+    """Classeur Google Sheets en mémoire"""
+
+    def __init__(self, worksheets: Dict[str, FakeWorksheet]):
+        self.worksheets = worksheets
+
+    def worksheet(self, name: str) -> FakeWorksheet:
+        return self.worksheets[name]
+
+
+def prepare_scraper(scraper, fixture: FixtureServer, sheet_latency: float,
+                    smtp: bool = False, smtp_interval: float = 0.0,
+                    pattern_store: Optional[str] = EMAIL_PATTERNS_PATH):
+    """
+    Branche un scraper sur les fixtures (sites, SIRENE, Sheets, GoHighLevel)
+
+    Args:
+        scraper: GoogleMapsScraper ou GoogleMapsScraperPro
+        fixture: Serveur de fixtures démarré
+        sheet_latency: Latence d'un appel Google Sheets simulé (secondes)
+        smtp: Vérifier les emails construits auprès du faux serveur SMTP
+        smtp_interval: Intervalle minimal entre deux RCPT (un seul MX pour tout le corpus)
+        pattern_store: Base des patterns d'emails appris (None: aucun apprentissage)
+    """
+    sheet_name = 'Prospection' if hasattr(scraper, 'enricher') else 'Entreprises'
+    scraper.google_sheet = FakeSpreadsheet({
+        sheet_name: FakeWorksheet(scraper.SHEET_HEADERS, sheet_latency)
+    })
+
+    if hasattr(scraper, 'enricher'):
+        scraper.enricher = ContactEnricher(metrics=scraper.metrics, sirene_url=fixture.sirene_url,
+                                           dns_nameservers=['127.0.0.1'], dns_port=fixture.dns.port,
+                                           smtp_verify=smtp, smtp_port=fixture.smtp.port,
+                                           smtp_connect_host='127.0.0.1', smtp_interval=smtp_interval,
+                                           pattern_store=pattern_store)
+        sessions = [scraper.enricher.session, scraper.enricher.email_finder.session]
+    else:
+        scraper.ghl_api_key = 'benchmark'
+        scraper.ghl_location_id = 'benchmark'
+        scraper.ghl_api_url = fixture.ghl_url
+        sessions = [scraper.email_finder.session, scraper.ghl_session]
+
+    for session in sessions:
+        session.trust_env = False
+        session.proxies = fixture.proxies
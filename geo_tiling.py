@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Découpage géographique des recherches sur de grandes zones
+Une recherche plafonnée par maxCrawledPlacesPerSearch ("restaurants à Paris")
+est répartie en tuiles (arrondissements / codes postaux ou grille de coordonnées)
+exécutées en runs d'actor parallèles, fusionnées et dédoublonnées par place ID
+"""
+
+from typing import Dict, Iterator, List, Tuple, Union
+
+from apify_places import ActorRunPool, build_run_input, iter_unique
+from config import APIFY_ACTOR_ID, APIFY_MAX_CONCURRENT_RUNS, GEO_GRID_SIZE, GEO_TILE_MAX_DEPTH
+
+
+# Codes postaux des villes découpées par arrondissement
+AREAS = {
+    'paris': [f"750{n:02d}" for n in range(1, 21)] + ['75116'],
+    'lyon': [f"6900{n}" for n in range(1, 10)],
+    'marseille': [f"130{n:02d}" for n in range(1, 17)],
+}
+
+# Zone: nom d'AREAS ou boîte (sud, ouest, nord, est) en degrés
+Area = Union[str, Tuple[float, float, float, float]]
+
+
+def parse_area(text: str) -> Area:
+    """
+    Interprète une zone saisie par l'utilisateur
+
+    Args:
+        text: Nom de ville découpée ("paris") ou "sud,ouest,nord,est"
+
+    Returns:
+        Zone utilisable par plan_tiles (None si la saisie est vide)
+
+    Raises:
+        ValueError: Zone inconnue ou coordonnées invalides
+    """
+    text = text.strip().lower()
+    if not text:
+        return None
+    if text in AREAS:
+        return text
+
+    try:
+        bbox = tuple(float(value) for value in text.split(','))
+    except ValueError:
+        bbox = ()
+    if len(bbox) != 4 or bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+        raise ValueError(f"Zone invalide: '{text}' (attendu: {', '.join(AREAS)} ou sud,ouest,nord,est)")
+    return bbox
+
+
+def postcode_tiles(search_query: str, area: str) -> List[Dict]:
+    """
+    Une tuile par code postal de la ville (ex: "restaurants 75011")
+
+    Args:
+        search_query: Recherche sans la ville (ex: "restaurants")
+        area: Clé d'AREAS
+
+    Returns:
+        Liste de tuiles
+    """
+    return [{'name': postcode, 'query': f"{search_query} {postcode}", 'depth': 0}
+            for postcode in AREAS[area]]
+
+
+def grid_tiles(search_query: str, bbox: Tuple[float, float, float, float],
+               rows: int = GEO_GRID_SIZE, cols: int = GEO_GRID_SIZE, depth: int = 0,
+               prefix: str = '') -> List[Dict]:
+    """
+    Découpe une boîte en grille de rows × cols tuiles
+
+    Args:
+        search_query: Recherche (la zone est portée par la géolocalisation de la tuile)
+        bbox: (sud, ouest, nord, est) en degrés
+        rows: Nombre de lignes
+        cols: Nombre de colonnes
+        depth: Niveau de subdivision des tuiles produites
+        prefix: Préfixe des noms de tuiles (tuile parente)
+
+    Returns:
+        Liste de tuiles
+    """
+    south, west, north, east = bbox
+    lat_step = (north - south) / rows
+    lng_step = (east - west) / cols
+
+    return [{
+        'name': f"{prefix}r{row}c{col}",
+        'query': search_query,
+        'bbox': (south + row * lat_step, west + col * lng_step,
+                 south + (row + 1) * lat_step, west + (col + 1) * lng_step),
+        'depth': depth,
+    } for row in range(rows) for col in range(cols)]
+
+
+def plan_tiles(search_query: str, area: Area, rows: int = GEO_GRID_SIZE,
+               cols: int = GEO_GRID_SIZE) -> List[Dict]:
+    """
+    Planifie les tuiles d'une recherche sur une zone
+
+    Args:
+        search_query: Recherche sans la ville (ex: "restaurants")
+        area: Nom d'AREAS (codes postaux) ou boîte (sud, ouest, nord, est) (grille)
+        rows: Lignes de la grille (boîte uniquement)
+        cols: Colonnes de la grille (boîte uniquement)
+
+    Returns:
+        Liste de tuiles
+    """
+    if isinstance(area, str):
+        return postcode_tiles(search_query, area.lower())
+    return grid_tiles(search_query, tuple(area), rows, cols)
+
+
+def split_tile(tile: Dict) -> List[Dict]:
+    """Subdivise une tuile de grille saturée en 2 × 2 tuiles"""
+    return grid_tiles(tile['query'], tile['bbox'], 2, 2, tile['depth'] + 1, f"{tile['name']}.")
+
+
+def tile_run_input(tile: Dict, max_results: int) -> Dict:
+    """
+    Paramètres du run d'actor d'une tuile
+
+    Les tuiles de grille restreignent la recherche à leur polygone
+    (customGeolocation, coordonnées GeoJSON [longitude, latitude]).
+    """
+    run_input = build_run_input([tile['query']], max_results)
+    if 'bbox' in tile:
+        south, west, north, east = tile['bbox']
+        run_input['customGeolocation'] = {
+            'type': 'Polygon',
+            'coordinates': [[[west, south], [east, south], [east, north],
+                             [west, north], [west, south]]],
+        }
+    return run_input
+
+
+def iter_tiles(apify_client, tiles: List[Dict], max_results: int, report: List[Dict],
+               max_concurrency: int = APIFY_MAX_CONCURRENT_RUNS,
+               max_depth: int = GEO_TILE_MAX_DEPTH, metrics=None,
+               actor_id: str = APIFY_ACTOR_ID, checkpoint=None) -> Iterator[Dict]:
+    """
+    Exécute les tuiles en runs d'actor parallèles et produit les lieux au fil de l'eau
+
+    Une tuile est saturée quand elle atteint max_results: des lieux ont
+    probablement été tronqués. Les tuiles de grille saturées sont
+    subdivisées (2 × 2) et relancées jusqu'à max_depth niveaux; les
+    tuiles par code postal saturées sont seulement signalées.
+
+    Args:
+        apify_client: ApifyClient
+        tiles: Tuiles planifiées (plan_tiles)
+        max_results: Nombre maximum de lieux par tuile
+        report: Liste complétée à la fin de chaque tuile: tile, query, count,
+            saturated, split
+        max_concurrency: Nombre maximum de runs d'actor simultanés
+        max_depth: Niveaux de subdivision des tuiles saturées (0 pour aucun)
+        metrics: RunMetrics (apify.run / apify.dataset, compteur tiles)
+        actor_id: Actor Apify
+        checkpoint: RunCheckpoint (reprise des runs déjà lancés, optionnel)
+
+    Yields:
+        Items étiquetés par recherche (source_query) et tuile (non dédoublonnés)
+    """
+    pool = ActorRunPool(apify_client, actor_id, max_concurrency=max_concurrency,
+                        metrics=metrics, checkpoint=checkpoint)
+    for tile in tiles:
+        pool.submit(tile_run_input(tile, max_results), tag=tile)
+
+    for event, tile, data in pool.stream():
+        if event == 'item':
+            data['source_query'] = tile['query']
+            data['tile'] = tile['name']
+            yield data
+            continue
+
+        saturated = data['count'] >= max_results
+        split = saturated and 'bbox' in tile and tile['depth'] < max_depth
+        if split:
+            for sub_tile in split_tile(tile):
+                pool.submit(tile_run_input(sub_tile, max_results), tag=sub_tile)
+
+        report.append({'tile': tile['name'], 'query': tile['query'],
+                       'count': data['count'], 'saturated': saturated, 'split': split})
+        if metrics:
+            metrics.incr('tiles', saturated='yes' if saturated else 'no')
+
+
+def run_tiles(apify_client, tiles: List[Dict], max_results: int,
+              max_concurrency: int = APIFY_MAX_CONCURRENT_RUNS,
+              max_depth: int = GEO_TILE_MAX_DEPTH, metrics=None, stage=None,
+              actor_id: str = APIFY_ACTOR_ID) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Exécute les tuiles (voir iter_tiles), fusionne et dédoublonne les résultats
+
+    Args:
+        apify_client: ApifyClient
+        tiles: Tuiles planifiées (plan_tiles)
+        max_results: Nombre maximum de lieux par tuile
+        max_concurrency: Nombre maximum de runs d'actor simultanés
+        max_depth: Niveaux de subdivision des tuiles saturées (0 pour aucun)
+        metrics: RunMetrics (apify.run / apify.dataset, compteur tiles)
+        stage: Stage du pipeline avancé à chaque lieu unique (optionnel)
+        actor_id: Actor Apify
+
+    Returns:
+        (lieux dédoublonnés, rapport par tuile: tile, query, count, saturated, split)
+    """
+    report = []
+    places = []
+    items = iter_tiles(apify_client, tiles, max_results, report, max_concurrency,
+                       max_depth, metrics, actor_id)
+    for item in iter_unique(items):
+        places.append(item)
+        if stage:
+            stage.advance()
+
+    return places, report
+
+
+def format_tile_report(report: List[Dict]) -> str:
+    """
+    Tableau de saturation par tuile
+
+    Returns:
+        Texte prêt à afficher
+    """
+    lines = [f"{'Tuile':<16} {'Lieux':>6}  Saturation"]
+    for entry in report:
+        if entry['split']:
+            status = "⚠️  saturée → subdivisée"
+        elif entry['saturated']:
+            status = "⚠️  saturée (résultats tronqués)"
+        else:
+            status = "✅"
+        lines.append(f"{entry['tile']:<16} {entry['count']:>6}  {status}")
+
+    saturated = sum(1 for entry in report if entry['saturated'] and not entry['split'])
+    lines.append(f"{len(report)} runs d'actor, {saturated} tuiles encore saturées")
+    return '\n'.join(lines)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Instrumentation du pipeline de scraping
+Compte les appels, mesure leur latence (p50/p95/p99), les octets reçus et les erreurs
+par étape et par service externe (Apify, sites web, SIRENE, Sheets, GoHighLevel),
+puis produit un rapport de fin de run en JSON et sous forme de tableau
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from config import RUN_REPORT_DIR
+
+
+# Nombre maximal de mesures de latence conservées par opération
+MAX_SAMPLES = 100000
+
+# Bornes (en secondes) des histogrammes de latence exportés au format Prometheus
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Percentile (rang le plus proche) d'une liste triée
+
+    Args:
+        sorted_values: Valeurs triées par ordre croissant
+        pct: Percentile voulu (0-100)
+
+    Returns:
+        La valeur du percentile (0.0 si la liste est vide)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _counter_key(name: str, labels: Dict) -> tuple:
+    """Clé d'un compteur: nom + labels triés"""
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def _counter_label(key: tuple) -> str:
+    """Nom lisible d'un compteur (ex: 'http_responses{status=2xx}')"""
+    name, labels = key
+    if not labels:
+        return name
+    return name + '{' + ','.join(f"{k}={v}" for k, v in labels) + '}'
+
+
+def _prometheus_name(name: str) -> str:
+    """Nom de métrique Prometheus valide ('http.sirene' → 'http_sirene')"""
+    return ''.join(c if c.isalnum() or c == '_' else '_' for c in name)
+
+
+def _prometheus_labels(labels) -> str:
+    """Labels au format Prometheus ({k="v",...})"""
+    if not labels:
+        return ''
+    escaped = (
+        (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in labels
+    )
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+class RunMetrics:
+    """
+    Métriques d'un run, partageables entre threads
+
+    Chaque opération (ex: 'apify.run', 'http.sirene', 'stage.enrichment')
+    accumule un nombre d'appels, d'erreurs, d'octets reçus et ses latences.
+    Les mesures sont aussi transmises au parent éventuel: les métriques d'un
+    run alimentent ainsi les métriques cumulées du processus (PROCESS_METRICS).
+    """
+
+    def __init__(self, parent: 'RunMetrics' = None, keep_samples: bool = True):
+        """
+        Args:
+            parent: Métriques recevant aussi chaque mesure (optionnel)
+            keep_samples: Conserver les latences individuelles (percentiles
+                du rapport); sinon seuls les histogrammes sont tenus à jour
+        """
+        self.parent = parent
+        self.keep_samples = keep_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Remet les compteurs à zéro (début d'un nouveau run)"""
+        with self._lock:
+            self.started_at = time.time()
+            self._operations = {}
+            self._counters = {}
+
+    def _operation(self, name: str) -> Dict:
+        """Retourne les compteurs d'une opération (appelé sous verrou)"""
+        operation = self._operations.get(name)
+        if operation is None:
+            operation = {
+                'count': 0, 'errors': 0, 'bytes': 0, 'sum': 0.0,
+                'buckets': [0] * len(HISTOGRAM_BUCKETS), 'samples': [],
+            }
+            self._operations[name] = operation
+        return operation
+
+    def record(self, name: str, duration: float, error: bool = False, bytes_received: int = 0):
+        """
+        Enregistre un appel
+
+        Args:
+            name: Nom de l'opération
+            duration: Durée en secondes
+            error: L'appel a échoué
+            bytes_received: Taille de la réponse en octets
+        """
+        with self._lock:
+            operation = self._operation(name)
+            operation['count'] += 1
+            operation['bytes'] += bytes_received
+            operation['sum'] += duration
+            if error:
+                operation['errors'] += 1
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if duration <= bound:
+                    operation['buckets'][i] += 1
+                    break
+            if self.keep_samples and len(operation['samples']) < MAX_SAMPLES:
+                operation['samples'].append(duration)
+
+        if self.parent:
+            self.parent.record(name, duration, error, bytes_received)
+
+    def incr(self, name: str, n: int = 1, **labels):
+        """
+        Incrémente un compteur libre
+
+        Args:
+            name: Nom du compteur (ex: 'emails.high')
+            n: Incrément
+            **labels: Dimensions du compteur (ex: status='2xx')
+        """
+        key = _counter_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+        if self.parent:
+            self.parent.incr(name, n, **labels)
+
+    def counter(self, name: str, **labels) -> int:
+        """Valeur d'un compteur (0 s'il n'a jamais été incrémenté)"""
+        with self._lock:
+            return self._counters.get(_counter_key(name, labels), 0)
+
+    @contextmanager
+    def timer(self, name: str):
+        """
+        Chronomètre un bloc; une exception le compte comme erreur
+
+        Usage:
+            with metrics.timer('apify.run'):
+                run = client.actor(...).call(...)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(name, time.perf_counter() - start, error=True)
+            raise
+        self.record(name, time.perf_counter() - start)
+
+    def instrument_session(self, session, name: str, hosts: Optional[Dict[str, str]] = None):
+        """
+        Mesure toutes les requêtes d'une session requests
+
+        Les réponses >= 400 et les exceptions (timeout, DNS...) sont
+        comptées comme erreurs; le compteur http_responses ventile les
+        réponses par classe de statut (2xx, 4xx, ..., error).
+
+        Args:
+            session: requests.Session à instrumenter
+            name: Nom d'opération par défaut (ex: 'http.website')
+            hosts: Noms d'opération spécifiques par domaine
+                (ex: {'recherche-entreprises.api.gouv.fr': 'http.sirene'})
+
+        Returns:
+            La session instrumentée
+        """
+        hosts = hosts or {}
+        send_request = session.request
+
+        def request(method, url, *args, **kwargs):
+            operation = hosts.get(urlparse(url).netloc, name)
+            start = time.perf_counter()
+            try:
+                response = send_request(method, url, *args, **kwargs)
+            except Exception:
+                self.record(operation, time.perf_counter() - start, error=True)
+                self.incr('http_responses', operation=operation, status='error')
+                raise
+
+            self.incr('http_responses', operation=operation,
+                      status=f"{response.status_code // 100}xx")
+            self.record(
+                operation,
+                time.perf_counter() - start,
+                error=response.status_code >= 400,
+                bytes_received=len(response.content or b'')
+            )
+            return response
+
+        session.request = request
+        return session
+
+    def pipeline_subscriber(self, event_type: str, data: Dict):
+        """
+        Abonné PipelineEvents: enregistre la durée de chaque étape et les
+        lots écrits par les sinks
+
+        Usage:
+            events.subscribe(metrics.pipeline_subscriber)
+        """
+        if event_type == 'item' and data.get('operation'):
+            self.incr('sink_batches', sink=data['stage'], operation=data['operation'])
+        elif event_type == 'stage_end':
+            self.record(f"stage.{data['stage']}", data['duration'], error=bool(data.get('error')))
+            self.incr(f"items.{data['stage']}", data['count'])
+
+    def report(self) -> Dict:
+        """
+        Rapport du run
+
+        Returns:
+            Dict JSON-sérialisable: durée, compteurs et, par opération,
+            count / errors / error_rate / bytes / total / mean / p50 / p95 / p99
+            (latences en secondes)
+        """
+        with self._lock:
+            operations = {
+                name: {**op, 'samples': sorted(op['samples'])}
+                for name, op in self._operations.items()
+            }
+            counters = {_counter_label(key): value for key, value in self._counters.items()}
+            started_at = self.started_at
+
+        summary = {}
+        for name, op in sorted(operations.items()):
+            samples = op['samples']
+            summary[name] = {
+                'count': op['count'],
+                'errors': op['errors'],
+                'error_rate': round(op['errors'] / op['count'], 4) if op['count'] else 0.0,
+                'bytes': op['bytes'],
+                'total': round(op['sum'], 3),
+                'mean': round(op['sum'] / op['count'], 4) if op['count'] else 0.0,
+                'p50': round(percentile(samples, 50), 4),
+                'p95': round(percentile(samples, 95), 4),
+                'p99': round(percentile(samples, 99), 4),
+            }
+
+        return {
+            'started_at': datetime.fromtimestamp(started_at).strftime('%Y-%m-%d %H:%M:%S'),
+            'duration': round(time.time() - started_at, 3),
+            'operations': summary,
+            'counters': counters,
+        }
+
+    def format_table(self, report: Dict = None) -> str:
+        """
+        Rapport sous forme de tableau lisible
+
+        Args:
+            report: Rapport déjà calculé (recalculé si None)
+
+        Returns:
+            Tableau texte, une ligne par opération
+        """
+        report = report or self.report()
+
+        header = (f"{'Opération':<28}{'Appels':>8}{'Erreurs':>9}{'p50 (s)':>10}"
+                  f"{'p95 (s)':>10}{'p99 (s)':>10}{'Total (s)':>11}{'Ko':>10}")
+        lines = [header, '-' * len(header)]
+
+        for name, op in report['operations'].items():
+            lines.append(
+                f"{name:<28}{op['count']:>8}{op['errors']:>9}{op['p50']:>10.3f}"
+                f"{op['p95']:>10.3f}{op['p99']:>10.3f}{op['total']:>11.2f}"
+                f"{op['bytes'] / 1024:>10.1f}"
+            )
+
+        if report['counters']:
+            lines.append('-' * len(header))
+            for name, value in sorted(report['counters'].items()):
+                lines.append(f"{name:<28}{value:>8}")
+
+        lines.append(f"Durée totale du run: {report['duration']:.1f}s")
+        return '\n'.join(lines)
+
+    def save_report(self, directory: str = RUN_REPORT_DIR, prefix: str = 'run') -> str:
+        """
+        Écrit le rapport JSON du run
+
+        Args:
+            directory: Dossier des rapports
+            prefix: Préfixe du nom de fichier
+
+        Returns:
+            Chemin du fichier écrit
+        """
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = os.path.join(directory, f"{prefix}_{timestamp}.json")
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+        return filename
+
+    def to_prometheus(self, prefix: str = 'scraper') -> str:
+        """
+        Exporte les métriques au format texte Prometheus (version 0.0.4)
+
+        Chaque opération devient un histogramme <prefix>_operation_duration_seconds
+        (label operation) accompagné des compteurs d'erreurs et d'octets; chaque
+        compteur libre devient <prefix>_<nom>_total avec ses labels.
+
+        Args:
+            prefix: Préfixe des noms de métriques
+
+        Returns:
+            Texte prêt à être servi sur /metrics
+        """
+        with self._lock:
+            operations = {name: dict(op, buckets=list(op['buckets']))
+                          for name, op in self._operations.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        duration = f"{prefix}_operation_duration_seconds"
+        lines.append(f"# HELP {duration} Durée des opérations du pipeline et des appels externes")
+        lines.append(f"# TYPE {duration} histogram")
+        for name, op in sorted(operations.items()):
+            cumulative = 0
+            for bound, count in zip(HISTOGRAM_BUCKETS, op['buckets']):
+                cumulative += count
+                labels = _prometheus_labels((('operation', name), ('le', f"{bound:g}")))
+                lines.append(f"{duration}_bucket{labels} {cumulative}")
+            labels = _prometheus_labels((('operation', name), ('le', '+Inf')))
+            lines.append(f"{duration}_bucket{labels} {op['count']}")
+            labels = _prometheus_labels((('operation', name),))
+            lines.append(f"{duration}_sum{labels} {op['sum']:.6f}")
+            lines.append(f"{duration}_count{labels} {op['count']}")
+
+        for metric, field, help_text in (
+            ('operation_errors_total', 'errors', "Opérations en erreur"),
+            ('operation_bytes_total', 'bytes', "Octets reçus par opération"),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, op in sorted(operations.items()):
+                labels = _prometheus_labels((('operation', name),))
+                lines.append(f"{prefix}_{metric}{labels} {op[field]}")
+
+        by_name = {}
+        for (name, labels), value in counters.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        for name, values in sorted(by_name.items()):
+            metric = f"{prefix}_{_prometheus_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(values):
+                lines.append(f"{metric}{_prometheus_labels(labels)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+# Métriques cumulées du processus (alimentées par les RunMetrics de chaque scraper)
+PROCESS_METRICS = RunMetrics(keep_samples=False)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Gestionnaire de jobs de scraping
+File d'attente à priorités, pool de workers borné, statut par job et annulation
+Chaque job publie un flux d'événements de progression (consommé en SSE par server.py)
+"""
+
+import collections
+import itertools
+import queue
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+
+class JobCancelled(BaseException):
+    """
+    Levée dans un job quand son annulation a été demandée
+
+    Dérive de BaseException (comme asyncio.CancelledError): elle traverse
+    les `except Exception` des scrapers et des étapes du pipeline, une
+    annulation n'est donc ni affichée ni comptée comme une erreur.
+    """
+
+
+class Job:
+    """Un job de scraping et son état"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    ERROR = 'error'
+    CANCELLED = 'cancelled'
+
+    FINISHED_STATUSES = (DONE, ERROR, CANCELLED)
+
+    # Nombre d'événements conservés par job pour les clients qui se reconnectent
+    MAX_EVENTS = 5000
+
+    def __init__(self, params: Dict, priority: int = 0):
+        """
+        Args:
+            params: Paramètres du job (search_query, max_results, ...)
+            priority: Priorité (plus petit = traité plus tôt)
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.priority = priority
+
+        self.status = self.QUEUED
+        self.progress = 0
+        self.message = "En file d'attente"
+        self.total = params.get('max_results', 0)
+        self.current = 0
+        self.results = []
+        self.error = None
+
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self._cancel_event = threading.Event()
+
+        self._events = collections.deque(maxlen=self.MAX_EVENTS)
+        self._event_ids = itertools.count(1)
+        self._events_cond = threading.Condition()
+        self.emit('status', status=self.status, message=self.message, progress=self.progress)
+
+    @property
+    def running(self) -> bool:
+        return self.status == self.RUNNING
+
+    @property
+    def finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
+
+    def emit(self, event_type: str, **data):
+        """
+        Publie un événement de progression
+
+        Args:
+            event_type: Type d'événement (status, progress, item, sink_batch, end)
+            **data: Données JSON-sérialisables de l'événement
+        """
+        with self._events_cond:
+            self._events.append({'id': next(self._event_ids), 'type': event_type, 'data': data})
+            self._events_cond.notify_all()
+
+    def update(self, **fields):
+        """
+        Met à jour l'état du job et publie un événement 'progress'
+
+        Args:
+            **fields: Attributs à modifier (progress, message, total, current)
+        """
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+        self.emit('progress', status=self.status, progress=self.progress,
+                  message=self.message, total=self.total, current=self.current)
+
+    def set_status(self, status: str, message: str = None):
+        """Change le statut du job et publie l'événement correspondant"""
+        self.status = status
+        if message is not None:
+            self.message = message
+        if status in self.FINISHED_STATUSES:
+            self.finished_at = time.time()
+
+        self.emit('status', status=status, message=self.message, progress=self.progress)
+        if status in self.FINISHED_STATUSES:
+            self.emit('end', status=status, message=self.message,
+                      results_count=len(self.results), error=self.error)
+
+    def wait_events(self, after_id: int = 0, timeout: float = 15.0) -> List[Dict]:
+        """
+        Attend des événements plus récents que after_id
+
+        Args:
+            after_id: ID du dernier événement déjà reçu par le client
+            timeout: Attente maximale en secondes
+
+        Returns:
+            Les nouveaux événements (liste vide si timeout)
+        """
+        with self._events_cond:
+            self._events_cond.wait_for(
+                lambda: (self._events and self._events[-1]['id'] > after_id),
+                timeout=timeout
+            )
+            return [event for event in self._events if event['id'] > after_id]
+
+    def cancel(self):
+        """Demande l'annulation du job (prise en compte entre deux étapes)"""
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Lève JobCancelled si l'annulation a été demandée"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.id)
+
+    def to_dict(self, include_results: bool = True) -> Dict:
+        """
+        Sérialise l'état du job pour l'API
+
+        Args:
+            include_results: Inclure la liste complète des résultats
+
+        Returns:
+            Dict JSON-sérialisable
+        """
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'running': self.running,
+            'progress': self.progress,
+            'message': self.message,
+            'total': self.total,
+            'current': self.current,
+            'results_count': len(self.results),
+            'error': self.error,
+            'priority': self.priority,
+            'params': self.params,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if include_results:
+            data['results'] = self.results
+        return data
+
+
+class JobManager:
+    """
+    Exécute des jobs sur un pool de workers borné
+
+    Les jobs sont servis par priorité croissante puis dans l'ordre
+    d'arrivée (FIFO). Un job en attente annulé n'est jamais démarré; un job
+    en cours est interrompu au prochain check_cancelled() du runner.
+    """
+
+    def __init__(self, runner: Callable[[Job], None], max_workers: int = 2,
+                 max_finished_jobs: int = 100):
+        """
+        Args:
+            runner: Fonction exécutant un job (met à jour job.progress, job.results...)
+            max_workers: Nombre de jobs exécutés en parallèle
+            max_finished_jobs: Nombre de jobs terminés conservés en mémoire
+        """
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Compteurs cumulés (les jobs terminés sont oubliés par _prune)
+        self._stats = collections.Counter()
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}")
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, params: Dict, priority: int = 0) -> Job:
+        """
+        Ajoute un job à la file
+
+        Args:
+            params: Paramètres du job
+            priority: Priorité (plus petit = traité plus tôt)
+
+        Returns:
+            Le job créé
+        """
+        job = Job(params, priority)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._stats['submitted'] += 1
+            self._prune()
+
+        self._queue.put((priority, next(self._sequence), job.id))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Retourne un job par son ID (None si inconnu)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """Tous les jobs connus, du plus récent au plus ancien"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def latest(self) -> Optional[Job]:
+        """Le job le plus récent"""
+        jobs = self.list_jobs()
+        return jobs[0] if jobs else None
+
+    def queue_position(self, job: Job) -> int:
+        """Position d'un job en attente dans la file (1 = prochain servi)"""
+        if job.status != Job.QUEUED:
+            return 0
+
+        waiting = [j for j in self.list_jobs() if j.status == Job.QUEUED]
+        waiting.sort(key=lambda j: (j.priority, j.created_at))
+        return waiting.index(job) + 1
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Annule un job en attente ou en cours
+
+        Returns:
+            True si l'annulation a été prise en compte
+        """
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+
+        job.cancel()
+        # Sous verrou: un worker ne peut pas démarrer le job pendant la transition
+        with self._lock:
+            queued = job.status == Job.QUEUED
+            if queued:
+                job.set_status(Job.CANCELLED, "🚫 Job annulé")
+        if queued:
+            self._count_finished(job)
+        return True
+
+    def _count_finished(self, job: Job):
+        """Comptabilise un job terminé par statut"""
+        with self._lock:
+            self._stats[job.status] += 1
+
+    def stats(self) -> Dict:
+        """
+        Compteurs des jobs pour le monitoring
+
+        Returns:
+            Dict avec submitted, finished (par statut), queued, running
+            et max_workers
+        """
+        jobs = self.list_jobs()
+        with self._lock:
+            stats = dict(self._stats)
+
+        return {
+            'submitted': stats.get('submitted', 0),
+            'finished': {status: stats.get(status, 0) for status in Job.FINISHED_STATUSES},
+            'queued': sum(1 for j in jobs if j.status == Job.QUEUED),
+            'running': sum(1 for j in jobs if j.status == Job.RUNNING),
+            'max_workers': self.max_workers,
+        }
+
+    def _prune(self):
+        """Oublie les jobs terminés les plus anciens (appelé sous verrou)"""
+        finished = [j for j in self._jobs.values() if j.finished]
+        excess = len(finished) - self.max_finished_jobs
+        if excess > 0:
+            finished.sort(key=lambda j: j.finished_at or 0)
+            for job in finished[:excess]:
+                del self._jobs[job.id]
+
+    def _worker_loop(self):
+        """Boucle d'un worker: dépile et exécute les jobs"""
+        while True:
+            _, _, job_id = self._queue.get()
+            job = self.get(job_id)
+
+            if not job:
+                continue
+
+            # Même verrou que cancel(): un job annulé en attente n'est jamais démarré
+            with self._lock:
+                if job.status != Job.QUEUED or job.is_cancelled():
+                    continue
+                job.started_at = time.time()
+                job.set_status(Job.RUNNING)
+
+            try:
+                self.runner(job)
+                if job.status == Job.RUNNING:
+                    job.set_status(Job.DONE)
+            except JobCancelled:
+                job.set_status(Job.CANCELLED, "🚫 Job annulé")
+            except Exception as e:
+                job.error = str(e)
+                job.set_status(Job.ERROR, f"❌ Erreur: {e}")
+
+            self._count_finished(job)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Export colonnaire des leads (Parquet / Feather)
+Écrit le schéma complet d'un lead (entreprise + enrichissement + scoring)
+par row groups successifs, et relit les fichiers produits
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Dépendance optionnelle
+    pa = None
+
+
+# Schéma complet d'un lead: (colonne, type)
+# Les types sont ceux de pyarrow: string, float64, int64, list<string>
+LEAD_SCHEMA = [
+    # Entreprise (Google Maps)
+    ('name', 'string'),
+    ('address', 'string'),
+    ('phone', 'string'),
+    ('website', 'string'),
+    ('rating', 'float64'),
+    ('reviews_count', 'int64'),
+    ('url', 'string'),
+    ('place_id', 'string'),
+
+    # Contact
+    ('contact_name', 'string'),
+    ('contact_position', 'string'),
+    ('contact_email', 'string'),
+    ('contact_phone', 'string'),
+    ('contact_linkedin', 'string'),
+    ('email_confidence', 'string'),
+    ('email_mx', 'string'),
+    ('email_provider', 'string'),
+    ('email_smtp', 'string'),
+
+    # Enrichissement
+    ('siret', 'string'),
+    ('siren', 'string'),
+    ('legal_form', 'string'),
+    ('revenue', 'string'),
+    ('employees', 'string'),
+    ('creation_date', 'string'),
+    ('enrichment_date', 'string'),
+    ('data_sources', 'list<string>'),
+
+    # Scoring
+    ('score_total', 'int64'),
+    ('score_email', 'int64'),
+    ('score_contact', 'int64'),
+    ('score_company', 'int64'),
+    ('category', 'string'),
+    ('emoji', 'string'),
+    ('priority', 'int64'),
+    ('recommendation', 'string'),
+]
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+FEATHER_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+
+
+def _require_pyarrow():
+    """Lève une erreur explicite si pyarrow n'est pas installé"""
+    if pa is None:
+        raise ImportError("pyarrow est requis pour l'export Parquet/Feather (pip install pyarrow)")
+
+
+def _arrow_type(type_name: str):
+    """Convertit un nom de type du schéma en type pyarrow"""
+    if type_name == 'list<string>':
+        return pa.list_(pa.string())
+    return {
+        'string': pa.string(),
+        'float64': pa.float64(),
+        'int64': pa.int64(),
+    }[type_name]
+
+
+def arrow_schema():
+    """
+    Retourne le schéma pyarrow d'un lead
+
+    Returns:
+        pyarrow.Schema construit depuis LEAD_SCHEMA
+    """
+    _require_pyarrow()
+    return pa.schema([(name, _arrow_type(type_name)) for name, type_name in LEAD_SCHEMA])
+
+
+def _coerce(value, type_name: str):
+    """Normalise une valeur de lead vers le type de sa colonne ('' → null)"""
+    if value is None or value == '':
+        return [] if type_name == 'list<string>' else None
+
+    try:
+        if type_name == 'float64':
+            return float(value)
+        if type_name == 'int64':
+            return int(value)
+    except (TypeError, ValueError):
+        return None
+
+    if type_name == 'list<string>':
+        if isinstance(value, str):
+            return [value]
+        return [str(v) for v in value]
+
+    return str(value)
+
+
+def detect_format(filename: str) -> str:
+    """Déduit le format ('parquet' ou 'feather') de l'extension du fichier"""
+    return 'feather' if filename.lower().endswith(FEATHER_EXTENSIONS) else 'parquet'
+
+
+class ColumnarLeadWriter:
+    """
+    Écrit des leads en Parquet ou Feather par row groups
+
+    Les leads sont bufferisés colonne par colonne puis écrits dès que
+    row_group_size lignes sont accumulées: la mémoire reste bornée même
+    pour des historiques de plusieurs millions de leads.
+
+    Usage:
+        with ColumnarLeadWriter('leads.parquet') as writer:
+            writer.write(leads)
+    """
+
+    def __init__(self, filename: str, fmt: str = None,
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        """
+        Args:
+            filename: Chemin du fichier de sortie
+            fmt: 'parquet' ou 'feather' (déduit de l'extension si None)
+            row_group_size: Nombre de lignes par row group / record batch
+        """
+        _require_pyarrow()
+
+        self.filename = filename
+        self.fmt = fmt or detect_format(filename)
+        if self.fmt not in ('parquet', 'feather'):
+            raise ValueError(f"Format colonnaire inconnu: {self.fmt}")
+
+        self.row_group_size = row_group_size
+        self.schema = arrow_schema()
+        self.rows_written = 0
+
+        self._columns = {name: [] for name, _ in LEAD_SCHEMA}
+        self._buffered = 0
+
+        if self.fmt == 'parquet':
+            self._writer = pq.ParquetWriter(filename, self.schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(filename, 'wb')
+            self._writer = pa_ipc.new_file(
+                self._sink, self.schema,
+                options=pa_ipc.IpcWriteOptions(compression='zstd')
+            )
+
+    def write(self, leads: Iterable[Dict]):
+        """
+        Ajoute des leads au fichier
+
+        Args:
+            leads: Itérable de dicts de leads (clés manquantes → null)
+        """
+        for lead in leads:
+            for name, type_name in LEAD_SCHEMA:
+                self._columns[name].append(_coerce(lead.get(name), type_name))
+            self._buffered += 1
+
+            if self._buffered >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        """Écrit le buffer courant comme un row group"""
+        if not self._buffered:
+            return
+
+        batch = pa.record_batch(
+            [pa.array(self._columns[name], type=field.type)
+             for name, field in zip(self._columns, self.schema)],
+            schema=self.schema
+        )
+
+        if self.fmt == 'parquet':
+            self._writer.write_batch(batch, row_group_size=self._buffered)
+        else:
+            self._writer.write_batch(batch)
+
+        self.rows_written += self._buffered
+        self._columns = {name: [] for name, _ in LEAD_SCHEMA}
+        self._buffered = 0
+
+    def close(self):
+        """Écrit le dernier row group et ferme le fichier"""
+        self._flush()
+        self._writer.close()
+        if self.fmt == 'feather':
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_leads(leads: Iterable[Dict], filename: str, fmt: str = None,
+                row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """
+    Écrit une liste de leads en Parquet / Feather
+
+    Args:
+        leads: Itérable de leads
+        filename: Fichier de sortie
+        fmt: 'parquet' ou 'feather' (déduit de l'extension si None)
+        row_group_size: Nombre de lignes par row group
+
+    Returns:
+        Nombre de leads écrits
+    """
+    with ColumnarLeadWriter(filename, fmt, row_group_size) as writer:
+        writer.write(leads)
+    return writer.rows_written
+
+
+def iter_lead_batches(filename: str, columns: Optional[List[str]] = None,
+                      batch_size: int = DEFAULT_ROW_GROUP_SIZE) -> Iterator:
+    """
+    Parcourt un fichier de leads par record batches pyarrow
+
+    Args:
+        filename: Fichier Parquet ou Feather
+        columns: Colonnes à lire (toutes si None)
+        batch_size: Taille des batches (Parquet uniquement)
+
+    Yields:
+        pyarrow.RecordBatch
+    """
+    _require_pyarrow()
+
+    if detect_format(filename) == 'parquet':
+        parquet_file = pq.ParquetFile(filename)
+        yield from parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+        return
+
+    with pa.memory_map(filename, 'r') as source:
+        reader = pa_ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns:
+                batch = batch.select(columns)
+            yield batch
+
+
+def iter_leads(filename: str, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Relit un fichier de leads ligne par ligne
+
+    Args:
+        filename: Fichier Parquet ou Feather
+        columns: Colonnes à lire (toutes si None)
+
+    Yields:
+        Dict par lead, avec les mêmes clés que les leads exportés
+    """
+    for batch in iter_lead_batches(filename, columns):
+        yield from batch.to_pylist()
+
+
+def read_leads(filename: str, columns: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Relit un fichier de leads complet
+
+    Args:
+        filename: Fichier Parquet ou Feather
+        columns: Colonnes à lire (toutes si None)
+
+    Returns:
+        Liste de dicts de leads
+    """
+    if not os.path.exists(filename):
+        raise FileNotFoundError(filename)
+
+    return list(iter_leads(filename, columns))
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Stockage local des leads dans SQLite
+Upsert par place ID Google Maps (ou URL), pour retrouver l'état des runs précédents
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from config import LEAD_STORE_PATH
+
+
+# Colonnes indexées / interrogeables (le lead complet est conservé en JSON)
+_LEAD_COLUMNS = [
+    'place_id', 'url', 'name', 'website', 'domain', 'phone',
+    'siren', 'siret', 'contact_email', 'email_confidence',
+    'score_total', 'enrichment_date', 'search_query', 'content_hash', 'pipeline',
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    place_key TEXT PRIMARY KEY,
+    place_id TEXT,
+    url TEXT,
+    name TEXT,
+    website TEXT,
+    domain TEXT,
+    phone TEXT,
+    siren TEXT,
+    siret TEXT,
+    contact_email TEXT,
+    email_confidence TEXT,
+    score_total INTEGER,
+    enrichment_date TEXT,
+    search_query TEXT,
+    content_hash TEXT,
+    pipeline TEXT,
+    first_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_domain ON leads(domain);
+CREATE INDEX IF NOT EXISTS idx_leads_siren ON leads(siren);
+CREATE INDEX IF NOT EXISTS idx_leads_score ON leads(score_total);
+"""
+
+
+def place_key(item: Dict) -> str:
+    """
+    Clé unique d'un lieu Google Maps
+
+    Accepte indifféremment un item brut Apify (placeId, url) ou un lead
+    traité (place_id, url).
+
+    Args:
+        item: Item Apify ou lead
+
+    Returns:
+        Place ID si disponible, sinon URL Google Maps, sinon ''
+    """
+    return item.get('placeId') or item.get('place_id') or item.get('url') or ''
+
+
+def content_hash(item: Dict) -> str:
+    """
+    Empreinte des champs Google Maps qui justifient un ré-enrichissement
+
+    Calculée sur le site web, le téléphone et la note, aussi bien depuis un
+    item brut Apify (totalScore) que depuis un lead traité (rating).
+
+    Args:
+        item: Item Apify ou lead
+
+    Returns:
+        Hash SHA-1 hexadécimal
+    """
+    rating = item['totalScore'] if 'totalScore' in item else item.get('rating')
+    try:
+        rating = f"{float(rating):.1f}"
+    except (TypeError, ValueError):
+        rating = ''
+
+    parts = [
+        (item.get('website') or '').strip().lower().rstrip('/'),
+        (item.get('phone') or '').replace(' ', ''),
+        rating,
+    ]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def is_fresh(lead: Dict, ttl_days: float) -> bool:
+    """
+    Vérifie si l'enrichissement d'un lead a moins de ttl_days jours
+
+    Args:
+        lead: Lead avec enrichment_date ('%Y-%m-%d %H:%M:%S')
+        ttl_days: Durée de validité de l'enrichissement
+
+    Returns:
+        True si l'enrichissement est encore valide
+    """
+    try:
+        enriched_at = datetime.strptime(lead.get('enrichment_date', ''), '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return False
+
+    return datetime.now() - enriched_at < timedelta(days=ttl_days)
+
+
+def website_domain(website: str) -> str:
+    """Domaine d'un site web sans www. (ex: example.com)"""
+    if not website:
+        return ''
+
+    if not website.startswith(('http://', 'https://')):
+        website = 'https://' + website
+
+    return urlparse(website).netloc.lower().replace('www.', '')
+
+
+class LeadStore:
+    """
+    Base SQLite des leads, en mode WAL
+
+    Les écritures sont regroupées en transactions de batch_size leads
+    (executemany), ce qui permet plusieurs milliers d'upserts par seconde.
+    L'objet peut être partagé entre threads.
+    """
+
+    def __init__(self, path: str = LEAD_STORE_PATH, batch_size: int = 500):
+        """
+        Args:
+            path: Chemin de la base SQLite (':memory:' pour les tests)
+            batch_size: Nombre de leads par transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate()
+        self.conn.executescript(_SCHEMA)
+
+    def _migrate(self):
+        """Ajoute les colonnes apparues depuis la création d'une base existante"""
+        existing = {row['name'] for row in self.conn.execute('PRAGMA table_info(leads)')}
+        if existing and 'content_hash' not in existing:
+            with self.conn:
+                self.conn.execute('ALTER TABLE leads ADD COLUMN content_hash TEXT')
+        # Les leads antérieurs n'ont pas de pipeline connu: aucun n'est réutilisé
+        if existing and 'pipeline' not in existing:
+            with self.conn:
+                self.conn.execute('ALTER TABLE leads ADD COLUMN pipeline TEXT')
+
+    def _row_values(self, lead: Dict, search_query: Optional[str], pipeline: str,
+                    now: str) -> tuple:
+        """Prépare les valeurs SQL d'un lead"""
+        score = lead.get('score_total')
+        return (
+            place_key(lead),
+            lead.get('place_id', ''),
+            lead.get('url', ''),
+            lead.get('name', ''),
+            lead.get('website', ''),
+            website_domain(lead.get('website', '')),
+            lead.get('phone', ''),
+            lead.get('siren', ''),
+            lead.get('siret', ''),
+            lead.get('contact_email', ''),
+            lead.get('email_confidence', ''),
+            score if score != '' else None,
+            lead.get('enrichment_date', ''),
+            search_query or lead.get('search_query', ''),
+            content_hash(lead),
+            pipeline,
+            now,
+            now,
+            json.dumps(lead, ensure_ascii=False, default=str),
+        )
+
+    def upsert_leads(self, leads: Iterable[Dict], search_query: str = None,
+                     pipeline: str = '') -> int:
+        """
+        Insère ou met à jour des leads par place ID / URL
+
+        Args:
+            leads: Leads traités (avec place_id ou url)
+            search_query: Recherche d'origine (optionnel)
+            pipeline: Traitement qui a produit les leads ('standard' ou 'pro'),
+                le mode incrémental ne réutilise que les leads de son pipeline;
+                un lead 'pro' n'est remplacé que par un autre lead 'pro'
+
+        Returns:
+            Nombre de leads écrits (les leads sans clé et les leads 'pro'
+            conservés sont ignorés)
+        """
+        columns = ['place_key'] + _LEAD_COLUMNS + ['first_seen', 'updated_at', 'data']
+        # La recherche d'origine n'est pas écrasée par un upsert sans recherche
+        updates = ', '.join(
+            f"{col} = COALESCE(NULLIF(excluded.{col}, ''), leads.{col})"
+            if col == 'search_query' else f"{col} = excluded.{col}"
+            for col in _LEAD_COLUMNS + ['updated_at', 'data']
+        )
+        sql = (
+            f"INSERT INTO leads ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(place_key) DO UPDATE SET {updates} "
+            # L'enrichissement complet du scraper pro n'est pas remplacé par un lead standard
+            f"WHERE leads.pipeline != 'pro' OR excluded.pipeline = 'pro'"
+        )
+
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        written = 0
+        batch = []
+
+        with self._lock:
+            for lead in leads:
+                if not place_key(lead):
+                    continue
+                batch.append(self._row_values(lead, search_query, pipeline, now))
+
+                if len(batch) >= self.batch_size:
+                    written += self._write_batch(sql, batch)
+                    batch = []
+
+            if batch:
+                written += self._write_batch(sql, batch)
+
+        return written
+
+    def _write_batch(self, sql: str, batch: List[tuple]) -> int:
+        """Exécute l'upsert d'un lot et retourne le nombre de lignes écrites"""
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(sql, batch)
+        return self.conn.total_changes - before
+
+    def get_lead(self, key: str) -> Optional[Dict]:
+        """
+        Récupère un lead par sa clé (place ID ou URL)
+
+        Returns:
+            Le lead complet tel qu'il a été enregistré, ou None
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT data FROM leads WHERE place_key = ?', (key,)
+            ).fetchone()
+
+        return json.loads(row['data']) if row else None
+
+    def get_leads(self, keys: Iterable[str], pipeline: str = None) -> Dict[str, Dict]:
+        """
+        Récupère plusieurs leads en une série de requêtes IN (...)
+
+        Args:
+            keys: Clés (place ID ou URL)
+            pipeline: Ne retourner que les leads produits par ce pipeline (optionnel)
+
+        Returns:
+            Dict clé → lead, limité aux clés présentes en base
+        """
+        keys = [k for k in keys if k]
+        found = {}
+        where = 'AND pipeline = ?' if pipeline else ''
+
+        with self._lock:
+            # Limite SQLite sur le nombre de paramètres: requêtes par tranches
+            for start in range(0, len(keys), self.batch_size):
+                chunk = keys[start:start + self.batch_size]
+                rows = self.conn.execute(
+                    f"SELECT place_key, data FROM leads "
+                    f"WHERE place_key IN ({', '.join('?' * len(chunk))}) {where}",
+                    chunk + ([pipeline] if pipeline else [])
+                ).fetchall()
+                for row in rows:
+                    found[row['place_key']] = json.loads(row['data'])
+
+        return found
+
+    def _query(self, where: str, params: tuple) -> List[Dict]:
+        """Exécute une requête filtrée et retourne les leads"""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT data FROM leads WHERE {where}", params
+            ).fetchall()
+
+        return [json.loads(row['data']) for row in rows]
+
+    def find_by_domain(self, domain: str) -> List[Dict]:
+        """Leads dont le site web est sur ce domaine"""
+        return self._query('domain = ?', (website_domain(domain),))
+
+    def find_by_siren(self, siren: str) -> List[Dict]:
+        """Leads rattachés à ce SIREN"""
+        return self._query('siren = ?', (siren,))
+
+    def find_by_min_score(self, min_score: int) -> List[Dict]:
+        """Leads dont le score total est >= min_score, meilleurs d'abord"""
+        return self._query('score_total >= ? ORDER BY score_total DESC', (min_score,))
+
+    def count(self) -> int:
+        """Nombre de leads en base"""
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Journalisation structurée du scraper
+Niveaux standard (logging), contexte par job (contextvars) et sortie texte ou JSON
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from config import LOG_FORMAT, LOG_LEVEL
+
+
+# Logger parent de tous les modules du scraper
+BASE_LOGGER = 'scraper'
+
+# Contexte courant (job_id, search_query...), propagé dans les threads qui l'installent
+_log_context = contextvars.ContextVar('log_context', default={})
+
+# Attributs standard d'un LogRecord (le reste vient de extra=...)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_configure_lock = threading.Lock()
+
+
+class ContextFilter(logging.Filter):
+    """Ajoute le contexte courant (log_context) à chaque enregistrement"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _log_context.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement: ts, level, logger, message, contexte, extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created))
+                  + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **getattr(record, 'context', {}),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != 'context':
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Message brut (comme les print historiques), préfixé par le job éventuel"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        job_id = getattr(record, 'context', {}).get('job_id')
+        return f"[{job_id}] {message}" if job_id else message
+
+
+def configure_logging(level: str = None, fmt: str = None, stream=None, force: bool = False):
+    """
+    Configure le logger du scraper (appelé automatiquement par get_logger)
+
+    Le niveau et le format viennent des variables d'environnement
+    LOG_LEVEL / LOG_FORMAT, sinon de config.py.
+
+    Args:
+        level: Niveau (DEBUG, INFO, WARNING...)
+        fmt: 'text' ou 'json'
+        stream: Flux de sortie (stdout par défaut, comme les print)
+        force: Reconfigurer même si un handler est déjà installé
+    """
+    logger = logging.getLogger(BASE_LOGGER)
+
+    with _configure_lock:
+        if logger.handlers and not force:
+            return
+
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+        level = (level or os.getenv('LOG_LEVEL') or LOG_LEVEL).upper()
+        fmt = (fmt or os.getenv('LOG_FORMAT') or LOG_FORMAT).lower()
+
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.addFilter(ContextFilter())
+        handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        # Pas de doublons si l'application configure aussi le logger racine
+        logger.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger d'un module du scraper (ex: get_logger('contact_enricher'))
+
+    Returns:
+        logging.Logger enfant de 'scraper'
+    """
+    configure_logging()
+    return logging.getLogger(f"{BASE_LOGGER}.{name}")
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Ajoute des champs au contexte des logs émis dans le bloc
+
+    Usage:
+        with log_context(job_id=job.id, search_query=query):
+            scraper.process_results(results)
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Vérification MX des domaines des emails construits
+Résolutions DNS asynchrones (dnspython) en parallèle, avec un cache partagé
+par le lot: beaucoup d'entreprises partagent un même hébergeur. Un domaine
+sans serveur de messagerie ne peut pas recevoir l'email deviné, dont la
+confiance est alors abaissée
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from config import MX_CACHE_TTL, MX_CONCURRENCY, MX_TIMEOUT
+from instrumentation import PROCESS_METRICS, RunMetrics
+from log_setup import get_logger
+
+logger = get_logger('mx_verifier')
+
+# Hébergeurs de messagerie reconnus d'après le nom de leurs serveurs MX
+MX_PROVIDERS = [
+    ('google', ('google.com', 'googlemail.com')),
+    ('microsoft', ('outlook.com',)),
+    ('ovh', ('ovh.net',)),
+    ('ionos', ('ionos.fr', 'ionos.com', '1and1.fr', 'kundenserver.de')),
+    ('gandi', ('gandi.net',)),
+    ('orange', ('orange.fr', 'wanadoo.fr')),
+    ('infomaniak', ('infomaniak.ch',)),
+    ('o2switch', ('o2switch.net',)),
+    ('zoho', ('zoho.eu', 'zoho.com')),
+    ('proton', ('protonmail.ch',)),
+]
+
+# Statuts d'un domaine qui ne peut pas recevoir d'email
+UNDELIVERABLE_STATUSES = ('nxdomain', 'no_mx')
+
+
+def mx_provider(domain: str, hosts: List[str]) -> str:
+    """
+    Hébergeur de messagerie d'un domaine
+
+    Args:
+        domain: Domaine vérifié
+        hosts: Serveurs MX, par préférence
+
+    Returns:
+        Nom d'MX_PROVIDERS, 'self' (serveur du domaine), 'other' ou '' sans MX
+    """
+    for host in hosts:
+        for provider, suffixes in MX_PROVIDERS:
+            if any(host == suffix or host.endswith('.' + suffix) for suffix in suffixes):
+                return provider
+    if not hosts:
+        return ''
+    return 'self' if hosts[0].endswith(domain) else 'other'
+
+
+def grade_confidence(confidence: str, mx: Optional[Dict]) -> str:
+    """
+    Confiance d'un email compte tenu de la vérification MX de son domaine
+
+    Un domaine inexistant ou sans MX abaisse la confiance à 'low'; une
+    vérification impossible (délai dépassé) la laisse inchangée.
+    """
+    if mx and mx['status'] in UNDELIVERABLE_STATUSES and confidence not in ('none', ''):
+        return 'low'
+    return confidence
+
+
+class MXVerifier:
+    """
+    Résolution MX asynchrone avec cache partagé
+
+    Les résultats (hors erreurs transitoires) sont gardés cache_ttl secondes.
+    L'objet est partageable entre threads; prefetch() résout un lot de
+    domaines en parallèle avant l'enrichissement, lookup() sert ensuite les
+    domaines depuis le cache. Pour des entreprises reçues au fil de l'eau
+    (flux, processus d'enrichissement), prefetch_async() lance les
+    résolutions en arrière-plan sans attendre; lookup() attend alors la
+    résolution en cours au lieu d'en relancer une.
+
+    Usage:
+        verifier = MXVerifier()
+        verifier.prefetch(['example.fr', 'exemple.com'])
+        verifier.lookup('example.fr')  # {'status': 'ok', 'hosts': [...], 'provider': 'ovh'}
+    """
+
+    def __init__(self, nameservers: List[str] = None, port: int = 53,
+                 timeout: float = MX_TIMEOUT, concurrency: int = MX_CONCURRENCY,
+                 cache_ttl: float = MX_CACHE_TTL, metrics: RunMetrics = None):
+        """
+        Args:
+            nameservers: Serveurs DNS (ceux du système si None)
+            port: Port des serveurs DNS (ex: un stub DNS local de test)
+            timeout: Délai maximal d'une résolution (secondes)
+            concurrency: Résolutions simultanées
+            cache_ttl: Durée de validité d'un résultat en cache (secondes)
+            metrics: RunMetrics (opération dns.mx, compteurs mx_lookups / cache_lookups)
+        """
+        self.metrics = metrics or RunMetrics(parent=PROCESS_METRICS)
+        self.nameservers = nameservers
+        self.port = port
+        self.concurrency = concurrency
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+        # Résolutions en arrière-plan (prefetch_async): boucle d'un thread dédié
+        self._loop = None
+        self._semaphore = None
+        self._inflight = {}
+
+        try:
+            self.resolver = dns.asyncresolver.Resolver(configure=not nameservers)
+        except dns.resolver.NoResolverConfiguration:
+            logger.warning("⚠️  Aucun serveur DNS configuré, vérification MX impossible")
+            self.resolver = dns.asyncresolver.Resolver(configure=False)
+        if nameservers:
+            self.resolver.nameservers = list(nameservers)
+        self.resolver.port = port
+        self.resolver.timeout = timeout
+        self.resolver.lifetime = timeout
+
+    def _cached(self, domain: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._cache.get(domain)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    async def _resolve(self, domain: str, semaphore: asyncio.Semaphore) -> Dict:
+        """Résout les MX d'un domaine"""
+        async with semaphore:
+            start = time.perf_counter()
+            hosts = []
+            try:
+                answer = await self.resolver.resolve(domain, 'MX')
+                records = sorted(answer, key=lambda record: record.preference)
+                # MX nul "." (RFC 7505): le domaine refuse explicitement les emails
+                hosts = [str(record.exchange).rstrip('.').lower() for record in records]
+                hosts = [host for host in hosts if host]
+                status = 'ok' if hosts else 'no_mx'
+            except dns.resolver.NXDOMAIN:
+                status = 'nxdomain'
+            except dns.resolver.NoAnswer:
+                status = 'no_mx'
+            except dns.exception.DNSException as e:
+                logger.debug("⚠️  Résolution MX impossible pour %s: %s", domain, e)
+                status = 'error'
+
+            self.metrics.record('dns.mx', time.perf_counter() - start, error=status == 'error')
+
+        self.metrics.incr('mx_lookups', status=status)
+        result = {'status': status, 'hosts': hosts, 'provider': mx_provider(domain, hosts)}
+        if status != 'error':
+            with self._lock:
+                self._cache[domain] = (time.monotonic() + self.cache_ttl, result)
+        return result
+
+    async def lookup_many_async(self, domains: Iterable[str],
+                                on_result: Callable[[str, Dict], None] = None) -> Dict[str, Dict]:
+        """
+        Résout un lot de domaines en parallèle (version asynchrone de lookup_many)
+        """
+        results = {}
+        missing = []
+        for domain in dict.fromkeys(domain.lower() for domain in domains if domain):
+            cached = self._cached(domain)
+            self.metrics.incr('cache_lookups', cache='mx', result='hit' if cached else 'miss')
+            if cached:
+                results[domain] = cached
+                if on_result:
+                    on_result(domain, cached)
+            else:
+                missing.append(domain)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def resolve(domain: str):
+            results[domain] = await self._resolve(domain, semaphore)
+            if on_result:
+                on_result(domain, results[domain])
+
+        await asyncio.gather(*(resolve(domain) for domain in missing))
+        return results
+
+    def lookup_many(self, domains: Iterable[str],
+                    on_result: Callable[[str, Dict], None] = None) -> Dict[str, Dict]:
+        """
+        Résout un lot de domaines en parallèle
+
+        Args:
+            domains: Domaines (doublons et valeurs vides ignorés)
+            on_result: Appelé pour chaque domaine résolu (domaine, résultat)
+
+        Returns:
+            Dict domaine → {'status': 'ok' | 'no_mx' | 'nxdomain' | 'error',
+            'hosts': serveurs MX par préférence, 'provider': hébergeur}
+        """
+        return asyncio.run(self.lookup_many_async(domains, on_result))
+
+    def lookup(self, domain: str) -> Optional[Dict]:
+        """
+        MX d'un domaine (depuis le cache ou une résolution en arrière-plan si possible)
+
+        Returns:
+            Résultat (voir lookup_many), ou None sans domaine
+        """
+        if not domain:
+            return None
+        domain = domain.lower()
+        cached = self._cached(domain)
+        if cached:
+            self.metrics.incr('cache_lookups', cache='mx', result='hit')
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(domain)
+        if future:
+            self.metrics.incr('cache_lookups', cache='mx', result='hit')
+            return future.result()
+        return self.lookup_many([domain])[domain]
+
+    def prefetch(self, domains: Iterable[str], stage=None) -> Dict[str, Dict]:
+        """
+        Remplit le cache pour un lot de domaines
+
+        Args:
+            domains: Domaines du lot
+            stage: Stage du pipeline avancé à chaque domaine résolu (optionnel)
+
+        Returns:
+            Résultats par domaine (voir lookup_many)
+        """
+        on_result = None
+        if stage:
+            def on_result(domain, result):
+                stage.advance(domain=domain, status=result['status'])
+        return self.lookup_many(domains, on_result)
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        """Boucle asyncio des résolutions en arrière-plan (démarrée au premier appel)"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+                threading.Thread(target=self._loop.run_forever, name='mx-prefetch',
+                                 daemon=True).start()
+            return self._loop
+
+    def _forget(self, domain: str):
+        with self._lock:
+            self._inflight.pop(domain, None)
+
+    def prefetch_async(self, domains: Iterable[str]) -> int:
+        """
+        Lance la résolution de domaines en arrière-plan, sans attendre
+
+        Les MX d'une entreprise sont ainsi résolus pendant le scraping de son
+        site, avant que la construction de l'email n'en ait besoin.
+
+        Args:
+            domains: Domaines (doublons, valeurs vides et domaines en cache ignorés)
+
+        Returns:
+            Nombre de résolutions lancées
+        """
+        loop = self._background_loop()
+        started = 0
+        for domain in dict.fromkeys(domain.lower() for domain in domains if domain):
+            if self._cached(domain):
+                self.metrics.incr('cache_lookups', cache='mx', result='hit')
+                continue
+            with self._lock:
+                if domain in self._inflight:
+                    continue
+                future = asyncio.run_coroutine_threadsafe(self._resolve(domain, self._semaphore), loop)
+                self._inflight[domain] = future
+            future.add_done_callback(lambda _, domain=domain: self._forget(domain))
+            self.metrics.incr('cache_lookups', cache='mx', result='miss')
+            started += 1
+        return started
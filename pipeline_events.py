@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Événements de progression du pipeline de scraping
+Publie, étape par étape, le nombre d'éléments traités, la durée, le débit et l'ETA
+pour les interfaces (barre de progression), les logs et les métriques
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class Stage:
+    """
+    Une étape du pipeline en cours (scraping, enrichissement, sink...)
+
+    Obtenue via PipelineEvents.stage(); advance() publie un événement
+    'item' avec le débit et l'ETA calculés depuis le début de l'étape.
+    """
+
+    def __init__(self, events: 'PipelineEvents', name: str, total: Optional[int] = None):
+        """
+        Args:
+            events: Bus d'événements parent
+            name: Nom de l'étape
+            total: Nombre d'éléments attendus (None si inconnu)
+        """
+        self.events = events
+        self.name = name
+        self.total = total
+        self.count = 0
+        self.started_at = time.time()
+
+    @property
+    def elapsed(self) -> float:
+        """Secondes écoulées depuis le début de l'étape"""
+        return time.time() - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Éléments traités par seconde"""
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Secondes restantes estimées (None si total ou débit inconnu)"""
+        rate = self.rate
+        if not self.total or not rate:
+            return None
+        return max(self.total - self.count, 0) / rate
+
+    def advance(self, n: int = 1, **data):
+        """
+        Signale n éléments traités et publie un événement 'item'
+
+        Args:
+            n: Nombre d'éléments traités depuis le dernier appel
+            **data: Données JSON-sérialisables propres à l'élément (name, ...)
+        """
+        self.count += n
+        eta = self.eta
+        self.events.emit(
+            'item',
+            stage=self.name,
+            index=self.count,
+            total=self.total,
+            elapsed=round(self.elapsed, 3),
+            rate=round(self.rate, 3),
+            eta=round(eta, 1) if eta is not None else None,
+            **data
+        )
+
+
+class PipelineEvents:
+    """
+    Bus d'événements d'un run du pipeline
+
+    Les abonnés reçoivent (type, données) pour chaque événement:
+    - 'stage_start': stage, total
+    - 'item': stage, index, total, elapsed, rate, eta + données de l'élément
+    - 'stage_end': stage, count, duration, rate, error
+    Les exceptions levées par un abonné (ex: annulation d'un job) remontent
+    volontairement dans le pipeline pour l'interrompre.
+
+    Usage:
+        events = PipelineEvents()
+        events.subscribe(lambda event_type, data: print(event_type, data))
+        with events.stage('enrichment', total=len(results)) as stage:
+            for result in results:
+                ...
+                stage.advance(name=result['title'])
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        # Durée et nombre d'éléments des étapes terminées
+        self.timings = {}
+
+    def subscribe(self, callback: Callable[[str, Dict], None]) -> Callable[[str, Dict], None]:
+        """
+        Abonne une fonction à tous les événements
+
+        Args:
+            callback: Appelée avec (type d'événement, dict de données)
+
+        Returns:
+            Le callback (pour pouvoir le désabonner)
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[str, Dict], None]):
+        """Désabonne une fonction"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def emit(self, event_type: str, **data):
+        """
+        Publie un événement à tous les abonnés
+
+        Args:
+            event_type: Type d'événement
+            **data: Données JSON-sérialisables
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            callback(event_type, data)
+
+    @contextmanager
+    def stage(self, name: str, total: Optional[int] = None):
+        """
+        Chronomètre une étape et publie son début et sa fin
+
+        Args:
+            name: Nom de l'étape (scrape, enrichment, google_sheets, ...)
+            total: Nombre d'éléments attendus (None si inconnu)
+
+        Yields:
+            Stage sur lequel appeler advance() à chaque élément traité
+        """
+        current = Stage(self, name, total)
+        self.emit('stage_start', stage=name, total=total)
+
+        error = None
+        try:
+            yield current
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            duration = current.elapsed
+            self.timings[name] = {'count': current.count, 'duration': round(duration, 3)}
+            self.emit(
+                'stage_end',
+                stage=name,
+                count=current.count,
+                duration=round(duration, 3),
+                rate=round(current.rate, 3),
+                error=error
+            )
+
+    def summary(self) -> List[Dict]:
+        """
+        Résumé des étapes terminées
+
+        Returns:
+            Liste de dicts stage / count / duration, dans l'ordre d'exécution
+        """
+        return [{'stage': name, **timing} for name, timing in self.timings.items()]
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Sources de lieux interchangeables avec l'actor Apify
+Rejoue un dataset enregistré (JSONL / Parquet) ou génère N lieux synthétiques,
+derrière la même interface que ApifyClient (actor().start, run().get,
+dataset().list_items): le pipeline tourne sans réseau, sans clé ni crédit Apify
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+
+from apify_places import PLACE_FIELDS
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Dépendance optionnelle (replay Parquet)
+    pq = None
+
+
+# Domaine des sites du corpus synthétique (servis par fixtures.FixtureServer)
+SITE_SUFFIX = 'bench.local'
+
+FIRST_NAMES = ['Jean', 'Marie', 'Pierre', 'Sophie', 'Nicolas', 'Isabelle', 'Laurent',
+               'Camille', 'Julien', 'Nathalie', 'Thomas', 'Claire', 'Antoine', 'Julie']
+LAST_NAMES = ['Martin', 'Bernard', 'Dubois', 'Durand', 'Lefebvre', 'Moreau', 'Laurent',
+              'Simon', 'Michel', 'Garcia', 'Roux', 'Fournier', 'Girard', 'Bonnet']
+TRADES = ['Vérandas', 'Menuiserie', 'Boulangerie', 'Plomberie', 'Électricité',
+          'Paysagiste', 'Couverture', 'Carrelage', 'Garage', 'Imprimerie']
+CITIES = ['Lyon', 'Paris', 'Nantes', 'Lille', 'Bordeaux', 'Toulouse', 'Rennes', 'Nice']
+
+# Répartition par défaut des profils de sites du corpus synthétique
+SITE_KINDS = [
+    ('team', 0.30),      # Page /equipe avec "Nom - Fonction"
+    ('legal', 0.25),     # Mentions légales avec "Gérant : Nom" et email
+    ('mailto', 0.20),    # Lien mailto sur la page d'accueil, rien d'autre
+    ('slow', 0.10),      # Comme 'team', mais chaque page répond lentement
+    ('dead', 0.10),      # Connexion fermée sans réponse
+    ('no_site', 0.05),   # Fiche Google Maps sans site web
+]
+
+
+def generate_corpus(count: int, seed: int = 42, kinds: List[Tuple[str, float]] = SITE_KINDS,
+                    site_suffix: str = SITE_SUFFIX) -> List[Dict]:
+    """
+    Génère un corpus déterministe d'entreprises fictives
+
+    Args:
+        count: Nombre d'entreprises
+        seed: Graine du générateur aléatoire
+        kinds: Profils de sites et leurs poids (voir SITE_KINDS)
+        site_suffix: Domaine parent des sites générés
+
+    Returns:
+        Liste de dicts (name, slug, domain, kind, manager, siren...)
+    """
+    rng = random.Random(seed)
+    names, weights = zip(*kinds)
+    corpus = []
+
+    for i in range(count):
+        trade = rng.choice(TRADES)
+        city = rng.choice(CITIES)
+        last_name = rng.choice(LAST_NAMES)
+        slug = f"{trade.lower().replace('é', 'e').replace('è', 'e')}-{last_name.lower()}-{i}"
+
+        corpus.append({
+            'index': i,
+            'name': f"{trade} {last_name} {city}",
+            'slug': slug,
+            'domain': f"{slug}.{site_suffix}",
+            'kind': rng.choices(names, weights)[0],
+            'manager': f"{rng.choice(FIRST_NAMES)} {last_name}",
+            'city': city,
+            'phone': f"04 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'reviews': rng.randint(0, 400),
+            'siren': f"{rng.randint(100000000, 999999999)}",
+        })
+
+    return corpus
+
+
+def apify_items(corpus: List[Dict]) -> List[Dict]:
+    """Items au format du dataset Apify (compass/crawler-google-places)"""
+    return [{
+        'title': site['name'],
+        'address': f"{site['index']} rue de la République, {site['city']}",
+        'phone': site['phone'],
+        'website': '' if site['kind'] == 'no_site' else f"http://www.{site['domain']}/",
+        'totalScore': site['rating'],
+        'reviewsCount': site['reviews'],
+        'categoryName': site['name'].split()[0],
+        'url': f"https://www.google.com/maps/place/?q=place_id:bench{site['index']}",
+        'placeId': f"bench{site['index']}",
+        # Champs volumineux du crawler, non lus par le pipeline
+        'openingHours': [{'day': day, 'hours': '8h-18h'} for day in ('lundi', 'mardi', 'mercredi')],
+        'reviews': [{'text': 'Très bon artisan, travail soigné.', 'stars': 5}] * 3,
+    } for site in corpus]
+
+
+def load_items(path: str) -> List[Dict]:
+    """
+    Lit un dataset enregistré
+
+    Args:
+        path: Fichier JSONL (un item par ligne), JSON (liste d'items) ou Parquet
+
+    Returns:
+        Liste d'items
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.parquet':
+        if pq is None:
+            raise ImportError("pyarrow est requis pour rejouer un dataset Parquet (pip install pyarrow)")
+        return pq.read_table(path).to_pylist()
+
+    with open(path, encoding='utf-8') as f:
+        if extension == '.json':
+            return json.load(f)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_items(items: List[Dict], path: str) -> int:
+    """
+    Enregistre des items en JSONL (rejouables par ReplaySource)
+
+    Returns:
+        Nombre d'items écrits
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return len(items)
+
+
+class ListPage:
+    """Page d'items (même attributs que apify_client ListPage)"""
+
+    def __init__(self, items: List[Dict], offset: int = 0):
+        self.items = items
+        self.count = len(items)
+        self.offset = offset
+
+
+class SourceActor:
+    def __init__(self, source: 'InMemorySource'):
+        self.source = source
+
+    def start(self, run_input: Dict) -> Dict:
+        return self.source.start_run(run_input)
+
+
+class SourceRun:
+    def __init__(self, source: 'InMemorySource', run_id: str):
+        self.source = source
+        self.run_id = run_id
+
+    def get(self) -> Dict:
+        run = self.source.runs[self.run_id]
+        done = self.source.produced(self.run_id) == len(run['items'])
+        return {'id': self.run_id, 'defaultDatasetId': self.run_id,
+                'status': 'SUCCEEDED' if done else 'RUNNING'}
+
+
+class SourceDataset:
+    def __init__(self, source: 'InMemorySource', run_id: str):
+        self.source = source
+        self.run_id = run_id
+
+    def list_items(self, offset: int = 0, limit: int = None, fields: List[str] = None,
+                   **kwargs) -> ListPage:
+        available = self.source.produced(self.run_id)
+        end = available if limit is None else min(available, offset + limit)
+        items = self.source.runs[self.run_id]['items'][offset:end]
+        if fields:
+            items = [{field: item[field] for field in fields if field in item} for item in items]
+        return ListPage(items, offset)
+
+
+class InMemorySource:
+    """
+    Source de lieux en mémoire, remplaçant ApifyClient
+
+    Chaque run produit, pour chaque recherche de searchStringsArray, au plus
+    maxCrawledPlacesPerSearch items (ceux dont searchString correspond à la
+    recherche si les items en portent un, sinon tous). Les items sont écrits
+    dans le dataset progressivement, en run_delay secondes, comme pendant un
+    vrai crawl.
+
+    Usage:
+        scraper = GoogleMapsScraperPro(places_source=InMemorySource(items))
+    """
+
+    def __init__(self, items: List[Dict], run_delay: float = 0.0):
+        """
+        Args:
+            items: Items au format du dataset Apify
+            run_delay: Durée d'un run complet (secondes)
+        """
+        self.items = items
+        self.run_delay = run_delay
+        self.runs = {}
+
+    def _items_for(self, query: str, limit: int = None) -> List[Dict]:
+        """Items produits pour une recherche"""
+        matching = [item for item in self.items if item.get('searchString') == query]
+        return (matching or self.items)[:limit]
+
+    def start_run(self, run_input: Dict) -> Dict:
+        """Démarre un run simulé (voir ActorClient.start)"""
+        limit = run_input.get('maxCrawledPlacesPerSearch')
+        items = [{**item, 'searchString': query}
+                 for query in run_input.get('searchStringsArray', [])
+                 for item in self._items_for(query, limit)]
+        run_id = f"local-run-{len(self.runs) + 1}"
+        self.runs[run_id] = {'items': items, 'started_at': time.monotonic()}
+        return {'id': run_id, 'defaultDatasetId': run_id, 'status': 'RUNNING'}
+
+    def produced(self, run_id: str) -> int:
+        """Nombre d'items déjà écrits dans le dataset d'un run"""
+        run = self.runs[run_id]
+        if not self.run_delay:
+            return len(run['items'])
+        progress = (time.monotonic() - run['started_at']) / self.run_delay
+        return min(len(run['items']), int(len(run['items']) * progress))
+
+    def actor(self, actor_id: str) -> SourceActor:
+        return SourceActor(self)
+
+    def run(self, run_id: str) -> SourceRun:
+        return SourceRun(self, run_id)
+
+    def dataset(self, dataset_id: str) -> SourceDataset:
+        return SourceDataset(self, dataset_id)
+
+
+class ReplaySource(InMemorySource):
+    """Rejoue un dataset Apify enregistré (JSONL, JSON ou Parquet)"""
+
+    def __init__(self, path: str, run_delay: float = 0.0):
+        """
+        Args:
+            path: Fichier du dataset (voir load_items / save_items)
+            run_delay: Durée d'un run complet (secondes)
+        """
+        super().__init__(load_items(path), run_delay)
+        self.path = path
+
+
+class SyntheticSource(InMemorySource):
+    """
+    Génère N lieux synthétiques déterministes
+
+    Les sites pointent vers *.bench.local (servis par fixtures.FixtureServer);
+    la répartition des profils de sites se règle avec kinds.
+    """
+
+    def __init__(self, count: int, seed: int = 42, kinds: List[Tuple[str, float]] = SITE_KINDS,
+                 run_delay: float = 0.0):
+        """
+        Args:
+            count: Nombre de lieux
+            seed: Graine du générateur
+            kinds: Profils de sites et leurs poids (voir SITE_KINDS)
+            run_delay: Durée d'un run complet (secondes)
+        """
+        self.corpus = generate_corpus(count, seed, kinds)
+        super().__init__(apify_items(self.corpus), run_delay)
+
+
+def open_source(spec: str) -> InMemorySource:
+    """
+    Crée une source depuis sa description en ligne de commande
+
+    Args:
+        spec: "synthetic:<N>[:<graine>]" ou "replay:<fichier>"
+
+    Returns:
+        Source de lieux
+
+    Raises:
+        ValueError: Description invalide
+    """
+    kind, _, value = spec.partition(':')
+    if kind == 'replay' and value:
+        return ReplaySource(value)
+    if kind == 'synthetic' and value:
+        count, _, seed = value.partition(':')
+        return SyntheticSource(int(count), int(seed) if seed else 42)
+    raise ValueError(f"Source invalide: '{spec}' (attendu: synthetic:<N> ou replay:<fichier>)")
+
+
+def main():
+    """Enregistre un dataset Apify existant pour le rejouer hors-ligne"""
+    parser = argparse.ArgumentParser(description="Enregistre un dataset Apify en JSONL")
+    parser.add_argument('dataset_id', help="ID du dataset (defaultDatasetId d'un run)")
+    parser.add_argument('output', help="Fichier JSONL de sortie")
+    args = parser.parse_args()
+
+    from apify_client import ApifyClient
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    token = os.getenv('APIFY_API_TOKEN')
+    if not token:
+        print("❌ APIFY_API_TOKEN manquant dans .env")
+        return
+
+    items = list(ApifyClient(token).dataset(args.dataset_id).iterate_items(fields=PLACE_FIELDS))
+    count = save_items(items, args.output)
+    print(f"✅ {count} lieux enregistrés dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
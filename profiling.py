@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Profilage optionnel du pipeline (cProfile + tracemalloc)
+Capture un profil CPU et un instantané mémoire par étape dans un dossier de run,
+lisibles avec pstats / snakeviz et tracemalloc.Snapshot.load()
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+from typing import Dict
+
+from config import PROFILE_DIR
+
+
+# Nombre de frames conservées par allocation tracée
+TRACEMALLOC_FRAMES = 25
+
+# Nombre de lignes des résumés texte (fonctions / allocations)
+SUMMARY_LINES = 30
+
+
+class RunProfiler:
+    """
+    Profileur d'un run, abonné aux événements du pipeline
+
+    Chaque étape (stage_start → stage_end) est profilée séparément dans le
+    thread qui l'exécute:
+    - <étape>.prof: statistiques cProfile (pstats, snakeviz)
+    - <étape>.tracemalloc: instantané mémoire (tracemalloc.Snapshot.load)
+    - <étape>.txt: fonctions les plus coûteuses et plus grosses allocations
+    finish() fusionne les profils des étapes dans run.prof.
+
+    Rien n'est installé tant que le profileur n'est pas abonné: sans
+    profilage demandé, le coût est nul.
+
+    Usage:
+        profiler = RunProfiler.for_run('scraper_pro')
+        events.subscribe(profiler.pipeline_subscriber)
+        ...
+        profiler.finish()
+    """
+
+    def __init__(self, run_dir: str, memory: bool = True):
+        """
+        Args:
+            run_dir: Dossier de sortie (créé si besoin)
+            memory: Capturer aussi les instantanés tracemalloc
+        """
+        self.run_dir = run_dir
+        self.memory = memory
+        self._active = {}
+        self._profiles = []
+        os.makedirs(run_dir, exist_ok=True)
+
+    @classmethod
+    def for_run(cls, prefix: str, memory: bool = True, base_dir: str = PROFILE_DIR) -> 'RunProfiler':
+        """
+        Crée un profileur dans un nouveau dossier horodaté
+
+        Args:
+            prefix: Préfixe du dossier (ex: 'scraper_pro')
+            memory: Capturer aussi les instantanés tracemalloc
+            base_dir: Dossier parent des runs profilés
+
+        Returns:
+            RunProfiler écrivant dans base_dir/<prefix>_<horodatage>/
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return cls(os.path.join(base_dir, f"{prefix}_{timestamp}"), memory)
+
+    def pipeline_subscriber(self, event_type: str, data: Dict):
+        """Abonné PipelineEvents: démarre / arrête le profilage de chaque étape"""
+        if event_type == 'stage_start':
+            self.start_stage(data['stage'])
+        elif event_type == 'stage_end':
+            self.stop_stage(data['stage'])
+
+    def start_stage(self, stage: str):
+        """Démarre le profilage d'une étape"""
+        owns_tracing = False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            owns_tracing = True
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Étape imbriquée (ex: enrichissement en flux pendant le scraping):
+            # un seul profileur actif à la fois, elle est comptée dans l'étape englobante
+            if owns_tracing:
+                tracemalloc.stop()
+            return
+        self._active[stage] = (profile, owns_tracing)
+
+    def stop_stage(self, stage: str):
+        """Arrête le profilage d'une étape et écrit ses fichiers"""
+        if stage not in self._active:
+            return
+
+        profile, owns_tracing = self._active.pop(stage)
+        profile.disable()
+
+        prof_path = os.path.join(self.run_dir, f"{stage}.prof")
+        profile.dump_stats(prof_path)
+        self._profiles.append(prof_path)
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profile, stream=summary)
+        stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            snapshot.dump(os.path.join(self.run_dir, f"{stage}.tracemalloc"))
+
+            current, peak = tracemalloc.get_traced_memory()
+            summary.write(f"\nMémoire tracée: {current / 1024:.0f} Ko (pic {peak / 1024:.0f} Ko)\n")
+            summary.write(f"Top {SUMMARY_LINES} des allocations:\n")
+            for stat in snapshot.statistics('lineno')[:SUMMARY_LINES]:
+                summary.write(f"  {stat}\n")
+
+            if owns_tracing:
+                tracemalloc.stop()
+
+        with open(os.path.join(self.run_dir, f"{stage}.txt"), 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+
+    def finish(self) -> str:
+        """
+        Clôt le profilage et fusionne les profils des étapes
+
+        Returns:
+            Dossier du run profilé
+        """
+        for stage in list(self._active):
+            self.stop_stage(stage)
+
+        if self._profiles:
+            stats = pstats.Stats(*self._profiles)
+            stats.dump_stats(os.path.join(self.run_dir, 'run.prof'))
+
+        print(f"🔬 Profils enregistrés dans {self.run_dir} "
+              f"(snakeviz {os.path.join(self.run_dir, 'run.prof')})")
+        return self.run_dir
@@ -13,31 +13,68 @@ import gspread
 from google.oauth2.service_account import Credentials
 import requests
 import json
+import apify_places
+import geo_tiling
 from email_finder import EmailFinder
+from instrumentation import PROCESS_METRICS, RunMetrics
+from config import (
+    GHL_API_URL, GHL_MAX_RETRIES, LEAD_STORE_PATH, RATE_LIMIT_GOHIGHLEVEL, SHEET_HEADERS
+)
+from lead_store import LeadStore
+from pipeline_events import PipelineEvents
+from profiling import RunProfiler
+from log_setup import get_logger
+from sheets_sink import write_unique_rows
 
 # Charger les variables d'environnement
 load_dotenv()
 
+logger = get_logger('scraper')
+
 class GoogleMapsScraper:
-    def __init__(self):
-        """Initialise le scraper avec les clés API"""
+    # Colonnes de la feuille "Entreprises" (config.SHEET_HEADERS)
+    SHEET_HEADERS = SHEET_HEADERS
+
+    def __init__(self, store_path=LEAD_STORE_PATH, places_source=None, apify_client=None,
+                 google_sheet=None):
+        """
+        Initialise le scraper avec les clés API
+
+        Args:
+            store_path: Base SQLite des leads (None pour désactiver)
+            places_source: Source de lieux remplaçant Apify (places_source.py);
+                aucune clé n'est alors requise et Google Sheets devient optionnel
+            apify_client: Client Apify déjà construit (partagé, voir scraper_service)
+            google_sheet: Google Sheet déjà ouvert (partagé); évite une nouvelle autorisation
+        """
         self.apify_token = os.getenv('APIFY_API_TOKEN')
         self.google_sheet_id = os.getenv('GOOGLE_SHEET_ID')
         self.ghl_api_key = os.getenv('GOHIGHLEVEL_API_KEY')
         self.ghl_location_id = os.getenv('GOHIGHLEVEL_LOCATION_ID')
+        self.ghl_api_url = GHL_API_URL
         self.hunter_api_key = os.getenv('HUNTER_API_KEY')
         
         # Vérifier les clés essentielles
-        if not self.apify_token:
+        if not self.apify_token and places_source is None:
             raise ValueError("APIFY_API_TOKEN manquant dans .env")
-        if not self.google_sheet_id:
+        if not self.google_sheet_id and places_source is None:
             raise ValueError("GOOGLE_SHEET_ID manquant dans .env")
         
+        # Métriques du run (latences, erreurs, octets par service)
+        self.metrics = RunMetrics(parent=PROCESS_METRICS)
+        
         # Initialiser les clients
-        self.apify_client = ApifyClient(self.apify_token)
-        self.google_sheet = None
-        self.email_finder = EmailFinder()
-        self._init_google_sheets()
+        self.apify_client = places_source or apify_client or ApifyClient(self.apify_token)
+        self.google_sheet = google_sheet
+        self.email_finder = EmailFinder(metrics=self.metrics)
+        self.ghl_session = self.metrics.instrument_session(requests.Session(), 'http.gohighlevel')
+        self.lead_store = LeadStore(store_path) if store_path else None
+        # Saturation par tuile du dernier scraping découpé (geo_tiling)
+        self.tile_report = []
+        if not self.google_sheet_id:
+            print("⚠️  GOOGLE_SHEET_ID non défini. Google Sheets désactivé.")
+        elif self.google_sheet is None:
+            self._init_google_sheets()
         
     def _init_google_sheets(self):
         """Initialise la connexion Google Sheets"""
@@ -66,12 +103,7 @@ class GoogleMapsScraper:
             except:
                 worksheet = self.google_sheet.add_worksheet('Entreprises', rows=1000, cols=12)
                 # Ajouter les en-têtes
-                headers = [
-                    'Nom', 'Adresse', 'Téléphone', 'Site Web', 'Note', 
-                    'Nombre Avis', 'Catégorie', 'Nom Contact', 'Email Contact', 
-                    'Confiance Email', 'Poste Contact', 'Date Ajout', 'URL Google Maps'
-                ]
-                worksheet.append_row(headers)
+                worksheet.append_row(self.SHEET_HEADERS)
             
             print("✅ Connexion Google Sheets établie")
             
@@ -81,48 +113,64 @@ class GoogleMapsScraper:
         except Exception as e:
             print(f"⚠️  Erreur lors de l'initialisation Google Sheets: {e}")
     
-    def scrape_google_maps(self, search_query, max_results=50):
+    def scrape_google_maps(self, search_query, max_results=50, events=None, area=None):
         """
         Scrape Google Maps via Apify
         
+        Une liste de recherches est soumise en un ou quelques runs d'actor;
+        les lieux trouvés par plusieurs recherches ne sont gardés qu'une fois.
+        
         Args:
-            search_query: La recherche à effectuer (ex: "restaurants à Paris")
-            max_results: Nombre maximum de résultats (défaut: 50)
+            search_query: La recherche à effectuer (ex: "restaurants à Paris"),
+                ou une liste de recherches
+            max_results: Nombre maximum de résultats par recherche (défaut: 50)
+            events: PipelineEvents recevant l'étape 'scrape' (optionnel)
+            area: Zone découpée en tuiles (voir geo_tiling.plan_tiles): nom de
+                ville ("paris") ou boîte (sud, ouest, nord, est); max_results
+                s'applique alors à chaque tuile
         
         Returns:
             Liste des entreprises trouvées
         """
-        print(f"🔍 Recherche en cours: '{search_query}'")
+        queries = [search_query] if isinstance(search_query, str) else list(search_query)
+        
+        if len(queries) == 1:
+            print(f"🔍 Recherche en cours: '{queries[0]}'")
+        else:
+            print(f"🔍 {len(queries)} recherches en cours (ex: '{queries[0]}')")
         print(f"📊 Nombre de résultats demandés: {max_results}")
         
-        # Configuration de l'Actor Apify pour Google Maps
-        # Utilise l'actor officiel: compass/crawler-google-places
-        run_input = {
-            "searchStringsArray": [search_query],
-            "maxCrawledPlacesPerSearch": max_results,
-            "language": "fr",
-            "deeperCityScrape": False,
-            "scrapeReviewerName": False,
-            "scrapeReviewerId": False,
-            "scrapeReviewId": False,
-            "scrapeReviewUrl": False,
-            "scrapeResponseFromOwnerText": False,
-            "scrapeReviewsPersonalData": False,
-        }
+        events = events or PipelineEvents()
+        self.tile_report = []
+        
+        tiles = [tile for query in queries for tile in geo_tiling.plan_tiles(query, area)] if area else []
+        if tiles:
+            print(f"🗺️  Zone découpée en {len(tiles)} tuiles")
         
         try:
-            # Lancer l'actor
-            print("🚀 Lancement du scraping Apify...")
-            run = self.apify_client.actor("compass/crawler-google-places").call(run_input=run_input)
+            with events.stage('scrape', total=max_results * len(tiles or queries)) as stage:
+                # Lancer l'actor (compass/crawler-google-places) et récupérer les résultats
+                print("🚀 Lancement du scraping Apify...")
+                if tiles:
+                    results, self.tile_report = geo_tiling.run_tiles(
+                        self.apify_client, tiles, max_results,
+                        metrics=self.metrics, stage=stage
+                    )
+                else:
+                    results = apify_places.fetch_places(
+                        self.apify_client, queries, max_results,
+                        metrics=self.metrics, stage=stage
+                    )
+            
+            if self.tile_report:
+                print(geo_tiling.format_tile_report(self.tile_report))
             
-            # Récupérer les résultats
-            print("📥 Récupération des résultats...")
-            results = []
-            for item in self.apify_client.dataset(run["defaultDatasetId"]).iterate_items():
-                results.append(item)
+            places = apify_places.dedupe_places(results)
+            if len(places) < len(results):
+                print(f"🧹 {len(results) - len(places)} doublons entre recherches supprimés")
             
-            print(f"✅ {len(results)} entreprises trouvées")
-            return results
+            print(f"✅ {len(places)} entreprises trouvées")
+            return places
             
         except Exception as e:
             print(f"❌ Erreur lors du scraping: {e}")
@@ -148,25 +196,33 @@ class GoogleMapsScraper:
         }
         
         # Utiliser le nouveau EmailFinder
-        result = self.email_finder.find_contact_email(company_name, website)
+        with self.metrics.timer('find_contact_email'):
+            result = self.email_finder.find_contact_email(company_name, website)
         contact_info['email'] = result['email']
         contact_info['email_confidence'] = result['confidence']
         
         # Essayer de trouver le nom du gérant
         if website:
-            manager_name = self.email_finder.find_manager_name(company_name, website)
+            with self.metrics.timer('find_manager_name'):
+                manager_name = self.email_finder.find_manager_name(company_name, website)
             if manager_name:
                 contact_info['name'] = manager_name
                 contact_info['position'] = 'Gérant'
         
         return contact_info
     
-    def save_to_google_sheets(self, businesses_data):
+    def save_to_google_sheets(self, businesses_data, update_existing=False, events=None):
         """
         Sauvegarde les données dans Google Sheets
         
+        Les entreprises déjà présentes (même URL Google Maps) ne sont pas
+        ajoutées une seconde fois.
+        
         Args:
             businesses_data: Liste de dicts contenant les infos des entreprises
+            update_existing: Mettre à jour les lignes existantes au lieu de les ignorer
+            events: PipelineEvents recevant l'étape 'google_sheets', un
+                événement par lot écrit (optionnel)
         """
         if not self.google_sheet:
             print("⚠️  Google Sheets non configuré, saut de cette étape")
@@ -177,6 +233,7 @@ class GoogleMapsScraper:
             
             print(f"📝 Ajout de {len(businesses_data)} entreprises dans Google Sheets...")
             
+            rows = []
             for business in businesses_data:
                 row = [
                     business.get('name', ''),
@@ -193,20 +250,81 @@ class GoogleMapsScraper:
                     datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                     business.get('url', '')
                 ]
-                worksheet.append_row(row)
-                time.sleep(0.5)  # Éviter de dépasser les limites d'API
+                rows.append(row)
+            
+            events = events or PipelineEvents()
             
-            print("✅ Données ajoutées à Google Sheets")
+            # Une lecture de la colonne URL, puis écritures par lots
+            with events.stage('google_sheets', total=len(rows)) as stage, \
+                    self.metrics.timer('google_sheets.write'):
+                counts = write_unique_rows(
+                    worksheet,
+                    rows,
+                    key_column=self.SHEET_HEADERS.index('URL Google Maps') + 1,
+                    update_columns=self.SHEET_HEADERS.index('Date Ajout'),
+                    update_existing=update_existing,
+                    progress_callback=lambda operation, n: stage.advance(n, operation=operation),
+                    on_retry=lambda: self.metrics.incr('sink_retries', sink='google_sheets')
+                )
+            
+            print(f"✅ Données ajoutées à Google Sheets "
+                  f"({counts['appended']} ajoutées, {counts['updated']} mises à jour, "
+                  f"{counts['skipped']} déjà présentes)")
             
         except Exception as e:
             print(f"❌ Erreur lors de l'ajout à Google Sheets: {e}")
     
-    def send_to_gohighlevel(self, businesses_data):
+    def save_to_store(self, businesses_data, search_query=None, events=None):
+        """
+        Enregistre les entreprises dans la base SQLite locale (upsert par place ID)
+
+        Args:
+            businesses_data: Liste de dicts contenant les infos des entreprises
+            search_query: Recherche d'origine
+            events: PipelineEvents recevant l'étape 'store' (optionnel)
+        """
+        if not self.lead_store:
+            return
+
+        events = events or PipelineEvents()
+
+        try:
+            with events.stage('store', total=len(businesses_data)) as stage:
+                count = self.lead_store.upsert_leads(businesses_data, search_query,
+                                                     pipeline='standard')
+                stage.advance(count)
+            print(f"💾 {count} entreprises enregistrées dans {self.lead_store.path}")
+
+        except Exception as e:
+            print(f"❌ Erreur lors de l'enregistrement local: {e}")
+
+    def _post_to_gohighlevel(self, url, headers, payload):
+        """
+        Envoie un contact à GoHighLevel, en réessayant sur 429 / 5xx
+        
+        Returns:
+            La dernière réponse reçue
+        """
+        for attempt in range(GHL_MAX_RETRIES + 1):
+            response = self.ghl_session.post(url, headers=headers, json=payload, timeout=10)
+            
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt >= GHL_MAX_RETRIES:
+                return response
+            
+            self.metrics.incr('sink_retries', sink='gohighlevel')
+            retry_after = response.headers.get('Retry-After', '')
+            delay = float(retry_after) if retry_after.isdigit() else RATE_LIMIT_GOHIGHLEVEL * 2 ** (attempt + 1)
+            time.sleep(delay)
+    
+    def send_to_gohighlevel(self, businesses_data, events=None):
         """
         Envoie les contacts vers GoHighLevel
         
         Args:
             businesses_data: Liste de dicts contenant les infos des entreprises
+            events: PipelineEvents recevant l'étape 'gohighlevel', un
+                événement par contact (optionnel)
         """
         # Vérifier si GoHighLevel est configuré avec une vraie API key
         if (not self.ghl_api_key or 
@@ -218,134 +336,171 @@ class GoogleMapsScraper:
         
         print(f"📤 Envoi de {len(businesses_data)} contacts vers GoHighLevel...")
         
-        url = "https://rest.gohighlevel.com/v1/contacts/"
+        url = self.ghl_api_url
         headers = {
             "Authorization": f"Bearer {self.ghl_api_key}",
             "Content-Type": "application/json"
         }
         
         success_count = 0
+        events = events or PipelineEvents()
         
-        for business in businesses_data:
-            try:
-                # Préparer les données pour GoHighLevel
-                contact_data = {
-                    "locationId": self.ghl_location_id,
-                    "firstName": business.get('contact_name', '').split()[0] if business.get('contact_name') else business.get('name', ''),
-                    "lastName": ' '.join(business.get('contact_name', '').split()[1:]) if business.get('contact_name') and len(business.get('contact_name', '').split()) > 1 else '',
-                    "email": business.get('contact_email', ''),
-                    "phone": business.get('phone', ''),
-                    "companyName": business.get('name', ''),
-                    "website": business.get('website', ''),
-                    "address1": business.get('address', ''),
-                    "customFields": [
-                        {
-                            "key": "google_maps_rating",
-                            "value": str(business.get('rating', ''))
-                        },
-                        {
-                            "key": "google_maps_url",
-                            "value": business.get('url', '')
-                        },
-                        {
-                            "key": "category",
-                            "value": business.get('category', '')
-                        },
-                        {
-                            "key": "position",
-                            "value": business.get('contact_position', '')
-                        }
-                    ],
-                    "tags": ["Google Maps Scraper", "Lead"]
-                }
-                
-                # Envoyer la requête
-                response = requests.post(url, headers=headers, json=contact_data, timeout=10)
-                
-                if response.status_code in [200, 201]:
-                    success_count += 1
-                else:
-                    print(f"⚠️  Erreur pour {business.get('name')}: {response.status_code}")
-                
-                time.sleep(0.5)  # Rate limiting
+        with events.stage('gohighlevel', total=len(businesses_data)) as stage:
+            for business in businesses_data:
+                sent = False
+                try:
+                    # Préparer les données pour GoHighLevel
+                    contact_data = {
+                        "locationId": self.ghl_location_id,
+                        "firstName": business.get('contact_name', '').split()[0] if business.get('contact_name') else business.get('name', ''),
+                        "lastName": ' '.join(business.get('contact_name', '').split()[1:]) if business.get('contact_name') and len(business.get('contact_name', '').split()) > 1 else '',
+                        "email": business.get('contact_email', ''),
+                        "phone": business.get('phone', ''),
+                        "companyName": business.get('name', ''),
+                        "website": business.get('website', ''),
+                        "address1": business.get('address', ''),
+                        "customFields": [
+                            {
+                                "key": "google_maps_rating",
+                                "value": str(business.get('rating', ''))
+                            },
+                            {
+                                "key": "google_maps_url",
+                                "value": business.get('url', '')
+                            },
+                            {
+                                "key": "category",
+                                "value": business.get('category', '')
+                            },
+                            {
+                                "key": "position",
+                                "value": business.get('contact_position', '')
+                            }
+                        ],
+                        "tags": ["Google Maps Scraper", "Lead"]
+                    }
+                    
+                    # Envoyer la requête
+                    response = self._post_to_gohighlevel(url, headers, contact_data)
+                    
+                    sent = response.status_code in [200, 201]
+                    if sent:
+                        success_count += 1
+                    else:
+                        logger.warning("⚠️  Erreur pour %s: %s", business.get('name'), response.status_code)
+                    
+                    time.sleep(0.5)  # Rate limiting
+                    
+                except Exception as e:
+                    logger.error("❌ Erreur lors de l'envoi de %s: %s", business.get('name'), e)
                 
-            except Exception as e:
-                print(f"❌ Erreur lors de l'envoi de {business.get('name')}: {e}")
+                stage.advance(name=business.get('name', ''), sent=sent, operation='create')
         
         print(f"✅ {success_count}/{len(businesses_data)} contacts envoyés à GoHighLevel")
     
-    def process_results(self, results):
+    def process_results(self, results, events=None):
         """
         Traite les résultats d'Apify et enrichit avec les contacts
         
         Args:
             results: Résultats bruts d'Apify
+            events: PipelineEvents recevant l'étape 'enrichment', un
+                événement par entreprise (optionnel)
         
         Returns:
             Liste enrichie avec les informations de contact
         """
         processed_data = []
         
-        print(f"🔄 Traitement et enrichissement de {len(results)} entreprises...")
+        logger.info("🔄 Traitement et enrichissement de %d entreprises...", len(results))
         
-        for idx, result in enumerate(results, 1):
-            print(f"  [{idx}/{len(results)}] Traitement de {result.get('title', 'N/A')}...")
-            
-            # Extraire les données de base
-            business = {
-                'name': result.get('title', ''),
-                'address': result.get('address', ''),
-                'phone': result.get('phone', ''),
-                'website': result.get('website', ''),
-                'rating': result.get('totalScore', ''),
-                'reviews_count': result.get('reviewsCount', ''),
-                'category': result.get('categoryName', ''),
-                'url': result.get('url', ''),
-            }
-            
-            # Chercher les informations de contact
-            contact = self.find_contact_info(
-                business['name'],
-                business['website']
-            )
-            
-            business['contact_name'] = contact['name']
-            business['contact_email'] = contact['email']
-            business['email_confidence'] = contact.get('email_confidence', 'low')
-            business['contact_position'] = contact['position']
-            
-            processed_data.append(business)
+        events = events or PipelineEvents()
         
-        print("✅ Traitement terminé")
+        with events.stage('enrichment', total=len(results)) as stage:
+            for idx, result in enumerate(results, 1):
+                logger.debug("[%d/%d] Traitement de %s...", idx, len(results), result.get('title', 'N/A'))
+                
+                # Extraire les données de base
+                business = {
+                    'name': result.get('title', ''),
+                    'address': result.get('address', ''),
+                    'phone': result.get('phone', ''),
+                    'website': result.get('website', ''),
+                    'rating': result.get('totalScore', ''),
+                    'reviews_count': result.get('reviewsCount', ''),
+                    'category': result.get('categoryName', ''),
+                    'url': result.get('url', ''),
+                    'place_id': result.get('placeId', ''),
+                    'search_query': result.get('source_query', ''),
+                }
+                
+                # Chercher les informations de contact
+                with self.metrics.timer('enrich_company'):
+                    contact = self.find_contact_info(
+                        business['name'],
+                        business['website']
+                    )
+                
+                business['contact_name'] = contact['name']
+                business['contact_email'] = contact['email']
+                business['email_confidence'] = contact.get('email_confidence', 'low')
+                business['contact_position'] = contact['position']
+                business['enrichment_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                
+                processed_data.append(business)
+                
+                stage.advance(name=business['name'],
+                              email_found=bool(business['contact_email']))
+        
+        logger.info("✅ Traitement terminé")
         return processed_data
     
-    def run(self, search_query, max_results=50):
+    def run(self, search_query, max_results=50, events=None, profile=False, area=None):
         """
         Exécute le pipeline complet
         
         Args:
-            search_query: Recherche à effectuer
-            max_results: Nombre de résultats (défaut: 50)
+            search_query: Recherche à effectuer, ou liste de recherches
+            max_results: Nombre de résultats par recherche (défaut: 50)
+            events: PipelineEvents recevant la progression de chaque étape (optionnel)
+            profile: Profiler chaque étape (cProfile + tracemalloc) dans PROFILE_DIR
+            area: Découper la recherche en tuiles sur cette zone (ex: "paris",
+                voir geo_tiling), max_results s'appliquant à chaque tuile
         """
         print("\n" + "="*60)
         print("🗺️  GOOGLE MAPS SCRAPER - Démarrage")
         print("="*60 + "\n")
         
+        # Métriques propres à ce run (durée de chaque étape incluse)
+        self.metrics.reset()
+        events = events or PipelineEvents()
+        events.subscribe(self.metrics.pipeline_subscriber)
+        
+        profiler = None
+        if profile:
+            profiler = RunProfiler.for_run('scraper')
+            events.subscribe(profiler.pipeline_subscriber)
+        
         # 1. Scraper Google Maps
-        results = self.scrape_google_maps(search_query, max_results)
+        results = self.scrape_google_maps(search_query, max_results, events=events, area=area)
         
         if not results:
             print("❌ Aucun résultat trouvé. Arrêt du processus.")
+            if profiler:
+                profiler.finish()
             return
         
         # 2. Traiter et enrichir les résultats
-        processed_data = self.process_results(results)
+        processed_data = self.process_results(results, events=events)
+        # En multi-recherches, chaque lead garde sa propre recherche d'origine
+        self.save_to_store(processed_data, search_query if isinstance(search_query, str) else None,
+                           events=events)
         
         # 3. Sauvegarder dans Google Sheets
-        self.save_to_google_sheets(processed_data)
+        self.save_to_google_sheets(processed_data, events=events)
         
         # 4. Envoyer vers GoHighLevel
-        self.send_to_gohighlevel(processed_data)
+        self.send_to_gohighlevel(processed_data, events=events)
         
         print("\n" + "="*60)
         print("✅ PROCESSUS TERMINÉ AVEC SUCCÈS")
@@ -354,6 +509,28 @@ class GoogleMapsScraper:
         print(f"   - Entreprises scrapées: {len(results)}")
         print(f"   - Entreprises traitées: {len(processed_data)}")
         print(f"   - Avec contacts trouvés: {sum(1 for b in processed_data if b['contact_email'])}")
+        
+        self.report_metrics()
+        if profiler:
+            profiler.finish()
+    
+    def report_metrics(self):
+        """
+        Affiche le tableau des métriques du run et écrit le rapport JSON
+        
+        Returns:
+            Chemin du rapport JSON (None si l'écriture a échoué)
+        """
+        print("\n⏱️  Métriques du run:")
+        print(self.metrics.format_table())
+        
+        try:
+            filename = self.metrics.save_report(prefix='scraper')
+            print(f"📄 Rapport enregistré: {filename}")
+            return filename
+        except OSError as e:
+            print(f"⚠️  Impossible d'écrire le rapport: {e}")
+            return None
 
 
 def main():
@@ -361,13 +538,22 @@ def main():
     print("\n🚀 Google Maps Scraper avec Apify\n")
     
     # Demander les paramètres à l'utilisateur
-    search_query = input("🔍 Entrez votre recherche (ex: 'restaurants à Paris'): ").strip()
+    print("💡 Plusieurs recherches: séparez-les par « ; » ou indiquez @fichier.txt (une par ligne)")
+    try:
+        queries = apify_places.parse_queries(
+            input("🔍 Entrez votre recherche (ex: 'restaurants à Paris'): ")
+        )
+    except OSError as e:
+        print(f"❌ Fichier de recherches illisible: {e}")
+        return
     
-    if not search_query:
+    if not queries:
         print("❌ Recherche vide. Arrêt du programme.")
         return
     
-    max_results_input = input("📊 Nombre d'entreprises à scraper [50]: ").strip()
+    search_query = queries[0] if len(queries) == 1 else queries
+    
+    max_results_input = input("📊 Nombre d'entreprises à scraper par recherche [50]: ").strip()
     max_results = int(max_results_input) if max_results_input else 50
     
     try:
@@ -4,21 +4,40 @@ Scraper Pro - Version optimisée pour la prospection B2B
 Intègre le scraping Google Maps + enrichissement + scoring automatique
 """
 
+import argparse
 import os
-import time
+from contextlib import closing, nullcontext
 from datetime import datetime
 from dotenv import load_dotenv
 from apify_client import ApifyClient
 import gspread
 from google.oauth2.service_account import Credentials
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Union
 
+import apify_places
+import geo_tiling
+import fixtures
 from contact_enricher import ContactEnricher
 from contact_scorer import ContactScorer
+from instrumentation import PROCESS_METRICS, RunMetrics
+from config import (
+    ENRICH_WORKERS, INCREMENTAL_TTL_DAYS, LEAD_STORE_PATH, SMTP_MX_INTERVAL, SMTP_PORT
+)
+from lead_store import LeadStore, content_hash, is_fresh, place_key, website_domain
+from checkpoint import RunCheckpoint
+from sharded_enrichment import ShardedEnricher
+from pipeline_events import PipelineEvents
+from profiling import RunProfiler
+from log_setup import get_logger
+from sheets_sink import write_unique_rows
+import lead_export
+import places_source
 
 # Charger les variables d'environnement
 load_dotenv()
 
+logger = get_logger('scraper_pro')
+
 
 class GoogleMapsScraperPro:
     """
@@ -31,30 +50,87 @@ class GoogleMapsScraperPro:
     4. Export contacts qualifiés uniquement
     """
 
-    def __init__(self, min_score: int = 50):
+    # Colonnes de la feuille "Prospection"
+    SHEET_HEADERS = [
+        # Contact
+        'Nom Contact',
+        'Fonction',
+        'Email',
+        'Confiance Email',
+        'LinkedIn',
+        'Téléphone Direct',
+
+        # Entreprise
+        'Nom Entreprise',
+        'SIRET',
+        'Adresse',
+        'Téléphone',
+        'Site Web',
+        'Note Google',
+        'Nb Avis',
+        'Catégorie',
+
+        # Enrichissement
+        'SIREN',
+        'Forme Juridique',
+        'CA',
+        'Employés',
+        'Date Création',
+
+        # Scoring
+        'Score Total (/100)',
+        'Score Email (/40)',
+        'Score Contact (/30)',
+        'Score Entreprise (/30)',
+        'Catégorie',
+        'Priorité',
+
+        # Métadonnées
+        'Sources Données',
+        'Date Ajout',
+        'Statut',  # À contacter / Contacté / Répondu
+        'URL Google Maps'
+    ]
+
+    def __init__(self, min_score: int = 50, store_path: str = LEAD_STORE_PATH, places_source=None,
+                 apify_client=None, google_sheet=None):
         """
         Initialise le scraper pro
 
         Args:
             min_score: Score minimum pour exporter un contact (défaut: 50)
+            store_path: Base SQLite des leads (None pour désactiver)
+            places_source: Source de lieux remplaçant Apify (places_source.py);
+                aucune clé n'est alors requise et Google Sheets devient optionnel
+            apify_client: Client Apify déjà construit (partagé, voir scraper_service)
+            google_sheet: Google Sheet déjà ouvert (partagé); évite une nouvelle autorisation
         """
         self.apify_token = os.getenv('APIFY_API_TOKEN')
         self.google_sheet_id = os.getenv('GOOGLE_SHEET_ID')
 
         # Vérifier les clés essentielles
-        if not self.apify_token:
+        if not self.apify_token and places_source is None:
             raise ValueError("APIFY_API_TOKEN manquant dans .env")
-        if not self.google_sheet_id:
+        if not self.google_sheet_id and places_source is None:
             raise ValueError("GOOGLE_SHEET_ID manquant dans .env")
 
+        # Métriques du run (latences, erreurs, octets par service)
+        self.metrics = RunMetrics(parent=PROCESS_METRICS)
+
         # Initialiser les clients
-        self.apify_client = ApifyClient(self.apify_token)
-        self.google_sheet = None
-        self.enricher = ContactEnricher()
+        self.apify_client = places_source or apify_client or ApifyClient(self.apify_token)
+        self.google_sheet = google_sheet
+        self.enricher = ContactEnricher(metrics=self.metrics)
         self.scorer = ContactScorer()
         self.min_score = min_score
+        self.lead_store = LeadStore(store_path) if store_path else None
+        # Saturation par tuile du dernier scraping découpé (geo_tiling)
+        self.tile_report = []
 
-        self._init_google_sheets()
+        if not self.google_sheet_id:
+            print("⚠️  GOOGLE_SHEET_ID non défini. Google Sheets désactivé.")
+        elif self.google_sheet is None:
+            self._init_google_sheets()
 
     def _init_google_sheets(self):
         """Initialise la connexion Google Sheets avec les nouvelles colonnes"""
@@ -84,47 +160,7 @@ class GoogleMapsScraperPro:
                 worksheet = self.google_sheet.add_worksheet('Prospection', rows=1000, cols=30)
 
                 # Ajouter les en-têtes complets
-                headers = [
-                    # Contact
-                    'Nom Contact',
-                    'Fonction',
-                    'Email',
-                    'Confiance Email',
-                    'LinkedIn',
-                    'Téléphone Direct',
-
-                    # Entreprise
-                    'Nom Entreprise',
-                    'SIRET',
-                    'Adresse',
-                    'Téléphone',
-                    'Site Web',
-                    'Note Google',
-                    'Nb Avis',
-                    'Catégorie',
-
-                    # Enrichissement
-                    'SIREN',
-                    'Forme Juridique',
-                    'CA',
-                    'Employés',
-                    'Date Création',
-
-                    # Scoring
-                    'Score Total (/100)',
-                    'Score Email (/40)',
-                    'Score Contact (/30)',
-                    'Score Entreprise (/30)',
-                    'Catégorie',
-                    'Priorité',
-
-                    # Métadonnées
-                    'Sources Données',
-                    'Date Ajout',
-                    'Statut',  # À contacter / Contacté / Répondu
-                    'URL Google Maps'
-                ]
-                worksheet.append_row(headers)
+                worksheet.append_row(self.SHEET_HEADERS)
 
             print("✅ Connexion Google Sheets établie (Mode Prospection)")
 
@@ -134,109 +170,335 @@ class GoogleMapsScraperPro:
         except Exception as e:
             print(f"⚠️  Erreur lors de l'initialisation Google Sheets: {e}")
 
-    def scrape_google_maps(self, search_query: str, max_results: int = 50) -> List[Dict]:
+    def iter_google_maps(self, search_query: Union[str, List[str]], max_results: int = 50,
+                         events: PipelineEvents = None, area=None,
+                         checkpoint: RunCheckpoint = None) -> Iterator[Dict]:
         """
-        Scrape Google Maps via Apify
+        Scrape Google Maps via Apify, lieux produits au fil de l'eau
 
-        Args:
-            search_query: La recherche à effectuer (ex: "fabricants vérandas Lyon")
-            max_results: Nombre maximum de résultats (défaut: 50)
+        Les runs d'actor sont démarrés en parallèle (APIFY_MAX_CONCURRENT_RUNS
+        au plus) et leurs datasets lus pendant le crawl: chaque lieu est
+        produit dès qu'un run l'a écrit. Plusieurs recherches (ex: un métier
+        × 50 villes) sont soumises par lots de APIFY_QUERIES_PER_RUN par run;
+        chaque lieu est étiqueté par sa recherche d'origine (source_query) et
+        les lieux trouvés par plusieurs recherches ne sont produits qu'une
+        fois (source_queries). L'étape 'scrape' couvre toute l'itération.
 
-        Returns:
-            Liste des entreprises trouvées
+        Args:
+            search_query: La recherche à effectuer (ex: "fabricants vérandas Lyon"),
+                ou une liste de recherches
+            max_results: Nombre maximum de résultats par recherche (défaut: 50)
+            events: PipelineEvents recevant l'étape 'scrape' (optionnel)
+            area: Zone découpée en tuiles (voir geo_tiling.plan_tiles): nom de
+                ville ("paris") ou boîte (sud, ouest, nord, est); max_results
+                s'applique alors à chaque tuile
+            checkpoint: Point de reprise: runs d'actor déjà lancés rattachés
+                au lieu d'être relancés, nouveaux runs enregistrés (optionnel)
+
+        Yields:
+            Entreprises trouvées (sans doublons)
         """
-        print(f"🔍 Recherche en cours: '{search_query}'")
+        queries = [search_query] if isinstance(search_query, str) else list(search_query)
+
+        if len(queries) == 1:
+            print(f"🔍 Recherche en cours: '{queries[0]}'")
+        else:
+            print(f"🔍 {len(queries)} recherches en cours (ex: '{queries[0]}')")
         print(f"📊 Nombre de résultats demandés: {max_results}")
 
-        # Configuration de l'Actor Apify pour Google Maps
-        run_input = {
-            "searchStringsArray": [search_query],
-            "maxCrawledPlacesPerSearch": max_results,
-            "language": "fr",
-            "deeperCityScrape": False,
-            "scrapeReviewerName": False,
-            "scrapeReviewerId": False,
-            "scrapeReviewId": False,
-            "scrapeReviewUrl": False,
-            "scrapeResponseFromOwnerText": False,
-            "scrapeReviewsPersonalData": False,
-        }
+        events = events or PipelineEvents()
+        self.tile_report = []
 
-        try:
-            # Lancer l'actor
+        tiles = [tile for query in queries for tile in geo_tiling.plan_tiles(query, area)] if area else []
+        if tiles:
+            print(f"🗺️  Zone découpée en {len(tiles)} tuiles")
+
+        duplicates_before = self.metrics.counter('duplicate_places')
+
+        with events.stage('scrape', total=max_results * len(tiles or queries)) as stage:
             print("🚀 Lancement du scraping Apify...")
-            run = self.apify_client.actor("compass/crawler-google-places").call(run_input=run_input)
+            if tiles:
+                items = geo_tiling.iter_tiles(self.apify_client, tiles, max_results,
+                                              self.tile_report, metrics=self.metrics,
+                                              checkpoint=checkpoint)
+            else:
+                items = apify_places.iter_places(self.apify_client, queries, max_results,
+                                                 metrics=self.metrics, checkpoint=checkpoint)
+
+            for place in apify_places.iter_unique(
+                    items, on_duplicate=lambda: self.metrics.incr('duplicate_places')):
+                stage.advance()
+                yield place
+
+        if self.tile_report:
+            print(geo_tiling.format_tile_report(self.tile_report))
+
+        duplicates = self.metrics.counter('duplicate_places') - duplicates_before
+        if duplicates:
+            print(f"🧹 {duplicates} doublons entre recherches supprimés")
+
+    def scrape_google_maps(self, search_query: Union[str, List[str]], max_results: int = 50,
+                           events: PipelineEvents = None, area=None,
+                           checkpoint: RunCheckpoint = None) -> List[Dict]:
+        """
+        Scrape Google Maps via Apify (voir iter_google_maps)
 
-            # Récupérer les résultats
-            print("📥 Récupération des résultats...")
-            results = []
-            for item in self.apify_client.dataset(run["defaultDatasetId"]).iterate_items():
-                results.append(item)
+        Args:
+            search_query: La recherche à effectuer (ex: "fabricants vérandas Lyon"),
+                ou une liste de recherches
+            max_results: Nombre maximum de résultats par recherche (défaut: 50)
+            events: PipelineEvents recevant l'étape 'scrape' (optionnel)
+            area: Zone découpée en tuiles (voir geo_tiling.plan_tiles)
+            checkpoint: Point de reprise des runs d'actor (optionnel)
 
-            print(f"✅ {len(results)} entreprises trouvées")
-            return results
+        Returns:
+            Liste des entreprises trouvées (sans doublons)
+        """
+        try:
+            places = list(self.iter_google_maps(search_query, max_results, events, area, checkpoint))
+            print(f"✅ {len(places)} entreprises trouvées")
+            return places
 
         except Exception as e:
             print(f"❌ Erreur lors du scraping: {e}")
             return []
 
-    def enrich_and_score(self, raw_results: List[Dict]) -> List[Dict]:
+    def enrich_and_score(self, raw_results: Iterable[Dict], incremental: bool = False,
+                         ttl_days: float = INCREMENTAL_TTL_DAYS,
+                         events: PipelineEvents = None,
+                         checkpoint: RunCheckpoint = None,
+                         workers: int = ENRICH_WORKERS,
+                         results: List[Dict] = None) -> List[Dict]:
         """
         Enrichit et score les résultats
 
+        En mode incrémental, les lieux déjà présents dans la base locale dont
+        le site web, le téléphone et la note n'ont pas changé réutilisent leur
+        enrichissement s'il a moins de ttl_days jours: seuls les lieux nouveaux
+        ou modifiés passent par enrich_contact.
+
+        raw_results peut être un itérateur (iter_google_maps): chaque
+        entreprise est alors enrichie dès que le scraping la produit.
+
+        Avec un point de reprise, chaque entreprise enrichie y est enregistrée
+        et celles déjà enrichies avant une interruption sont reprises telles
+        quelles.
+
+        Avec workers > 1, enrich_contact s'exécute dans un pool de processus
+        (sharded_enrichment, entreprises réparties par domaine); le scoring,
+        le point de reprise et les étapes suivantes restent dans ce processus,
+        et les entreprises arrivent dans l'ordre où elles sont enrichies.
+
+        Les MX d'une liste sont résolus en un lot avant l'enrichissement
+        (étape 'mx_lookup'); en flux ou dans les processus du pool, chaque
+        domaine est résolu en arrière-plan dès la réception de l'entreprise.
+
         Args:
-            raw_results: Résultats bruts d'Apify
+            raw_results: Résultats bruts d'Apify (liste ou itérateur)
+            incremental: Réutiliser les enrichissements de la base locale
+            ttl_days: Durée de validité d'un enrichissement stocké (en jours)
+            events: PipelineEvents recevant l'étape 'enrichment', un
+                événement par entreprise (optionnel)
+            checkpoint: Point de reprise des enrichissements (optionnel)
+            workers: Nombre de processus d'enrichissement (1: dans ce processus)
+            results: Liste complétée au fil de l'eau (optionnel): les leads
+                déjà enrichis y restent si l'enrichissement échoue en cours
 
         Returns:
             Liste enrichie et scorée
         """
-        enriched_contacts = []
+        enriched_contacts = results if results is not None else []
+        reused_count = 0
+        resumed_count = 0
+
+        # Nombre d'entreprises inconnu tant qu'un flux n'est pas terminé
+        total = len(raw_results) if isinstance(raw_results, list) else None
+
+        # Lecture groupée de la base pour une liste, lieu par lieu pour un flux
+        stored_leads = None
+        if incremental:
+            if not self.lead_store:
+                logger.warning("⚠️  Mode incrémental sans base locale, enrichissement complet")
+            elif total is not None:
+                stored_leads = self.lead_store.get_leads((place_key(r) for r in raw_results),
+                                                         pipeline='pro')
+
+        if total is None:
+            logger.info("🔄 Phase d'enrichissement intelligent (au fil du scraping)")
+        else:
+            logger.info("🔄 Phase d'enrichissement intelligent (%d entreprises)", total)
+
+        events = events or PipelineEvents()
+
+        mx_verifier = self.enricher.mx_verifier
+        smtp_verifier = self.enricher.smtp_verifier
+
+        # Pool de processus arrêté en sortie de bloc, même sur erreur
+        sharding = nullcontext()
+        if workers > 1:
+            sharding = ShardedEnricher(
+                workers, metrics=self.metrics,
+                enricher_options={
+                    'sirene_url': self.enricher.sirene_url,
+                    'mx_verify': mx_verifier is not None,
+                    'dns_nameservers': mx_verifier.nameservers if mx_verifier else None,
+                    'dns_port': mx_verifier.port if mx_verifier else 53,
+                    'smtp_verify': smtp_verifier is not None,
+                    'smtp_port': smtp_verifier.port if smtp_verifier else SMTP_PORT,
+                    'smtp_connect_host': smtp_verifier.connect_host if smtp_verifier else None,
+                    'smtp_interval': smtp_verifier.min_interval if smtp_verifier else SMTP_MX_INTERVAL,
+                    'pattern_store': self.enricher.pattern_stats.path if self.enricher.pattern_stats else None,
+                },
+                session_options={'proxies': self.enricher.session.proxies,
+                                 'trust_env': self.enricher.session.trust_env}
+            )
+        elif mx_verifier and total:
+            # Vérification MX groupée: les domaines du lot sont résolus en
+            # parallèle, l'enrichissement les lit ensuite depuis le cache
+            domains = {website_domain(r.get('website', '')) for r in raw_results} - {''}
+            with events.stage('mx_lookup', total=len(domains)) as mx_stage:
+                mx_verifier.prefetch(domains, stage=mx_stage)
+
+        # Connexions SMTP du lot fermées en fin d'enrichissement, même sur erreur
+        with events.stage('enrichment', total=total) as stage, sharding as pool, \
+                closing(self.enricher):
+            for idx, result in enumerate(raw_results, 1):
+                company_name = result.get('title', '')
+                logger.debug("[%d/%s] %s", idx, total or '?', company_name)
+
+                # Données de base
+                base_data = apify_places.lead_base_data(result)
+                key = place_key(result)
+
+                # Entreprise déjà enrichie avant l'interruption du run repris
+                resumed = checkpoint.enriched_leads().get(key) if checkpoint and key else None
+                if resumed:
+                    enriched_contacts.append(resumed)
+                    resumed_count += 1
+                    stage.advance(name=company_name, score=resumed.get('score_total', 0),
+                                  email_found=bool(resumed.get('contact_email')),
+                                  reused=True)
+                    continue
+
+                # Réutiliser l'enrichissement stocké si le lieu n'a pas changé
+                if stored_leads is not None:
+                    stored = stored_leads.get(key)
+                elif incremental and self.lead_store:
+                    stored = self.lead_store.get_leads([key], pipeline='pro').get(key)
+                else:
+                    stored = None
+                reused = bool(stored
+                              and content_hash(stored) == content_hash(result)
+                              and is_fresh(stored, ttl_days))
+                if incremental:
+                    self.metrics.incr('cache_lookups', cache='enrichment',
+                                      result='hit' if reused else 'miss')
+                if reused:
+                    full_data = {**stored, **base_data}
+                    reused_count += 1
+                    logger.debug("♻️  Enrichissement réutilisé (inchangé depuis le dernier run)")
+                elif pool:
+                    # Enrichissement dans le processus du domaine, résultats repris au fil de l'eau
+                    pool.submit((base_data, key), company_name, base_data['website'],
+                                base_data['address'])
+                    for (done_data, done_key), enriched in pool.completed():
+                        enriched_contacts.append(self._score_contact(
+                            {**done_data, **enriched}, done_key, stage, checkpoint
+                        ))
+                    continue
+                else:
+                    # Flux: MX du domaine résolus en arrière-plan pendant le scraping du site
+                    if mx_verifier and total is None:
+                        mx_verifier.prefetch_async([website_domain(base_data['website'])])
 
-        print(f"\n🔄 Phase d'enrichissement intelligent ({len(raw_results)} entreprises)")
-        print("="*60)
+                    # Enrichissement
+                    with self.metrics.timer('enrich_company'):
+                        enriched = self.enricher.enrich_contact(
+                            company_name,
+                            base_data['website'],
+                            base_data['address']
+                        )
+
+                    # Fusionner les données
+                    full_data = {**base_data, **enriched}
+
+                enriched_contacts.append(self._score_contact(full_data, key, stage, checkpoint,
+                                                             reused=reused))
+
+            if pool:
+                for (done_data, done_key), enriched in pool.drain():
+                    enriched_contacts.append(self._score_contact(
+                        {**done_data, **enriched}, done_key, stage, checkpoint
+                    ))
+
+        logger.info("✅ Enrichissement terminé")
+        if resumed_count:
+            logger.info("⏯️  Repris du point de reprise: %d", resumed_count)
+        if incremental:
+            logger.info("♻️  Réutilisés: %d | 🔍 Enrichis: %d",
+                        reused_count, len(enriched_contacts) - reused_count - resumed_count)
 
-        for idx, result in enumerate(raw_results, 1):
-            company_name = result.get('title', '')
-            print(f"\n[{idx}/{len(raw_results)}] {company_name}")
-
-            # Données de base
-            base_data = {
-                'name': company_name,
-                'address': result.get('address', ''),
-                'phone': result.get('phone', ''),
-                'website': result.get('website', ''),
-                'rating': result.get('totalScore', ''),
-                'reviews_count': result.get('reviewsCount', ''),
-                'category': result.get('categoryName', ''),
-                'url': result.get('url', ''),
-            }
-
-            # Enrichissement
-            enriched = self.enricher.enrich_contact(
-                company_name,
-                base_data['website'],
-                base_data['address']
-            )
+        return enriched_contacts
 
-            # Fusionner les données
-            full_data = {**base_data, **enriched}
+    def _score_contact(self, full_data: Dict, key: str, stage, checkpoint: RunCheckpoint = None,
+                       reused: bool = False) -> Dict:
+        """
+        Score une entreprise enrichie, l'enregistre au point de reprise et avance l'étape
 
-            # Scoring
+        Args:
+            full_data: Données de base et d'enrichissement fusionnées
+            key: Clé du lieu (place_key)
+            stage: Stage 'enrichment' en cours
+            checkpoint: Point de reprise (optionnel)
+            reused: Enrichissement réutilisé depuis la base locale
+
+        Returns:
+            full_data complété du scoring
+        """
+        with self.metrics.timer('score_contact'):
             scoring = self.scorer.score_contact(full_data)
-            full_data.update(scoring)
+        full_data.update(scoring)
+
+        if checkpoint:
+            checkpoint.record_enriched(key, full_data)
+
+        # Afficher le résultat
+        logger.debug(
+            "%s Score: %s/100 - %s | 📧 %s (%s) | 👤 %s - %s",
+            scoring['emoji'], scoring['score_total'], scoring['category'],
+            full_data.get('contact_email') or 'N/A', full_data.get('email_confidence', 'none'),
+            full_data.get('contact_name') or 'N/A', full_data.get('contact_position') or 'N/A',
+            extra={'company': full_data['name'], 'score': scoring['score_total']}
+        )
+
+        stage.advance(name=full_data['name'], score=scoring['score_total'],
+                      email_found=bool(full_data.get('contact_email')),
+                      reused=reused)
+        return full_data
+
+    def save_to_store(self, contacts: List[Dict], search_query: str = None,
+                      events: PipelineEvents = None):
+        """
+        Enregistre les contacts dans la base SQLite locale (upsert par place ID)
 
-            # Ajouter à la liste
-            enriched_contacts.append(full_data)
+        Args:
+            contacts: Liste de contacts enrichis et scorés
+            search_query: Recherche d'origine
+            events: PipelineEvents recevant l'étape 'store' (optionnel)
+        """
+        if not self.lead_store:
+            return
 
-            # Afficher le résultat
-            print(f"  {scoring['emoji']} Score: {scoring['score_total']}/100 - {scoring['category']}")
-            print(f"  📧 Email: {full_data.get('contact_email', 'N/A')} ({full_data.get('email_confidence', 'none')})")
-            print(f"  👤 Contact: {full_data.get('contact_name', 'N/A')} - {full_data.get('contact_position', 'N/A')}")
+        events = events or PipelineEvents()
 
-        print("\n" + "="*60)
-        print("✅ Enrichissement terminé")
+        try:
+            with events.stage('store', total=len(contacts)) as stage:
+                count = self.lead_store.upsert_leads(contacts, search_query, pipeline='pro')
+                stage.advance(count)
+            print(f"💾 {count} leads enregistrés dans {self.lead_store.path}")
 
-        return enriched_contacts
+        except Exception as e:
+            print(f"❌ Erreur lors de l'enregistrement local: {e}")
 
     def filter_qualified(self, contacts: List[Dict]) -> List[Dict]:
         """
@@ -256,12 +518,20 @@ class GoogleMapsScraperPro:
 
         return qualified
 
-    def save_to_google_sheets(self, contacts: List[Dict]):
+    def save_to_google_sheets(self, contacts: List[Dict], update_existing: bool = False,
+                              events: PipelineEvents = None):
         """
         Sauvegarde les contacts dans Google Sheets
 
+        Les contacts déjà présents (même URL Google Maps) ne sont pas ajoutés
+        une seconde fois. En mise à jour, la date d'ajout et le statut saisis
+        dans la feuille sont conservés.
+
         Args:
             contacts: Liste de contacts enrichis et scorés
+            update_existing: Mettre à jour les lignes existantes au lieu de les ignorer
+            events: PipelineEvents recevant l'étape 'google_sheets', un
+                événement par lot écrit (optionnel)
         """
         if not self.google_sheet:
             print("⚠️  Google Sheets non configuré, saut de cette étape")
@@ -272,6 +542,7 @@ class GoogleMapsScraperPro:
 
             print(f"\n📝 Ajout de {len(contacts)} contacts dans Google Sheets...")
 
+            rows = []
             for contact in contacts:
                 # Préparer les sources de données
                 sources = ', '.join(contact.get('data_sources', []))
@@ -316,11 +587,26 @@ class GoogleMapsScraperPro:
                     'À contacter',
                     contact.get('url', '')
                 ]
-
-                worksheet.append_row(row)
-                time.sleep(0.5)  # Rate limiting
-
-            print("✅ Données ajoutées à Google Sheets")
+                rows.append(row)
+
+            events = events or PipelineEvents()
+
+            # Une lecture de la colonne URL, puis écritures par lots
+            with events.stage('google_sheets', total=len(rows)) as stage, \
+                    self.metrics.timer('google_sheets.write'):
+                counts = write_unique_rows(
+                    worksheet,
+                    rows,
+                    key_column=self.SHEET_HEADERS.index('URL Google Maps') + 1,
+                    update_columns=self.SHEET_HEADERS.index('Date Ajout'),
+                    update_existing=update_existing,
+                    progress_callback=lambda operation, n: stage.advance(n, operation=operation),
+                    on_retry=lambda: self.metrics.incr('sink_retries', sink='google_sheets')
+                )
+
+            print(f"✅ Données ajoutées à Google Sheets "
+                  f"({counts['appended']} ajoutées, {counts['updated']} mises à jour, "
+                  f"{counts['skipped']} déjà présentes)")
 
         except Exception as e:
             print(f"❌ Erreur lors de l'ajout à Google Sheets: {e}")
@@ -379,35 +665,127 @@ class GoogleMapsScraperPro:
         except Exception as e:
             print(f"❌ Erreur export CSV: {e}")
 
-    def run(self, search_query: str, max_results: int = 200, min_score: int = None):
+    def export_to_columnar(self, contacts: List[Dict], filename: str = None,
+                           fmt: str = 'parquet'):
+        """
+        Exporte les contacts en Parquet ou Feather (schéma complet)
+
+        Contrairement au CSV, toutes les colonnes d'enrichissement et de scoring
+        sont conservées (voir lead_export.LEAD_SCHEMA).
+
+        Args:
+            contacts: Liste de contacts
+            filename: Nom du fichier (auto-généré si None)
+            fmt: 'parquet' ou 'feather'
+        """
+        if not contacts:
+            print("⚠️  Aucun contact à exporter")
+            return
+
+        if not filename:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            extension = 'feather' if fmt == 'feather' else 'parquet'
+            filename = f"leads_{timestamp}.{extension}"
+
+        try:
+            count = lead_export.write_leads(contacts, filename, fmt)
+            print(f"✅ Export {fmt.capitalize()} réussi: {filename} ({count} leads)")
+
+        except Exception as e:
+            print(f"❌ Erreur export {fmt.capitalize()}: {e}")
+
+    def run(self, search_query: Union[str, List[str]], max_results: int = 200, min_score: int = None,
+            columnar_format: str = None, incremental: bool = False,
+            events: PipelineEvents = None, profile: bool = False, area=None,
+            stream: bool = False, checkpoint: RunCheckpoint = None,
+            workers: int = ENRICH_WORKERS):
         """
         Exécute le pipeline complet de prospection
 
         Args:
-            search_query: Recherche à effectuer
-            max_results: Nombre de résultats à scraper (défaut: 200)
+            search_query: Recherche à effectuer, ou liste de recherches traitées
+                en un seul passage (scraping groupé, lieux dédoublonnés)
+            max_results: Nombre de résultats à scraper par recherche (défaut: 200)
             min_score: Score minimum pour filtrer (défaut: self.min_score)
+            columnar_format: 'parquet' ou 'feather' pour exporter tous les leads
+                enrichis au format colonnaire (désactivé si None)
+            incremental: Ne ré-enrichir que les lieux nouveaux ou modifiés
+            events: PipelineEvents recevant la progression de chaque étape (optionnel)
+            profile: Profiler chaque étape (cProfile + tracemalloc) dans PROFILE_DIR
+            area: Découper la recherche en tuiles sur cette zone (ex: "paris",
+                voir geo_tiling), max_results s'appliquant à chaque tuile
+            stream: Enrichir chaque entreprise dès qu'un run Apify la produit,
+                sans attendre la fin du scraping
+            checkpoint: Point de reprise (runs Apify lancés, entreprises
+                enrichies), supprimé en fin de run réussi; un point de reprise
+                chargé par RunCheckpoint.load() reprend le run interrompu
+            workers: Processus d'enrichissement, entreprises réparties par
+                domaine (1: enrichissement dans ce processus)
         """
         if min_score is not None:
             self.min_score = min_score
 
+        # Métriques propres à ce run (durée de chaque étape incluse)
+        self.metrics.reset()
+        events = events or PipelineEvents()
+        events.subscribe(self.metrics.pipeline_subscriber)
+
+        profiler = None
+        if profile:
+            profiler = RunProfiler.for_run('scraper_pro')
+            events.subscribe(profiler.pipeline_subscriber)
+
         print("\n" + "="*60)
         print("🎯 SCRAPER PRO - PROSPECTION B2B")
         print("="*60 + "\n")
 
-        # Phase 1: Extraction large
-        print("📍 PHASE 1: Extraction large")
-        print("-"*60)
-        raw_results = self.scrape_google_maps(search_query, max_results)
+        # Erreur d'un run en flux interrompu après des leads enrichis
+        error = None
+
+        if stream:
+            # Phases 1 et 2 en flux: les entreprises sont enrichies pendant le crawl
+            print("📍 PHASES 1-2: Extraction et enrichissement en flux")
+            print("-"*60)
+            enriched = []
+            try:
+                places = self.iter_google_maps(search_query, max_results, events=events,
+                                               area=area, checkpoint=checkpoint)
+                self.enrich_and_score(places, incremental=incremental, events=events,
+                                      checkpoint=checkpoint, workers=workers, results=enriched)
+            except Exception as e:
+                # Sans lead enrichi, l'erreur est celle du run; sinon les leads sont exportés
+                if not enriched:
+                    raise
+                logger.error("❌ Scraping en flux interrompu après %d leads enrichis: %s",
+                             len(enriched), e, exc_info=True)
+                print(f"⚠️  Run interrompu ({e}): les {len(enriched)} leads enrichis sont conservés")
+                error = e
+            raw_results = enriched
+        else:
+            # Phase 1: Extraction large
+            print("📍 PHASE 1: Extraction large")
+            print("-"*60)
+            raw_results = self.scrape_google_maps(search_query, max_results, events=events,
+                                                  area=area, checkpoint=checkpoint)
 
         if not raw_results:
             print("❌ Aucun résultat trouvé. Arrêt du processus.")
+            # Rien à reprendre: le point de reprise ne doit pas masquer un run interrompu
+            if checkpoint:
+                checkpoint.clear()
+            if profiler:
+                profiler.finish()
             return
 
-        # Phase 2: Enrichissement intelligent
-        print("\n📍 PHASE 2: Enrichissement intelligent")
-        print("-"*60)
-        enriched = self.enrich_and_score(raw_results)
+        if not stream:
+            # Phase 2: Enrichissement intelligent
+            print("\n📍 PHASE 2: Enrichissement intelligent")
+            print("-"*60)
+            enriched = self.enrich_and_score(raw_results, incremental=incremental, events=events,
+                                             checkpoint=checkpoint, workers=workers)
+        # En multi-recherches, chaque lead garde sa propre recherche d'origine
+        self.save_to_store(enriched, search_query if isinstance(search_query, str) else None,
+                           events=events)
 
         # Phase 3: Scoring et qualification
         print("\n📍 PHASE 3: Scoring et qualification")
@@ -436,51 +814,154 @@ class GoogleMapsScraperPro:
             print("="*60)
 
             # Export Google Sheets
-            self.save_to_google_sheets(qualified)
+            self.save_to_google_sheets(qualified, events=events)
 
             # Export CSV
             self.export_to_csv(qualified)
 
+        # Export colonnaire de tous les leads enrichis (analytics)
+        if columnar_format:
+            self.export_to_columnar(enriched, fmt=columnar_format)
+
         print("\n" + "="*60)
-        print("✅ PROCESSUS TERMINÉ AVEC SUCCÈS")
+        if error:
+            print(f"⚠️  PROCESSUS INTERROMPU: {error}")
+        else:
+            print("✅ PROCESSUS TERMINÉ AVEC SUCCÈS")
         print("="*60 + "\n")
 
+        # Run terminé: plus rien à reprendre (un run interrompu reste reprenable)
+        if checkpoint and not error:
+            checkpoint.clear()
+        elif checkpoint and checkpoint.exists:
+            print(f"   Reprise possible: python scraper_pro.py --resume {checkpoint.id}")
+
+        report_file = self.report_metrics()
+        profile_dir = profiler.finish() if profiler else None
+
         return {
             'raw_count': len(raw_results),
             'enriched_count': len(enriched),
             'qualified_count': len(qualified),
             'stats': stats,
-            'qualified_contacts': qualified
+            'qualified_contacts': qualified,
+            'metrics': self.metrics.report(),
+            'report_file': report_file,
+            'profile_dir': profile_dir,
+            'tiles': self.tile_report,
+            'error': str(error) if error else None
         }
 
+    def report_metrics(self):
+        """
+        Affiche le tableau des métriques du run et écrit le rapport JSON
+
+        Returns:
+            Chemin du rapport JSON (None si l'écriture a échoué)
+        """
+        print("⏱️  Métriques du run:")
+        print(self.metrics.format_table())
+
+        try:
+            filename = self.metrics.save_report(prefix='scraper_pro')
+            print(f"📄 Rapport enregistré: {filename}")
+            return filename
+        except OSError as e:
+            print(f"⚠️  Impossible d'écrire le rapport: {e}")
+            return None
+
 
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Google Maps Scraper PRO - Prospection B2B")
+    parser.add_argument('--resume', nargs='?', const='last', metavar='CHECKPOINT',
+                        help="Reprendre un run interrompu (le plus récent par défaut)")
+    parser.add_argument('--source', metavar='SOURCE',
+                        help="Source de lieux locale au lieu d'Apify: synthetic:<N> ou replay:<fichier>")
+    parser.add_argument('--workers', type=int, default=ENRICH_WORKERS,
+                        help="Processus d'enrichissement (entreprises réparties par domaine)")
+    args = parser.parse_args()
+
     print("\n🚀 Google Maps Scraper PRO - Prospection B2B\n")
 
-    # Demander les paramètres
-    search_query = input("🔍 Entrez votre recherche (ex: 'fabricants vérandas Lyon'): ").strip()
+    if args.resume:
+        checkpoint = RunCheckpoint.load(None if args.resume == 'last' else args.resume)
+        if not checkpoint:
+            print("❌ Aucun run interrompu à reprendre.")
+            return
+
+        params = checkpoint.params
+        print(f"⏯️  Reprise du run {checkpoint.id}: {len(checkpoint.state['runs'])} runs Apify, "
+              f"{checkpoint.enriched_count} entreprises déjà enrichies")
+    else:
+        # Demander les paramètres
+        print("💡 Plusieurs recherches: séparez-les par « ; » ou indiquez @fichier.txt (une par ligne)")
+        try:
+            queries = apify_places.parse_queries(
+                input("🔍 Entrez votre recherche (ex: 'fabricants vérandas Lyon'): ")
+            )
+        except OSError as e:
+            print(f"❌ Fichier de recherches illisible: {e}")
+            return
+
+        if not queries:
+            print("❌ Recherche vide. Arrêt du programme.")
+            return
+
+        max_results_input = input("📊 Nombre d'entreprises à scraper par recherche [200]: ").strip()
+        min_score_input = input("⭐ Score minimum pour qualifier un contact [50]: ").strip()
 
-    if not search_query:
-        print("❌ Recherche vide. Arrêt du programme.")
-        return
+        params = {
+            'search_query': queries[0] if len(queries) == 1 else queries,
+            'max_results': int(max_results_input) if max_results_input else 200,
+            'min_score': int(min_score_input) if min_score_input else 50,
+        }
+        if args.source:
+            params['source'] = args.source
+        checkpoint = RunCheckpoint.create(params)
 
-    max_results_input = input("📊 Nombre d'entreprises à scraper [200]: ").strip()
-    max_results = int(max_results_input) if max_results_input else 200
+    source = None
+    if params.get('source'):
+        try:
+            source = places_source.open_source(params['source'])
+        except (ValueError, OSError) as e:
+            print(f"❌ {e}")
+            return
+        # Les runs d'une source locale ne survivent pas au processus: ils sont relancés
+        checkpoint.state['runs'] = {}
+        print(f"🧪 Source de lieux locale: {params['source']}")
 
-    min_score_input = input("⭐ Score minimum pour qualifier un contact [50]: ").strip()
-    min_score = int(min_score_input) if min_score_input else 50
+    # Lieux synthétiques: sites, SIRENE et DNS servis par les fixtures
+    # locales, Google Sheets simulé; rien ne sort de la machine
+    fixture = None
+    if isinstance(source, places_source.SyntheticSource):
+        fixture = fixtures.FixtureServer(source.corpus).start()
+        print(f"🧪 Fixtures locales (sites, SIRENE, DNS): http://127.0.0.1:{fixture.server_port}")
 
     try:
         # Créer et exécuter le scraper pro
-        scraper = GoogleMapsScraperPro(min_score=min_score)
-        scraper.run(search_query, max_results, min_score)
+        if fixture:
+            # Leads et patterns synthétiques gardés hors des bases locales
+            scraper = GoogleMapsScraperPro(min_score=params['min_score'], places_source=source,
+                                           store_path=None, google_sheet=fixtures.FakeSpreadsheet({}))
+            fixtures.prepare_scraper(scraper, fixture, sheet_latency=0.0, pattern_store=None)
+        else:
+            scraper = GoogleMapsScraperPro(min_score=params['min_score'], places_source=source)
+        scraper.run(params['search_query'], params['max_results'], params['min_score'],
+                    incremental=params.get('incremental', False), area=params.get('area'),
+                    checkpoint=checkpoint, workers=args.workers)
 
     except Exception as e:
         print(f"\n❌ Erreur fatale: {e}")
+        if checkpoint.exists:
+            print(f"   Reprise possible: python scraper_pro.py --resume {checkpoint.id}")
         import traceback
         traceback.print_exc()
 
+    finally:
+        if fixture:
+            fixture.stop()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Service de scrapers pour les interfaces
+Garde les clients "chauds" (client Apify, Google Sheet autorisé) et construit
+un scraper neuf par job autour d'eux, au lieu de refaire l'autorisation
+Google à chaque job
+"""
+
+import threading
+import time
+
+from config import SCRAPER_SERVICE_MAX_AGE
+from scraper import GoogleMapsScraper
+from scraper_pro import GoogleMapsScraperPro
+
+
+class ScraperService:
+    """
+    Fournit un scraper neuf par job, avec des clients partagés entre jobs
+
+    Seuls le client Apify et le Google Sheet ouvert (lecture de
+    credentials.json, autorisation gspread) sont partagés: métriques,
+    sessions HTTP, rapport de tuiles et base des leads sont propres à
+    chaque scraper, donc à chaque job, et les jobs peuvent tourner en
+    parallèle. Les clients sont construits au premier appel, sous verrou,
+    et reconstruits après max_age secondes ou à la demande avec refresh().
+    Un Google Sheet configuré mais pas ouvert (autorisation en échec) n'est
+    pas gardé: le job suivant retente la connexion.
+    """
+
+    def __init__(self, max_age: float = SCRAPER_SERVICE_MAX_AGE):
+        """
+        Args:
+            max_age: Durée de vie d'une instance en secondes (None = illimitée)
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    def _get(self, kind: str, factory):
+        """Construit un scraper de ce type autour des clients partagés"""
+        with self._lock:
+            entry = self._clients.get(kind)
+            if entry and (self.max_age is None or time.time() - entry[1] < self.max_age):
+                clients = entry[0]
+            else:
+                # Premier scraper: il ouvre les clients, gardés pour les suivants
+                scraper = factory()
+                if scraper.google_sheet_id and scraper.google_sheet is None:
+                    self._clients.pop(kind, None)
+                else:
+                    self._clients[kind] = ({'apify_client': scraper.apify_client,
+                                            'google_sheet': scraper.google_sheet}, time.time())
+                return scraper
+
+        return factory(**clients)
+
+    def get_scraper(self):
+        """
+        Scraper standard neuf, avec les clients partagés
+
+        Returns:
+            GoogleMapsScraper initialisé
+        """
+        return self._get('standard', GoogleMapsScraper)
+
+    def get_pro_scraper(self):
+        """
+        Scraper Pro neuf, avec les clients partagés
+
+        Returns:
+            GoogleMapsScraperPro initialisé
+        """
+        return self._get('pro', GoogleMapsScraperPro)
+
+    def refresh(self, kind: str = None):
+        """
+        Oublie les clients pour qu'ils soient reconstruits au prochain appel
+
+        Utile après une modification du .env ou de credentials.json.
+
+        Args:
+            kind: 'standard' ou 'pro' (toutes si None)
+        """
+        with self._lock:
+            if kind:
+                self._clients.pop(kind, None)
+            else:
+                self._clients.clear()
+
+    def warm_up(self, kind: str = 'standard'):
+        """
+        Ouvre les clients en arrière-plan (au démarrage d'une interface)
+
+        Args:
+            kind: 'standard' ou 'pro'
+        """
+        getter = self.get_pro_scraper if kind == 'pro' else self.get_scraper
+
+        def build():
+            try:
+                getter()
+            except Exception as e:
+                print(f"⚠️  Initialisation du scraper impossible: {e}")
+
+        thread = threading.Thread(target=build)
+        thread.daemon = True
+        thread.start()
+
+
+# Service partagé par toutes les interfaces d'un même processus
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_service() -> ScraperService:
+    """Retourne le service partagé du processus (créé au premier appel)"""
+    global _default_service
+
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = ScraperService()
+        return _default_service
@@ -4,123 +4,206 @@ Serveur web simple pour l'interface Google Maps Scraper
 Utilise http.server (intégré à Python) avec une API REST
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import gzip
+import hashlib
 import json
-import threading
 import os
 from urllib.parse import parse_qs, urlparse
-from scraper import GoogleMapsScraper
+from instrumentation import PROCESS_METRICS
+from log_setup import log_context
+from pipeline_events import PipelineEvents
+from scraper_service import get_service
+from config import SERVER_MAX_WORKERS
+from job_manager import Job, JobManager
+
+
+# Plage de progression (en %) couverte par chaque étape du pipeline
+STAGE_PROGRESS = {
+    'scrape': (10, 30),
+    'enrichment': (30, 60),
+    'store': (60, 65),
+    'google_sheets': (65, 80),
+    'gohighlevel': (80, 100),
+}
+
+STAGE_LABELS = {
+    'scrape': "📥 Scraping Google Maps",
+    'enrichment': "🔄 Recherche des emails",
+    'store': "💾 Enregistrement local",
+    'google_sheets': "📝 Sauvegarde dans Google Sheets",
+    'gohighlevel': "📤 Envoi vers GoHighLevel",
+}
+
+
+def job_event_forwarder(job):
+    """
+    Abonné PipelineEvents qui répercute la progression réelle sur un job
+
+    Chaque événement du pipeline est republié dans le flux SSE du job; les
+    événements 'item' font avancer la barre de progression (avec débit et
+    ETA) et vérifient l'annulation.
+
+    Args:
+        job: Job à mettre à jour
+
+    Returns:
+        Callback (event_type, data) à passer à PipelineEvents.subscribe()
+    """
+    def forward(event_type, data):
+        job.emit(event_type, **data)
+
+        stage = data.get('stage')
+        low, high = STAGE_PROGRESS.get(stage, (job.progress, job.progress))
+        label = STAGE_LABELS.get(stage, stage)
 
-# État global du scraping
-scraping_state = {
+        if event_type == 'stage_start':
+            job.update(progress=low, message=f"{label}...")
+
+        elif event_type == 'item':
+            index, total = data['index'], data.get('total')
+            fields = {}
+            message = f"{label} ({index}/{total})" if total else f"{label} ({index})"
+            if data.get('rate'):
+                message += f" - {data['rate']:.1f}/s"
+            if data.get('eta') is not None:
+                message += f", reste ~{int(data['eta'])}s"
+            if total:
+                fields['progress'] = low + int((high - low) * min(index / total, 1))
+            if stage == 'enrichment':
+                fields['current'] = index
+            job.update(message=message, **fields)
+            job.check_cancelled()
+
+        elif event_type == 'stage_end' and not data.get('error'):
+            job.update(progress=high)
+
+    return forward
+
+
+def run_scraper_job(job):
+    """
+    Exécute un job de scraping
+
+    La progression vient des événements du pipeline (PipelineEvents):
+    l'annulation est vérifiée après chaque élément traité et entre les
+    étapes.
+
+    Args:
+        job: Job dont les params contiennent search_query et max_results
+    """
+    search_query = job.params['search_query']
+    max_results = job.params['max_results']
+
+    job.update(message=f"Recherche de {max_results} entreprises: {search_query}")
+
+    scraper = get_service().get_scraper()
+    events = PipelineEvents()
+    events.subscribe(job_event_forwarder(job))
+    events.subscribe(PROCESS_METRICS.pipeline_subscriber)
+    job.check_cancelled()
+
+    # Scraping Google Maps
+    results = scraper.scrape_google_maps(search_query, max_results, events=events)
+    job.check_cancelled()
+
+    if not results:
+        raise ValueError("Aucun résultat trouvé")
+
+    job.update(message=f"✅ {len(results)} entreprises trouvées", total=len(results))
+
+    # Traitement
+    processed_data = scraper.process_results(results, events=events)
+    scraper.save_to_store(processed_data, search_query, events=events)
+    job.results = processed_data
+    job.check_cancelled()
+
+    # Sauvegarde Google Sheets
+    scraper.save_to_google_sheets(processed_data, events=events)
+    job.check_cancelled()
+
+    # GoHighLevel
+    scraper.send_to_gohighlevel(processed_data, events=events)
+
+    job.emit('timings', stages=events.summary())
+    job.update(message="✅ Scraping terminé avec succès!", progress=100)
+
+
+def run_timed_scraper_job(job):
+    """
+    Exécute un job en mesurant sa durée (histogramme 'job' de /metrics)
+
+    Les logs émis pendant le job portent son job_id et sa recherche.
+    """
+    with log_context(job_id=job.id, search_query=job.params.get('search_query')), \
+            PROCESS_METRICS.timer('job'):
+        run_scraper_job(job)
+
+
+# Jobs de scraping partagés par tous les clients
+job_manager = JobManager(run_timed_scraper_job, max_workers=SERVER_MAX_WORKERS)
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def render_metrics():
+    """
+    Métriques du serveur au format texte Prometheus
+
+    Jobs (soumis, terminés par statut, en attente, en cours) suivis des
+    métriques cumulées du pipeline: latences par opération (dont
+    enrich_company et http.sirene), réponses HTTP par classe de statut,
+    caches, lots et nouvelles tentatives des sinks.
+
+    Returns:
+        Texte de l'exposition
+    """
+    stats = job_manager.stats()
+    lines = [
+        "# HELP scraper_jobs_submitted_total Jobs soumis",
+        "# TYPE scraper_jobs_submitted_total counter",
+        f"scraper_jobs_submitted_total {stats['submitted']}",
+        "# HELP scraper_jobs_finished_total Jobs terminés par statut",
+        "# TYPE scraper_jobs_finished_total counter",
+    ]
+    for status, count in stats['finished'].items():
+        lines.append(f'scraper_jobs_finished_total{{status="{status}"}} {count}')
+    lines += [
+        "# HELP scraper_jobs Jobs en attente ou en cours",
+        "# TYPE scraper_jobs gauge",
+        f'scraper_jobs{{status="queued"}} {stats["queued"]}',
+        f'scraper_jobs{{status="running"}} {stats["running"]}',
+        "# HELP scraper_job_workers Nombre de workers du pool de jobs",
+        "# TYPE scraper_job_workers gauge",
+        f"scraper_job_workers {stats['max_workers']}",
+    ]
+    return '\n'.join(lines) + '\n' + PROCESS_METRICS.to_prometheus()
+
+# Réponse de /api/status quand aucun job n'a encore été soumis
+IDLE_STATUS = {
+    "status": "idle",
     "running": False,
     "progress": 0,
     "message": "En attente",
     "total": 0,
     "current": 0,
-    "results": []
+    "results_count": 0
 }
 
-class ScraperHandler(BaseHTTPRequestHandler):
-    """Gestionnaire des requêtes HTTP"""
-    
-    def do_GET(self):
-        """Traite les requêtes GET"""
-        parsed_path = urlparse(self.path)
-        
-        if parsed_path.path == '/':
-            # Servir la page HTML
-            self.serve_html()
-        elif parsed_path.path == '/api/status':
-            # Retourner le statut du scraping
-            self.send_json_response(scraping_state)
-        else:
-            self.send_error(404)
-    
-    def do_POST(self):
-        """Traite les requêtes POST"""
-        parsed_path = urlparse(self.path)
-        
-        if parsed_path.path == '/api/start':
-            # Démarrer le scraping
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
-            
-            if scraping_state["running"]:
-                self.send_json_response({"success": False, "error": "Scraping déjà en cours"})
-                return
-            
-            # Démarrer le scraping dans un thread
-            search_query = data.get('search_query', '')
-            max_results = data.get('max_results', 50)
-            
-            if not search_query:
-                self.send_json_response({"success": False, "error": "Recherche vide"})
-                return
-            
-            thread = threading.Thread(target=self.run_scraper, args=(search_query, max_results))
-            thread.daemon = True
-            thread.start()
-            
-            self.send_json_response({"success": True})
-        else:
-            self.send_error(404)
-    
-    def run_scraper(self, search_query, max_results):
-        """Exécute le scraping"""
-        global scraping_state
-        
-        try:
-            scraping_state["running"] = True
-            scraping_state["progress"] = 0
-            scraping_state["message"] = f"Recherche de {max_results} entreprises: {search_query}"
-            scraping_state["total"] = max_results
-            scraping_state["current"] = 0
-            scraping_state["results"] = []
-            
-            scraper = GoogleMapsScraper()
-            
-            # Scraping Google Maps
-            scraping_state["message"] = "📥 Scraping Google Maps..."
-            scraping_state["progress"] = 10
-            results = scraper.scrape_google_maps(search_query, max_results)
-            
-            if not results:
-                scraping_state["message"] = "❌ Aucun résultat trouvé"
-                scraping_state["running"] = False
-                return
-            
-            scraping_state["message"] = f"✅ {len(results)} entreprises trouvées"
-            scraping_state["progress"] = 30
-            
-            # Traitement
-            scraping_state["message"] = "🔄 Recherche des emails..."
-            processed_data = scraper.process_results(results)
-            scraping_state["progress"] = 60
-            
-            # Sauvegarde Google Sheets
-            scraping_state["message"] = "📝 Sauvegarde dans Google Sheets..."
-            scraper.save_to_google_sheets(processed_data)
-            scraping_state["progress"] = 80
-            
-            # GoHighLevel
-            scraping_state["message"] = "📤 Envoi vers GoHighLevel..."
-            scraper.send_to_gohighlevel(processed_data)
-            scraping_state["progress"] = 100
-            
-            scraping_state["message"] = "✅ Scraping terminé avec succès!"
-            scraping_state["results"] = processed_data
-            
-        except Exception as e:
-            scraping_state["message"] = f"❌ Erreur: {str(e)}"
-            scraping_state["progress"] = 0
-        finally:
-            scraping_state["running"] = False
-    
-    def serve_html(self):
-        """Sert la page HTML"""
-        html_content = """
+# Intervalle des commentaires keep-alive du flux SSE (en secondes)
+SSE_HEARTBEAT_SECONDS = 15
+
+# Taille de page par défaut / maximale de /api/results
+RESULTS_PAGE_SIZE = 50
+RESULTS_MAX_PAGE_SIZE = 500
+
+# Compression des réponses JSON (les petites réponses ne sont pas compressées)
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+
+# Page HTML de l'interface, construite et compressée une seule fois au démarrage
+INDEX_HTML = """
 <!DOCTYPE html>
 <html lang="fr">
 <head>
@@ -452,7 +535,8 @@ class ScraperHandler(BaseHTTPRequestHandler):
         const progressFill = document.getElementById('progressFill');
         const resultsDiv = document.getElementById('results');
 
-        let checkInterval;
+        let eventSource = null;
+        let currentJobId = null;
 
         form.addEventListener('submit', async (e) => {
             e.preventDefault();
@@ -480,8 +564,9 @@ class ScraperHandler(BaseHTTPRequestHandler):
                 const data = await response.json();
 
                 if (data.success) {
-                    // Commencer à vérifier le statut
-                    checkInterval = setInterval(checkStatus, 1000);
+                    // Suivre la progression du job en temps réel (SSE)
+                    currentJobId = data.job_id;
+                    followJob(currentJobId);
                 } else {
                     showError(data.error || 'Erreur inconnue');
                 }
@@ -490,40 +575,45 @@ class ScraperHandler(BaseHTTPRequestHandler):
             }
         });
 
-        async function checkStatus() {
-            try {
-                const response = await fetch('/api/status');
-                const data = await response.json();
+        function followJob(jobId) {
+            eventSource = new EventSource('/api/events?job_id=' + jobId);
 
+            const onProgress = (e) => {
+                const data = JSON.parse(e.data);
                 statusMessage.textContent = data.message;
                 progressFill.style.width = data.progress + '%';
+            };
+            eventSource.addEventListener('status', onProgress);
+            eventSource.addEventListener('progress', onProgress);
 
-                if (!data.running && data.progress === 100) {
+            eventSource.addEventListener('end', (e) => {
+                const data = JSON.parse(e.data);
+                eventSource.close();
+
+                if (data.status === 'done') {
                     // Succès
-                    clearInterval(checkInterval);
                     statusCard.className = 'status-card active success';
+                    statusMessage.textContent = data.message;
+                    progressFill.style.width = '100%';
                     submitBtn.disabled = false;
                     submitBtn.textContent = '🚀 Lancer le scraping';
 
-                    if (data.results && data.results.length > 0) {
+                    if (data.results_count > 0) {
                         resultsDiv.style.display = 'block';
                         resultsDiv.innerHTML = `
-                            <strong>✅ ${data.results.length} entreprises scrapées</strong><br>
+                            <strong>✅ ${data.results_count} entreprises scrapées</strong><br>
                             <small>Consultez votre Google Sheet pour voir les détails</small>
                         `;
                     }
-                } else if (!data.running && data.progress === 0 && data.message.includes('❌')) {
-                    // Erreur
-                    clearInterval(checkInterval);
+                } else {
+                    // Erreur ou annulation
                     showError(data.message);
                 }
-            } catch (error) {
-                console.error('Erreur de vérification du statut:', error);
-            }
+            });
         }
 
         function showError(message) {
-            clearInterval(checkInterval);
+            if (eventSource) eventSource.close();
             statusCard.className = 'status-card active error';
             statusMessage.textContent = message;
             submitBtn.disabled = false;
@@ -533,28 +623,283 @@ class ScraperHandler(BaseHTTPRequestHandler):
     </script>
 </body>
 </html>
+"""
+
+INDEX_HTML_BYTES = INDEX_HTML.encode('utf-8')
+INDEX_HTML_GZIP = gzip.compress(INDEX_HTML_BYTES, GZIP_LEVEL)
+INDEX_ETAG = '"' + hashlib.sha1(INDEX_HTML_BYTES).hexdigest()[:16] + '"'
+
+class ScraperHandler(BaseHTTPRequestHandler):
+    """Gestionnaire des requêtes HTTP"""
+    
+    # HTTP/1.1: connexions keep-alive (toutes les réponses ont un Content-Length)
+    protocol_version = 'HTTP/1.1'
+    
+    # Ferme les connexions keep-alive inactives
+    timeout = 60
+    
+    def do_GET(self):
+        """Traite les requêtes GET"""
+        parsed_path = urlparse(self.path)
+        query = parse_qs(parsed_path.query)
+        
+        if parsed_path.path == '/':
+            # Servir la page HTML
+            self.serve_html()
+        elif parsed_path.path == '/api/status':
+            # Retourner le statut d'un job (le plus récent par défaut)
+            self.send_job_status(query.get('job_id', [None])[0])
+        elif parsed_path.path == '/api/events':
+            # Flux SSE des événements de progression d'un job
+            self.stream_job_events(query.get('job_id', [None])[0])
+        elif parsed_path.path == '/api/results':
+            # Résultats d'un job, paginés
+            self.send_job_results(query)
+        elif parsed_path.path == '/api/jobs':
+            # Lister les jobs
+            self.send_json_response({
+                "jobs": [self.job_summary(job) for job in job_manager.list_jobs()]
+            })
+        elif parsed_path.path == '/metrics':
+            # Métriques au format Prometheus
+            self.send_metrics()
+        else:
+            self.send_error(404)
+    
+    def do_POST(self):
+        """Traite les requêtes POST"""
+        parsed_path = urlparse(self.path)
+        
+        if parsed_path.path == '/api/start':
+            # Mettre un job de scraping en file
+            data = self.read_json_body()
+            
+            search_query = data.get('search_query', '')
+            try:
+                max_results = int(data.get('max_results', 50))
+                priority = int(data.get('priority', 0))
+            except (ValueError, TypeError):
+                self.send_json_response({"success": False, "error": "max_results/priority invalides"})
+                return
+            
+            if not search_query:
+                self.send_json_response({"success": False, "error": "Recherche vide"})
+                return
+            
+            if max_results < 1:
+                self.send_json_response({"success": False, "error": "max_results doit être positif"})
+                return
+            
+            job = job_manager.submit(
+                {"search_query": search_query, "max_results": max_results},
+                priority=priority
+            )
+            
+            self.send_json_response({
+                "success": True,
+                "job_id": job.id,
+                "queue_position": job_manager.queue_position(job)
+            })
+        elif parsed_path.path == '/api/cancel':
+            # Annuler un job en attente ou en cours
+            data = self.read_json_body()
+            job_id = data.get('job_id', '')
+            
+            if job_manager.cancel(job_id):
+                self.send_json_response({"success": True})
+            else:
+                self.send_json_response({"success": False, "error": "Job introuvable ou déjà terminé"})
+        else:
+            self.send_error(404)
+    
+    def read_json_body(self):
+        """Lit et décode le corps JSON de la requête"""
+        content_length = int(self.headers['Content-Length'])
+        post_data = self.rfile.read(content_length)
+        return json.loads(post_data.decode('utf-8'))
+    
+    def job_summary(self, job):
+        """État d'un job sans ses résultats, avec sa position dans la file"""
+        summary = job.to_dict(include_results=False)
+        summary["queue_position"] = job_manager.queue_position(job)
+        return summary
+    
+    def send_job_status(self, job_id):
+        """Envoie le statut d'un job"""
+        job = job_manager.get(job_id) if job_id else job_manager.latest()
+        
+        if job_id and not job:
+            self.send_json_response({"success": False, "error": "Job introuvable"})
+            return
+        if not job:
+            self.send_json_response(IDLE_STATUS)
+            return
+        
+        status = job.to_dict(include_results=False)
+        status["queue_position"] = job_manager.queue_position(job)
+        if job.status == Job.QUEUED:
+            status["message"] = f"⏳ En file d'attente (position {status['queue_position']})"
+        self.send_json_response(status)
+    
+    def send_job_results(self, query):
+        """Envoie une page des résultats d'un job (?job_id=&offset=&limit=)"""
+        job_id = query.get('job_id', [None])[0]
+        job = job_manager.get(job_id) if job_id else job_manager.latest()
+        
+        if not job:
+            self.send_json_response({"success": False, "error": "Job introuvable"})
+            return
+        
+        try:
+            offset = max(int(query.get('offset', [0])[0]), 0)
+            limit = int(query.get('limit', [RESULTS_PAGE_SIZE])[0])
+        except ValueError:
+            self.send_json_response({"success": False, "error": "offset/limit invalides"})
+            return
+        limit = min(max(limit, 1), RESULTS_MAX_PAGE_SIZE)
+        
+        results = job.results
+        self.send_json_response({
+            "job_id": job.id,
+            "total": len(results),
+            "offset": offset,
+            "limit": limit,
+            "results": results[offset:offset + limit]
+        })
+    
+    def stream_job_events(self, job_id):
+        """
+        Diffuse les événements d'un job en Server-Sent Events
+        
+        Le flux reprend après l'en-tête Last-Event-ID (reconnexion automatique
+        d'EventSource) et se termine après l'événement 'end' du job.
         """
+        job = job_manager.get(job_id) if job_id else None
+        if not job:
+            self.send_error(404)
+            return
         
+        try:
+            last_id = int(self.headers.get('Last-Event-ID') or 0)
+        except ValueError:
+            last_id = 0
+        
+        # Flux sans Content-Length: la connexion est fermée à la fin du flux
+        self.close_connection = True
         self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
         self.end_headers()
-        self.wfile.write(html_content.encode('utf-8'))
+        
+        try:
+            while True:
+                # Job terminé: ses événements sont tous publiés, inutile d'attendre
+                timeout = 0 if job.finished else SSE_HEARTBEAT_SECONDS
+                events = job.wait_events(last_id, timeout=timeout)
+                
+                if not events and job.finished:
+                    # Reconnexion après l'événement 'end': plus rien à diffuser
+                    break
+
+                if not events:
+                    # Commentaire SSE: garde la connexion ouverte
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                
+                for event in events:
+                    payload = json.dumps(event['data'], ensure_ascii=False)
+                    self.wfile.write(
+                        f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n".encode('utf-8')
+                    )
+                    last_id = event['id']
+                self.wfile.flush()
+                
+                if events[-1]['type'] == 'end':
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            # Client déconnecté
+            pass
     
-    def send_json_response(self, data):
-        """Envoie une réponse JSON"""
+    def serve_html(self):
+        """Sert la page HTML (ETag + gzip, 304 si le navigateur l'a déjà)"""
+        if self.headers.get('If-None-Match') == INDEX_ETAG:
+            self.send_response(304)
+            self.send_header('ETag', INDEX_ETAG)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        if self.accepts_gzip():
+            self.send_body(INDEX_HTML_GZIP, 'text/html; charset=utf-8',
+                           gzipped=True, etag=INDEX_ETAG)
+        else:
+            self.send_body(INDEX_HTML_BYTES, 'text/html; charset=utf-8', etag=INDEX_ETAG)
+    
+    def send_metrics(self):
+        """Envoie les métriques du processus au format texte Prometheus"""
+        body = render_metrics().encode('utf-8')
+        
+        if len(body) >= GZIP_MIN_SIZE and self.accepts_gzip():
+            self.send_body(gzip.compress(body, GZIP_LEVEL), PROMETHEUS_CONTENT_TYPE, gzipped=True)
+        else:
+            self.send_body(body, PROMETHEUS_CONTENT_TYPE)
+    
+    def accepts_gzip(self):
+        """Vérifie si le client accepte une réponse compressée en gzip"""
+        return 'gzip' in self.headers.get('Accept-Encoding', '')
+    
+    def send_body(self, body, content_type, gzipped=False, etag=None):
+        """
+        Envoie une réponse complète avec Content-Length (connexion keep-alive)
+        
+        Args:
+            body: Corps de la réponse (bytes)
+            content_type: En-tête Content-type
+            gzipped: Le corps est déjà compressé en gzip
+            etag: ETag à renvoyer (optionnel)
+        """
         self.send_response(200)
-        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        self.wfile.write(body)
+    
+    def send_json_response(self, data):
+        """Envoie une réponse JSON (compressée si le client l'accepte)"""
+        body = json.dumps(data).encode('utf-8')
+        
+        if len(body) >= GZIP_MIN_SIZE and self.accepts_gzip():
+            self.send_body(gzip.compress(body, GZIP_LEVEL), 'application/json', gzipped=True)
+        else:
+            self.send_body(body, 'application/json')
     
     def log_message(self, format, *args):
         """Supprime les logs HTTP pour garder l'affichage propre"""
         pass
 
+class ScraperHTTPServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread: un thread par connexion"""
+    
+    daemon_threads = True
+    
+    # File d'attente des connexions entrantes (5 par défaut)
+    request_queue_size = 128
+
 def run_server(port=8000):
     """Lance le serveur HTTP"""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, ScraperHandler)
+    httpd = ScraperHTTPServer(server_address, ScraperHandler)
+    
+    # Prépare le scraper partagé pendant que l'utilisateur ouvre la page
+    get_service().warm_up()
     
     print("\n" + "="*70)
     print("🚀 GOOGLE MAPS SCRAPER - Interface Web")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Enrichissement multi-processus, réparti par domaine
+Le parsing HTML et les regex de l'enrichissement sont limités par le GIL:
+les entreprises sont réparties par hash de domaine entre N processus, chacun
+avec son propre ContactEnricher (sessions HTTP et caches), et les résultats
+reviennent au processus parent au fil de l'eau pour le scoring et les exports
+"""
+
+import multiprocessing
+import queue
+import zlib
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
+
+from config import ENRICH_QUEUE_DEPTH
+from instrumentation import RunMetrics
+from lead_store import website_domain
+from log_setup import get_logger
+
+logger = get_logger('sharded_enrichment')
+
+# Délai entre deux vérifications des processus pendant l'attente d'un résultat (secondes)
+WORKER_CHECK_INTERVAL = 1.0
+
+
+def shard_for(website: str, company_name: str, shards: int) -> int:
+    """
+    Processus chargé d'une entreprise
+
+    Toutes les entreprises d'un même domaine vont au même processus, dont les
+    caches (pages équipe, emails) restent ainsi utiles.
+
+    Args:
+        website: Site web (le nom de l'entreprise sert de clé sans site)
+        company_name: Nom de l'entreprise
+        shards: Nombre de processus
+
+    Returns:
+        Index du processus (0 à shards - 1)
+    """
+    key = website_domain(website) or company_name or ''
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+class QueuedMetrics(RunMetrics):
+    """
+    Métriques d'un processus d'enrichissement
+
+    Chaque mesure est mise en attente puis renvoyée au parent avec le
+    résultat de l'entreprise, qui la rejoue sur les métriques du run.
+    """
+
+    def __init__(self):
+        super().__init__(keep_samples=False)
+        self.pending = []
+
+    def record(self, name: str, duration: float, error: bool = False, bytes_received: int = 0):
+        self.pending.append(('record', (name, duration, error, bytes_received), {}))
+
+    def incr(self, name: str, n: int = 1, **labels):
+        self.pending.append(('incr', (name, n), labels))
+
+    def take(self) -> List[Tuple]:
+        """Mesures en attente depuis le dernier appel"""
+        pending, self.pending = self.pending, []
+        return pending
+
+
+def _worker(tasks, results, enricher_options: Dict, session_options: Dict):
+    """
+    Boucle d'un processus d'enrichissement
+
+    Args:
+        tasks: File des entreprises de ce processus ((seq, nom, site, adresse), None pour arrêter)
+        results: File partagée des résultats ('ok' | 'error', seq, données, mesures)
+        enricher_options: Arguments de ContactEnricher (sirene_url, dns_nameservers, smtp_verify...)
+        session_options: Attributs appliqués aux sessions HTTP (proxies, trust_env)
+    """
+    from contact_enricher import ContactEnricher
+
+    metrics = QueuedMetrics()
+    enricher = ContactEnricher(metrics=metrics, **enricher_options)
+    for session in (enricher.session, enricher.email_finder.session):
+        for name, value in session_options.items():
+            setattr(session, name, value)
+
+    # Entreprises reçues mais pas encore enrichies: leurs MX sont résolus en
+    # arrière-plan pendant l'enrichissement des précédentes
+    backlog = deque()
+    while True:
+        received = []
+        try:
+            received.append(tasks.get(block=not backlog))
+            while True:
+                received.append(tasks.get_nowait())
+        except queue.Empty:
+            pass
+        backlog.extend(received)
+        if enricher.mx_verifier:
+            enricher.mx_verifier.prefetch_async(website_domain(item[2]) for item in received if item)
+
+        task = backlog.popleft()
+        if task is None:
+            # Connexions SMTP inactives fermées avant l'arrêt du processus
+            enricher.close()
+            return
+
+        seq, company_name, website, address = task
+        try:
+            with metrics.timer('enrich_company'):
+                enriched = enricher.enrich_contact(company_name, website, address)
+            results.put(('ok', seq, enriched, metrics.take()))
+        except Exception as e:
+            results.put(('error', seq, f"{type(e).__name__}: {e}", metrics.take()))
+
+
+class ShardedEnricher:
+    """
+    Pool de processus d'enrichissement, une file par processus
+
+    Les entreprises sont envoyées au processus de leur domaine (shard_for);
+    au plus queue_depth entreprises attendent par processus, submit()
+    attendant des résultats au-delà. Les résultats arrivent dans l'ordre où
+    ils sont terminés, avec l'étiquette passée à submit().
+
+    Usage:
+        with ShardedEnricher(4, metrics=scraper.metrics) as pool:
+            for company in companies:
+                pool.submit(company, company['title'], company['website'], company['address'])
+                for company, enriched in pool.completed():
+                    ...
+            for company, enriched in pool.drain():
+                ...
+    """
+
+    def __init__(self, workers: int, metrics: RunMetrics = None,
+                 enricher_options: Dict = None, session_options: Dict = None,
+                 queue_depth: int = ENRICH_QUEUE_DEPTH):
+        """
+        Args:
+            workers: Nombre de processus
+            metrics: RunMetrics recevant les mesures des processus (optionnel)
+            enricher_options: Arguments du ContactEnricher de chaque processus
+                (ex: {'sirene_url': ..., 'dns_nameservers': [...], 'dns_port': ...})
+            session_options: Attributs des sessions HTTP des processus
+                (ex: {'proxies': {...}, 'trust_env': False})
+            queue_depth: Entreprises en attente par processus
+        """
+        self.workers = workers
+        self.metrics = metrics
+        self.max_pending = workers * queue_depth
+
+        # 'spawn': le parent a des threads (logs, métriques), un fork pourrait hériter d'un verrou pris
+        context = multiprocessing.get_context('spawn')
+        self._results = context.Queue()
+        self._tasks = [context.Queue() for _ in range(workers)]
+        self._processes = [
+            context.Process(target=_worker, name=f"enrich-{i}", daemon=True,
+                            args=(self._tasks[i], self._results, enricher_options or {},
+                                  session_options or {}))
+            for i in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self._tags = {}
+        self._ready = deque()
+        self._seq = 0
+        logger.info("🧵 Enrichissement réparti sur %d processus", workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """Entreprises envoyées dont le résultat n'a pas encore été produit"""
+        return len(self._tags)
+
+    def submit(self, tag, company_name: str, website: str = None, address: str = None):
+        """
+        Envoie une entreprise au processus de son domaine
+
+        Args:
+            tag: Étiquette rendue avec le résultat
+            company_name: Nom de l'entreprise
+            website: Site web
+            address: Adresse
+        """
+        while len(self._tags) - len(self._ready) >= self.max_pending:
+            self._receive(block=True)
+
+        self._seq += 1
+        self._tags[self._seq] = tag
+        shard = shard_for(website, company_name, self.workers)
+        self._tasks[shard].put((self._seq, company_name, website, address))
+
+    def _receive(self, block: bool) -> bool:
+        """
+        Reçoit un résultat dans la file des résultats prêts
+
+        Returns:
+            False si aucun résultat n'était disponible (block=False)
+
+        Raises:
+            RuntimeError: Un processus s'est arrêté avec des entreprises en attente
+        """
+        while True:
+            try:
+                status, seq, data, measures = self._results.get(
+                    block=block, timeout=WORKER_CHECK_INTERVAL if block else None
+                )
+                break
+            except queue.Empty:
+                if not block:
+                    return False
+                dead = [process.name for process in self._processes if not process.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Processus d'enrichissement arrêtés: {', '.join(dead)}")
+
+        if self.metrics:
+            for method, args, labels in measures:
+                getattr(self.metrics, method)(*args, **labels)
+
+        if status == 'error':
+            self._tags.pop(seq)
+            raise RuntimeError(f"Erreur d'enrichissement: {data}")
+
+        self._ready.append((seq, data))
+        return True
+
+    def completed(self) -> Iterator[Tuple[object, Dict]]:
+        """
+        Résultats déjà terminés, sans attendre
+
+        Yields:
+            (étiquette, données enrichies)
+        """
+        while self._ready or self._receive(block=False):
+            seq, enriched = self._ready.popleft()
+            yield self._tags.pop(seq), enriched
+
+    def drain(self) -> Iterator[Tuple[object, Dict]]:
+        """
+        Attend et produit tous les résultats restants
+
+        Yields:
+            (étiquette, données enrichies)
+        """
+        while self._tags:
+            if not self._ready:
+                self._receive(block=True)
+            seq, enriched = self._ready.popleft()
+            yield self._tags.pop(seq), enriched
+
+    def close(self):
+        """Arrête les processus (les entreprises en attente sont abandonnées)"""
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._tags.clear()
+        self._ready.clear()
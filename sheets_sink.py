@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Écriture dédupliquée dans Google Sheets
+Charge la colonne clé (URL Google Maps) en une seule lecture, puis n'ajoute que
+les lignes nouvelles, par lots, au lieu d'un append_row par entreprise
+"""
+
+import time
+from typing import Dict, List
+
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
+
+from config import RATE_LIMIT_GOOGLE_SHEETS, SHEETS_BATCH_SIZE, SHEETS_MAX_RETRIES
+
+
+def _is_retryable(error: APIError) -> bool:
+    """Quota dépassé (429) ou erreur serveur (5xx)"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+def _call_with_retries(call, max_retries: int, on_retry=None):
+    """
+    Exécute un appel API en réessayant sur 429 / 5xx (backoff exponentiel)
+
+    Args:
+        call: Fonction sans argument à exécuter
+        max_retries: Nombre maximal de nouvelles tentatives
+        on_retry: Appelé avant chaque nouvelle tentative (optionnel)
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except APIError as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            if on_retry:
+                on_retry()
+            time.sleep(RATE_LIMIT_GOOGLE_SHEETS * 2 ** (attempt + 1))
+
+
+def load_key_index(worksheet, key_column: int) -> Dict[str, int]:
+    """
+    Construit l'index clé → numéro de ligne d'une feuille
+
+    Une seule lecture (col_values) quelle que soit la taille de la feuille.
+
+    Args:
+        worksheet: Feuille gspread
+        key_column: Numéro (1-based) de la colonne clé
+
+    Returns:
+        Dict clé → numéro de ligne (en-tête exclu)
+    """
+    keys = worksheet.col_values(key_column)
+    index = {}
+    for row_number, key in enumerate(keys[1:], 2):
+        if key and key not in index:
+            index[key] = row_number
+    return index
+
+
+def write_unique_rows(worksheet, rows: List[List], key_column: int,
+                      update_columns: int = 0, update_existing: bool = False,
+                      batch_size: int = SHEETS_BATCH_SIZE,
+                      progress_callback=None, max_retries: int = SHEETS_MAX_RETRIES,
+                      on_retry=None) -> Dict[str, int]:
+    """
+    Ajoute des lignes à une feuille en ignorant celles déjà présentes
+
+    Les lignes dont la clé existe déjà sont ignorées, ou mises à jour en un
+    seul batch_update si update_existing est activé. Seules les
+    update_columns premières colonnes sont alors réécrites, pour préserver
+    les colonnes saisies à la main (date d'ajout, statut...).
+    Les lignes sans clé sont toujours ajoutées.
+
+    Args:
+        worksheet: Feuille gspread
+        rows: Lignes à écrire (listes de valeurs, dans l'ordre des colonnes)
+        key_column: Numéro (1-based) de la colonne clé
+        update_columns: Nombre de colonnes réécrites pour une ligne existante
+        update_existing: Mettre à jour les lignes existantes au lieu de les ignorer
+        batch_size: Nombre de lignes par appel API
+        progress_callback: Appelé après chaque lot écrit avec
+            ('append' ou 'update', nombre de lignes) (optionnel)
+        max_retries: Nouvelles tentatives par lot sur erreur 429 / 5xx
+        on_retry: Appelé avant chaque nouvelle tentative (optionnel)
+
+    Returns:
+        Dict avec les compteurs appended / updated / skipped
+    """
+    index = load_key_index(worksheet, key_column)
+
+    new_rows = []
+    updates = []
+    skipped = 0
+    seen = set()
+
+    for row in rows:
+        key = row[key_column - 1] if len(row) >= key_column else ''
+
+        if key and key in seen:
+            # Doublon à l'intérieur du même lot
+            skipped += 1
+            continue
+        if key:
+            seen.add(key)
+
+        if key in index:
+            if update_existing and update_columns:
+                row_number = index[key]
+                updates.append({
+                    'range': f"{rowcol_to_a1(row_number, 1)}:{rowcol_to_a1(row_number, update_columns)}",
+                    'values': [row[:update_columns]],
+                })
+            else:
+                skipped += 1
+            continue
+
+        new_rows.append(row)
+
+    for start in range(0, len(new_rows), batch_size):
+        batch = new_rows[start:start + batch_size]
+        _call_with_retries(lambda: worksheet.append_rows(batch), max_retries, on_retry)
+        if progress_callback:
+            progress_callback('append', len(batch))
+        time.sleep(RATE_LIMIT_GOOGLE_SHEETS)
+
+    for start in range(0, len(updates), batch_size):
+        batch = updates[start:start + batch_size]
+        _call_with_retries(lambda: worksheet.batch_update(batch), max_retries, on_retry)
+        if progress_callback:
+            progress_callback('update', len(batch))
+        time.sleep(RATE_LIMIT_GOOGLE_SHEETS)
+
+    return {
+        'appended': len(new_rows),
+        'updated': len(updates),
+        'skipped': skipped,
+    }
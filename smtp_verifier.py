@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Vérification SMTP des emails candidats (RCPT TO, sans envoi de message)
+Connexions réutilisées par serveur MX, tous les candidats d'un domaine testés
+dans une même session, détection des domaines catch-all une fois par domaine,
+verdicts en cache et cadence limitée par serveur MX
+"""
+
+import secrets
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from config import (
+    SMTP_HELO_HOSTNAME, SMTP_MAIL_FROM, SMTP_MX_CONNECTIONS, SMTP_MX_INTERVAL,
+    SMTP_PORT, SMTP_TIMEOUT, SMTP_VERDICT_TTL
+)
+from instrumentation import PROCESS_METRICS, RunMetrics
+from log_setup import get_logger
+
+logger = get_logger('smtp_verifier')
+
+
+def rcpt_verdict(code: int) -> str:
+    """
+    Verdict d'une réponse à RCPT TO
+
+    Returns:
+        'valid' (250/251), 'invalid' (5xx: boîte inconnue) ou 'unknown'
+        (4xx: greylisting, indisponibilité temporaire)
+    """
+    if code in (250, 251):
+        return 'valid'
+    if 500 <= code < 600:
+        return 'invalid'
+    return 'unknown'
+
+
+class SMTPVerifier:
+    """
+    Moteur de vérification SMTP
+
+    Pour chaque domaine, une session sur son MX principal: MAIL FROM, une
+    adresse aléatoire pour détecter un catch-all (qui accepte tout et ne
+    prouve donc rien), puis RCPT TO pour chaque candidat. Les connexions
+    sont gardées ouvertes par serveur MX (RSET entre deux domaines), au
+    plus max_connections par serveur, avec au moins min_interval secondes
+    entre deux RCPT sur un même serveur. L'objet est partageable entre threads.
+
+    Usage:
+        verifier = SMTPVerifier()
+        check = verifier.verify('example.fr', ['mx1.example.fr'],
+                                ['jean.dupont@example.fr', 'j.dupont@example.fr'])
+        # {'catch_all': False, 'verdicts': {'jean.dupont@example.fr': 'invalid', ...}}
+        verifier.close()
+    """
+
+    def __init__(self, port: int = SMTP_PORT, timeout: float = SMTP_TIMEOUT,
+                 max_connections: int = SMTP_MX_CONNECTIONS,
+                 min_interval: float = SMTP_MX_INTERVAL,
+                 cache_ttl: float = SMTP_VERDICT_TTL, mail_from: str = SMTP_MAIL_FROM,
+                 helo_hostname: str = SMTP_HELO_HOSTNAME, connect_host: str = None,
+                 metrics: RunMetrics = None):
+        """
+        Args:
+            port: Port SMTP des serveurs MX
+            timeout: Délai d'une commande SMTP (secondes)
+            max_connections: Connexions simultanées par serveur MX
+            min_interval: Intervalle minimal entre deux RCPT par serveur MX (secondes)
+            cache_ttl: Durée de validité d'un verdict en cache (secondes)
+            mail_from: Expéditeur des sondes ('' pour l'expéditeur nul <>)
+            helo_hostname: Nom annoncé en EHLO (nom de la machine si vide)
+            connect_host: Adresse à laquelle se connecter quel que soit le MX
+                (serveur SMTP de test)
+            metrics: RunMetrics (smtp.connect / smtp.rcpt, compteurs smtp_verdicts)
+        """
+        self.port = port
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.min_interval = min_interval
+        self.cache_ttl = cache_ttl
+        self.mail_from = mail_from
+        self.helo_hostname = helo_hostname or None
+        self.connect_host = connect_host
+        self.metrics = metrics or RunMetrics(parent=PROCESS_METRICS)
+
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+        self._next_rcpt = {}
+        self._verdicts = {}
+        self._catch_all = {}
+
+    def _cached(self, cache: Dict, key: str):
+        with self._lock:
+            entry = cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _store(self, cache: Dict, key: str, value):
+        with self._lock:
+            cache[key] = (time.monotonic() + self.cache_ttl, value)
+
+    def _connect(self, mx_host: str) -> smtplib.SMTP:
+        """Ouvre une session SMTP sur un serveur MX"""
+        start = time.perf_counter()
+        smtp = smtplib.SMTP(timeout=self.timeout, local_hostname=self.helo_hostname)
+        try:
+            smtp.connect(self.connect_host or mx_host, self.port)
+            smtp.ehlo_or_helo_if_needed()
+        except (smtplib.SMTPException, OSError):
+            self.metrics.record('smtp.connect', time.perf_counter() - start, error=True)
+            smtp.close()
+            raise
+        self.metrics.record('smtp.connect', time.perf_counter() - start)
+        return smtp
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    @contextmanager
+    def _session(self, mx_host: str):
+        """
+        Session SMTP sur un serveur MX, réutilisée si une connexion est libre
+
+        Rendue au pool après RSET; fermée si la session a échoué.
+        """
+        with self._lock:
+            slot = self._slots.setdefault(mx_host, threading.BoundedSemaphore(self.max_connections))
+        slot.acquire()
+
+        smtp = None
+        try:
+            with self._lock:
+                idle = self._idle.get(mx_host)
+                smtp = idle.pop() if idle else None
+
+            # Connexion fermée par le serveur depuis sa dernière utilisation
+            if smtp is not None:
+                try:
+                    alive = smtp.noop()[0] == 250
+                except (smtplib.SMTPException, OSError):
+                    alive = False
+                if not alive:
+                    smtp.close()
+                    smtp = None
+            self.metrics.incr('smtp_sessions', connection='reused' if smtp else 'new')
+
+            if smtp is None:
+                smtp = self._connect(mx_host)
+
+            yield smtp
+
+            smtp.rset()
+            with self._lock:
+                self._idle.setdefault(mx_host, []).append(smtp)
+        except BaseException:
+            if smtp is not None:
+                smtp.close()
+            raise
+        finally:
+            slot.release()
+
+    def _throttle(self, mx_host: str):
+        """Attend le prochain créneau RCPT du serveur MX"""
+        with self._lock:
+            now = time.monotonic()
+            slot_at = max(now, self._next_rcpt.get(mx_host, 0.0))
+            self._next_rcpt[mx_host] = slot_at + self.min_interval
+        if slot_at > now:
+            time.sleep(slot_at - now)
+
+    def _rcpt(self, smtp: smtplib.SMTP, mx_host: str, email: str) -> str:
+        """Teste une adresse (RCPT TO) et retourne son verdict"""
+        self._throttle(mx_host)
+        start = time.perf_counter()
+        try:
+            code, _ = smtp.rcpt(email)
+        except UnicodeEncodeError:
+            # Adresse non ASCII, refusée sans SMTPUTF8
+            return 'unknown'
+        self.metrics.record('smtp.rcpt', time.perf_counter() - start)
+        return rcpt_verdict(code)
+
+    def verify(self, domain: str, mx_hosts: List[str], emails: List[str],
+               first_valid: bool = True) -> Dict:
+        """
+        Vérifie les emails candidats d'un domaine en une session
+
+        Args:
+            domain: Domaine des emails
+            mx_hosts: Serveurs MX du domaine, par préférence (mx_verifier)
+            emails: Candidats, du plus probable au moins probable
+            first_valid: S'arrêter au premier candidat accepté
+
+        Returns:
+            Dict catch_all (True / False, None si inconnu) et verdicts
+            (email → 'valid' | 'invalid' | 'catch_all' | 'unknown')
+        """
+        domain = domain.lower()
+        emails = list(dict.fromkeys(email.lower() for email in emails))
+        verdicts = {}
+        for email in emails:
+            cached = self._cached(self._verdicts, email)
+            self.metrics.incr('cache_lookups', cache='smtp', result='hit' if cached else 'miss')
+            if cached:
+                verdicts[email] = cached
+        catch_all = self._cached(self._catch_all, domain)
+
+        todo = [email for email in emails if email not in verdicts]
+        if first_valid and 'valid' in verdicts.values():
+            todo = []
+        if not todo or not mx_hosts:
+            verdicts.update({email: 'unknown' for email in todo})
+            return {'catch_all': catch_all, 'verdicts': verdicts}
+
+        mx_host = mx_hosts[0]
+        try:
+            with self._session(mx_host) as smtp:
+                code, message = smtp.mail(self.mail_from)
+                if code != 250:
+                    raise smtplib.SMTPSenderRefused(code, message, self.mail_from)
+
+                if catch_all is None:
+                    # Une adresse aléatoire acceptée: le domaine accepte tout
+                    probe = self._rcpt(smtp, mx_host, f"verif-{secrets.token_hex(6)}@{domain}")
+                    if probe != 'unknown':
+                        catch_all = probe == 'valid'
+                        self._store(self._catch_all, domain, catch_all)
+
+                for email in todo:
+                    verdict = 'catch_all' if catch_all else self._rcpt(smtp, mx_host, email)
+                    verdicts[email] = verdict
+                    self.metrics.incr('smtp_verdicts', verdict=verdict)
+                    if verdict != 'unknown':
+                        self._store(self._verdicts, email, verdict)
+                    if first_valid and verdict in ('valid', 'catch_all'):
+                        break
+        except (smtplib.SMTPException, OSError) as e:
+            logger.debug("⚠️  Vérification SMTP impossible pour %s (%s): %s", domain, mx_host, e)
+            self.metrics.incr('smtp_errors', mx=mx_host)
+
+        for email in todo:
+            verdicts.setdefault(email, 'unknown')
+        return {'catch_all': catch_all, 'verdicts': verdicts}
+
+    def close(self):
+        """Ferme les connexions du pool"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for smtp in connections:
+                self._close(smtp)
+
+
+def best_candidate(candidates: List[tuple], check: Dict) -> Optional[Dict]:
+    """
+    Candidat retenu d'après les verdicts SMTP
+
+    Args:
+        candidates: (pattern, email), du plus probable au moins probable
+        check: Résultat de SMTPVerifier.verify()
+
+    Returns:
+        Dict pattern, email, verdict ('valid', 'catch_all', 'invalid'),
+        ou None si les verdicts ne permettent pas de conclure
+    """
+    verdicts = check['verdicts']
+    for pattern, email in candidates:
+        if verdicts.get(email.lower()) == 'valid':
+            return {'pattern': pattern, 'email': email, 'verdict': 'valid'}
+
+    if check['catch_all']:
+        pattern, email = candidates[0]
+        return {'pattern': pattern, 'email': email, 'verdict': 'catch_all'}
+
+    if candidates and all(verdicts.get(email.lower()) == 'invalid' for _, email in candidates):
+        pattern, email = candidates[0]
+        return {'pattern': pattern, 'email': email, 'verdict': 'invalid'}
+    return None
@@ -0,0 +1,672 @@
+#!/usr/bin/env python3
+"""
+File de travail distribuée pour partager une campagne entre plusieurs machines
+Un coordinateur met les lieux en file (scraping Google Maps ou dataset rejoué),
+des workers (processus ou machines) les réservent, les enrichissent et les
+scorent; chaque résultat est écrit une seule fois par lieu dans le stockage
+partagé. Backends: SQLite (local), Redis (production), mémoire (tests)
+
+Usage:
+    python work_queue.py enqueue --campaign verandas --search "vérandas Lyon"
+    python work_queue.py worker --campaign verandas      # sur chaque machine
+    python work_queue.py status --campaign verandas
+    python work_queue.py collect --campaign verandas     # vers leads.db
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+from apify_places import dedupe_places, fetch_places, lead_base_data, parse_queries
+from config import LEAD_STORE_PATH, WORK_QUEUE_LEASE, WORK_QUEUE_MAX_ATTEMPTS, WORK_QUEUE_URL
+from instrumentation import PROCESS_METRICS, RunMetrics
+from lead_store import LeadStore, place_key
+from log_setup import get_logger
+
+try:
+    import redis
+except ImportError:  # Dépendance optionnelle (backend Redis)
+    redis = None
+
+logger = get_logger('work_queue')
+
+# Attente d'un worker quand aucun lieu n'est disponible (secondes)
+POLL_INTERVAL = 2.0
+
+# Lieu réservé par un worker: (clé du lieu, lieu)
+Task = Tuple[str, Dict]
+
+# Erreur enregistrée quand une réservation expire (worker arrêté ou planté)
+LEASE_EXPIRED = "Réservation expirée"
+
+
+def default_worker_id() -> str:
+    """Identifiant d'un worker: machine et processus (ex: node-2:4812)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class MemoryQueue:
+    """
+    File en mémoire, pour les tests et les workers d'un même processus
+
+    Même sémantique que les autres backends: un lieu n'est mis en file
+    qu'une fois, une réservation expire après lease secondes (worker
+    arrêté) et compte comme une tentative, et seul le premier résultat
+    d'un lieu est conservé.
+    """
+
+    def __init__(self, campaign: str):
+        """
+        Args:
+            campaign: Identifiant de la campagne
+        """
+        self.campaign = campaign
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._pending = deque()
+        self._results = {}
+
+    def enqueue(self, tasks: Iterable[Task]) -> int:
+        """
+        Met des lieux en file (ceux déjà connus de la campagne sont ignorés)
+
+        Args:
+            tasks: (clé du lieu, lieu)
+
+        Returns:
+            Nombre de lieux ajoutés
+        """
+        added = 0
+        with self._lock:
+            for key, place in tasks:
+                if key in self._tasks:
+                    continue
+                self._tasks[key] = {'place': place, 'state': 'pending', 'worker': None,
+                                    'lease_until': 0.0, 'attempts': 0, 'error': None}
+                self._pending.append(key)
+                added += 1
+        return added
+
+    def claim(self, worker: str, lease: float = WORK_QUEUE_LEASE,
+              max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS) -> Optional[Task]:
+        """
+        Réserve le prochain lieu à traiter
+
+        Les réservations expirées sont d'abord comptées comme une tentative
+        échouée: un lieu qui fait planter les workers est abandonné après
+        max_attempts réservations au lieu d'être repris indéfiniment.
+
+        Args:
+            worker: Identifiant du worker
+            lease: Durée de la réservation (secondes)
+            max_attempts: Tentatives avant d'abandonner un lieu
+
+        Returns:
+            (clé, lieu), ou None si aucun lieu n'est disponible
+        """
+        now = time.time()
+        with self._lock:
+            for key, task in self._tasks.items():
+                if task['state'] == 'leased' and task['lease_until'] <= now:
+                    task['attempts'] += 1
+                    task['error'] = LEASE_EXPIRED
+                    if task['attempts'] >= max_attempts:
+                        task['state'] = 'failed'
+                    else:
+                        task['state'] = 'pending'
+                        self._pending.append(key)
+
+            while self._pending:
+                key = self._pending.popleft()
+                task = self._tasks[key]
+                if task['state'] != 'pending':
+                    continue
+                task.update(state='leased', worker=worker, lease_until=now + lease)
+                return key, task['place']
+        return None
+
+    def complete(self, key: str, worker: str, result: Dict) -> bool:
+        """
+        Enregistre le résultat d'un lieu
+
+        Returns:
+            False si un résultat existait déjà (réservation expirée puis
+            traitée par un autre worker): il n'est pas remplacé
+        """
+        with self._lock:
+            if key in self._results:
+                return False
+            self._results[key] = result
+            self._tasks[key].update(state='done', worker=worker)
+            return True
+
+    def fail(self, key: str, worker: str, error: str,
+             max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS) -> bool:
+        """
+        Signale l'échec d'un lieu réservé
+
+        Returns:
+            True si le lieu est remis en file, False s'il est abandonné
+            (max_attempts atteint) ou n'est plus réservé par ce worker
+        """
+        with self._lock:
+            task = self._tasks[key]
+            if task['state'] != 'leased' or task['worker'] != worker:
+                return False
+            task['attempts'] += 1
+            task['error'] = error
+            if task['attempts'] >= max_attempts:
+                task['state'] = 'failed'
+                return False
+            task['state'] = 'pending'
+            self._pending.append(key)
+            return True
+
+    def results(self) -> Dict[str, Dict]:
+        """Résultats de la campagne: clé du lieu → lead enrichi et scoré"""
+        with self._lock:
+            return dict(self._results)
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre de lieux par état: pending, leased, done, failed"""
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        with self._lock:
+            for task in self._tasks.values():
+                counts[task['state']] += 1
+        return counts
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    campaign    TEXT NOT NULL,
+    place_key   TEXT NOT NULL,
+    place       TEXT NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending',
+    worker      TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT,
+    PRIMARY KEY (campaign, place_key)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (campaign, state, lease_until);
+
+CREATE TABLE IF NOT EXISTS results (
+    campaign     TEXT NOT NULL,
+    place_key    TEXT NOT NULL,
+    result       TEXT NOT NULL,
+    worker       TEXT,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (campaign, place_key)
+);
+"""
+
+
+class SQLiteQueue:
+    """
+    File dans une base SQLite (mode WAL), partageable entre processus d'une machine
+
+    La réservation d'un lieu se fait dans une transaction BEGIN IMMEDIATE:
+    deux workers ne peuvent pas réserver le même lieu.
+    """
+
+    def __init__(self, campaign: str, path: str):
+        """
+        Args:
+            campaign: Identifiant de la campagne
+            path: Chemin de la base SQLite
+        """
+        self.campaign = campaign
+        self.path = path
+        self._lock = threading.Lock()
+
+        # Transactions explicites (isolation_level=None): BEGIN IMMEDIATE pour les réservations
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SQLITE_SCHEMA)
+
+    def _transaction(self, sql_steps):
+        """Exécute sql_steps(conn) dans une transaction d'écriture et retourne son résultat"""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                value = sql_steps(self.conn)
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return value
+
+    def enqueue(self, tasks: Iterable[Task]) -> int:
+        """Met des lieux en file (voir MemoryQueue.enqueue)"""
+        rows = [(self.campaign, key, json.dumps(place, ensure_ascii=False, default=str))
+                for key, place in tasks]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO tasks (campaign, place_key, place) VALUES (?, ?, ?)', rows
+            )
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def claim(self, worker: str, lease: float = WORK_QUEUE_LEASE,
+              max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS) -> Optional[Task]:
+        """Réserve le prochain lieu à traiter (voir MemoryQueue.claim)"""
+        now = time.time()
+
+        def reserve(conn):
+            conn.execute(
+                "UPDATE tasks SET attempts = attempts + 1, error = ?, "
+                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE campaign = ? AND state = 'leased' AND lease_until <= ?",
+                (LEASE_EXPIRED, max_attempts, self.campaign, now)
+            )
+            row = conn.execute(
+                "SELECT place_key, place FROM tasks WHERE campaign = ? AND state = 'pending' "
+                "ORDER BY rowid LIMIT 1",
+                (self.campaign,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_until = ? "
+                "WHERE campaign = ? AND place_key = ?",
+                (worker, now + lease, self.campaign, row[0])
+            )
+            return row[0], json.loads(row[1])
+
+        return self._transaction(reserve)
+
+    def complete(self, key: str, worker: str, result: Dict) -> bool:
+        """Enregistre le résultat d'un lieu (voir MemoryQueue.complete)"""
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+
+        def store(conn):
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO results (campaign, place_key, result, worker, completed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.campaign, key, payload, worker, time.time())
+            ).rowcount
+            if inserted:
+                conn.execute(
+                    "UPDATE tasks SET state = 'done', worker = ? WHERE campaign = ? AND place_key = ?",
+                    (worker, self.campaign, key)
+                )
+            return bool(inserted)
+
+        return self._transaction(store)
+
+    def fail(self, key: str, worker: str, error: str,
+             max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS) -> bool:
+        """Signale l'échec d'un lieu réservé (voir MemoryQueue.fail)"""
+        def release(conn):
+            conn.execute(
+                "UPDATE tasks SET attempts = attempts + 1, error = ?, "
+                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE campaign = ? AND place_key = ? AND state = 'leased' AND worker = ?",
+                (error, max_attempts, self.campaign, key, worker)
+            )
+            row = conn.execute(
+                'SELECT state FROM tasks WHERE campaign = ? AND place_key = ?',
+                (self.campaign, key)
+            ).fetchone()
+            return row is not None and row[0] == 'pending'
+
+        return self._transaction(release)
+
+    def results(self) -> Dict[str, Dict]:
+        """Résultats de la campagne: clé du lieu → lead enrichi et scoré"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT place_key, result FROM results WHERE campaign = ?', (self.campaign,)
+            ).fetchall()
+        return {key: json.loads(result) for key, result in rows}
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre de lieux par état: pending, leased, done, failed"""
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT state, COUNT(*) FROM tasks WHERE campaign = ? GROUP BY state',
+                (self.campaign,)
+            ).fetchall()
+        counts.update(dict(rows))
+        return counts
+
+
+class RedisQueue:
+    """
+    File dans Redis (ou un serveur compatible), partageable entre machines
+
+    Clés work_queue:<campagne>:*
+    - places (hash): clé du lieu → lieu, HSETNX pour ne mettre en file qu'une fois
+    - pending (liste): lieux à traiter
+    - leases (zset): lieux réservés, par échéance de réservation
+    - workers / attempts / failed (hash): détenteur, tentatives, erreur finale
+    - results (hash): HSETNX, seul le premier résultat d'un lieu est conservé
+
+    La réservation est un script Lua (_CLAIM_SCRIPT), exécuté atomiquement
+    par le serveur: un worker arrêté entre le retrait de la file et la
+    réservation ne peut pas perdre le lieu.
+    """
+
+    # KEYS: places, pending, leases, workers, attempts, failed, results
+    # ARGV: maintenant, fin de réservation, worker, max_attempts, erreur d'expiration
+    _CLAIM_SCRIPT = """
+    for _, key in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], 0, ARGV[1])) do
+        redis.call('ZREM', KEYS[3], key)
+        if redis.call('HEXISTS', KEYS[7], key) == 0 then
+            if redis.call('HINCRBY', KEYS[5], key, 1) >= tonumber(ARGV[4]) then
+                redis.call('HSET', KEYS[6], key, ARGV[5])
+            else
+                redis.call('RPUSH', KEYS[2], key)
+            end
+        end
+    end
+    while true do
+        local key = redis.call('LPOP', KEYS[2])
+        if not key then
+            return nil
+        end
+        if redis.call('HEXISTS', KEYS[7], key) == 0 then
+            redis.call('ZADD', KEYS[3], ARGV[2], key)
+            redis.call('HSET', KEYS[4], key, ARGV[3])
+            return {key, redis.call('HGET', KEYS[1], key)}
+        end
+    end
+    """
+
+    def __init__(self, campaign: str, url: str):
+        """
+        Args:
+            campaign: Identifiant de la campagne
+            url: URL Redis (redis://hôte:port/base)
+        """
+        if redis is None:
+            raise ImportError("redis est requis pour le backend Redis (pip install redis)")
+
+        self.campaign = campaign
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = f"work_queue:{campaign}:"
+        self._claim = self.client.register_script(self._CLAIM_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return self.prefix + name
+
+    def enqueue(self, tasks: Iterable[Task]) -> int:
+        """Met des lieux en file (voir MemoryQueue.enqueue)"""
+        tasks = list(tasks)
+        pipe = self.client.pipeline()
+        for key, place in tasks:
+            pipe.hsetnx(self._key('places'), key, json.dumps(place, ensure_ascii=False, default=str))
+        added = [key for (key, _), new in zip(tasks, pipe.execute()) if new]
+
+        if added:
+            self.client.rpush(self._key('pending'), *added)
+        return len(added)
+
+    def claim(self, worker: str, lease: float = WORK_QUEUE_LEASE,
+              max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS) -> Optional[Task]:
+        """Réserve le prochain lieu à traiter (voir MemoryQueue.claim)"""
+        now = time.time()
+        keys = [self._key(name) for name in
+                ('places', 'pending', 'leases', 'workers', 'attempts', 'failed', 'results')]
+        task = self._claim(keys=keys, args=[now, now + lease, worker, max_attempts, LEASE_EXPIRED])
+        if task is None:
+            return None
+        key, place = task
+        return key, json.loads(place)
+
+    def complete(self, key: str, worker: str, result: Dict) -> bool:
+        """Enregistre le résultat d'un lieu (voir MemoryQueue.complete)"""
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        if not self.client.hsetnx(self._key('results'), key, payload):
+            return False
+
+        pipe = self.client.pipeline()
+        pipe.zrem(self._key('leases'), key)
+        pipe.hset(self._key('workers'), key, worker)
+        # Lieu abandonné (réservation expirée) mais finalement traité
+        pipe.hdel(self._key('failed'), key)
+        pipe.execute()
+        return True
+
+    def fail(self, key: str, worker: str, error: str,
+             max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS) -> bool:
+        """Signale l'échec d'un lieu réservé (voir MemoryQueue.fail)"""
+        if self.client.hget(self._key('workers'), key) != worker or \
+                not self.client.zrem(self._key('leases'), key):
+            return False
+
+        attempts = self.client.hincrby(self._key('attempts'), key, 1)
+        if attempts >= max_attempts:
+            self.client.hset(self._key('failed'), key, error)
+            return False
+        self.client.rpush(self._key('pending'), key)
+        return True
+
+    def results(self) -> Dict[str, Dict]:
+        """Résultats de la campagne: clé du lieu → lead enrichi et scoré"""
+        return {key: json.loads(result)
+                for key, result in self.client.hgetall(self._key('results')).items()}
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre de lieux par état: pending, leased, done, failed"""
+        pipe = self.client.pipeline()
+        pipe.llen(self._key('pending'))
+        pipe.zcard(self._key('leases'))
+        pipe.hlen(self._key('results'))
+        pipe.hlen(self._key('failed'))
+        pending, leased, done, failed = pipe.execute()
+        return {'pending': pending, 'leased': leased, 'done': done, 'failed': failed}
+
+
+def open_queue(campaign: str, url: str = WORK_QUEUE_URL):
+    """
+    Ouvre la file d'une campagne
+
+    Args:
+        campaign: Identifiant de la campagne
+        url: "sqlite:///chemin.db", "redis://hôte:port/0" ou "memory://"
+
+    Returns:
+        MemoryQueue, SQLiteQueue ou RedisQueue
+
+    Raises:
+        ValueError: URL non reconnue
+    """
+    if url.startswith('memory://'):
+        return MemoryQueue(campaign)
+    if url.startswith('sqlite://'):
+        # sqlite:///relatif.db, sqlite:////chemin/absolu.db
+        return SQLiteQueue(campaign, url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisQueue(campaign, url)
+    raise ValueError(f"File invalide: '{url}' (attendu: sqlite:///chemin, redis://... ou memory://)")
+
+
+def enqueue_places(work_queue, places: Iterable[Dict]) -> int:
+    """
+    Met des lieux en file, par place ID / URL
+
+    Les lieux sans clé ne peuvent pas être traités exactement une fois et sont ignorés.
+
+    Args:
+        work_queue: File de la campagne (open_queue)
+        places: Lieux du dataset (étiquetés par tag_source_query)
+
+    Returns:
+        Nombre de lieux ajoutés (les lieux déjà en file sont ignorés)
+    """
+    tasks = []
+    skipped = 0
+    for place in places:
+        key = place_key(place)
+        if key:
+            tasks.append((key, place))
+        else:
+            skipped += 1
+
+    if skipped:
+        logger.warning("⚠️  %d lieux sans place ID ni URL ignorés", skipped)
+    return work_queue.enqueue(tasks)
+
+
+def run_worker(work_queue, worker_id: str = None, follow: bool = False,
+               lease: float = WORK_QUEUE_LEASE, max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS,
+               poll_interval: float = POLL_INTERVAL, metrics: RunMetrics = None,
+               enricher=None, scorer=None) -> Dict[str, int]:
+    """
+    Réserve, enrichit et score les lieux de la file jusqu'à épuisement
+
+    Args:
+        work_queue: File de la campagne (open_queue)
+        worker_id: Identifiant du worker (machine:pid par défaut)
+        follow: Attendre de nouveaux lieux au lieu de s'arrêter quand la file est vide
+        lease: Durée de réservation d'un lieu (supérieure au temps d'enrichissement)
+        max_attempts: Tentatives avant d'abandonner un lieu en erreur ou dont
+            la réservation expire
+        poll_interval: Attente quand aucun lieu n'est disponible (secondes)
+        metrics: RunMetrics (enrich_company, compteur work_queue)
+        enricher: ContactEnricher (créé si None)
+        scorer: ContactScorer (créé si None)
+
+    Returns:
+        Dict processed, duplicates, failed
+    """
+    from contact_enricher import ContactEnricher
+    from contact_scorer import ContactScorer
+
+    worker_id = worker_id or default_worker_id()
+    metrics = metrics or RunMetrics(parent=PROCESS_METRICS)
+    enricher = enricher or ContactEnricher(metrics=metrics)
+    scorer = scorer or ContactScorer()
+    counts = {'processed': 0, 'duplicates': 0, 'failed': 0}
+
+    logger.info("👷 Worker %s sur la campagne %s", worker_id, work_queue.campaign)
+
+    while True:
+        task = work_queue.claim(worker_id, lease, max_attempts)
+        if task is None:
+            stats = work_queue.stats()
+            # Les lieux réservés par d'autres workers peuvent revenir en file (réservation expirée)
+            if not follow and not stats['pending'] and not stats['leased']:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        key, place = task
+        lead = lead_base_data(place)
+        try:
+            with metrics.timer('enrich_company'):
+                enriched = enricher.enrich_contact(lead['name'], lead['website'], lead['address'])
+        except Exception as e:
+            requeued = work_queue.fail(key, worker_id, f"{type(e).__name__}: {e}", max_attempts)
+            logger.warning("⚠️  Échec de l'enrichissement de %s (%s): %s",
+                           lead['name'], 'remis en file' if requeued else 'abandonné', e)
+            metrics.incr('work_queue', outcome='retry' if requeued else 'failed')
+            if not requeued:
+                counts['failed'] += 1
+            continue
+
+        lead.update(enriched)
+        with metrics.timer('score_contact'):
+            lead.update(scorer.score_contact(lead))
+
+        if work_queue.complete(key, worker_id, lead):
+            counts['processed'] += 1
+            metrics.incr('work_queue', outcome='done')
+            logger.debug("✅ %s: %s/100", lead['name'], lead['score_total'])
+        else:
+            # Réservation expirée pendant l'enrichissement: un autre worker a déjà écrit ce lieu
+            counts['duplicates'] += 1
+            metrics.incr('work_queue', outcome='duplicate')
+
+    enricher.close()
+    logger.info("✅ Worker %s terminé: %d lieux traités, %d doublons, %d abandonnés",
+                worker_id, counts['processed'], counts['duplicates'], counts['failed'])
+    return counts
+
+
+def collect_results(work_queue, store: LeadStore) -> int:
+    """
+    Copie les résultats de la campagne dans la base locale des leads
+
+    Returns:
+        Nombre de leads écrits
+    """
+    # Résultats enrichis et scorés comme par le scraper pro
+    return store.upsert_leads(work_queue.results().values(), pipeline='pro')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File de travail distribuée des campagnes")
+    parser.add_argument('command', choices=['enqueue', 'worker', 'status', 'collect'])
+    parser.add_argument('--campaign', required=True, help="Identifiant de la campagne")
+    parser.add_argument('--queue', default=WORK_QUEUE_URL,
+                        help="File: sqlite:///chemin.db, redis://hôte:port/0")
+    parser.add_argument('--search', help="Recherches à mettre en file (« a; b » ou @fichier)")
+    parser.add_argument('--max-results', type=int, default=200,
+                        help="Lieux par recherche (ou par tuile avec --area)")
+    parser.add_argument('--area', help="Découper la recherche en tuiles (voir geo_tiling)")
+    parser.add_argument('--source', help="Source de lieux locale: synthetic:<N> ou replay:<fichier>")
+    parser.add_argument('--follow', action='store_true',
+                        help="Worker: attendre de nouveaux lieux quand la file est vide")
+    parser.add_argument('--store', default=LEAD_STORE_PATH, help="Base des leads (collect)")
+    args = parser.parse_args()
+
+    work_queue = open_queue(args.campaign, args.queue)
+
+    if args.command == 'enqueue':
+        import geo_tiling
+        import places_source
+
+        if args.source:
+            client = places_source.open_source(args.source)
+        else:
+            from apify_client import ApifyClient
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            if not os.getenv('APIFY_API_TOKEN'):
+                print("❌ APIFY_API_TOKEN manquant dans .env (ou utilisez --source)")
+                return
+            client = ApifyClient(os.getenv('APIFY_API_TOKEN'))
+
+        queries = parse_queries(args.search or '') or ['']
+        if args.area:
+            area = geo_tiling.parse_area(args.area)
+            tiles = [tile for query in queries for tile in geo_tiling.plan_tiles(query, area)]
+            places, _ = geo_tiling.run_tiles(client, tiles, args.max_results)
+        else:
+            places = dedupe_places(fetch_places(client, queries, args.max_results))
+
+        added = enqueue_places(work_queue, places)
+        print(f"📥 {added} lieux mis en file ({len(places)} trouvés) pour la campagne {args.campaign}")
+
+    elif args.command == 'worker':
+        counts = run_worker(work_queue, follow=args.follow)
+        print(f"✅ {counts['processed']} lieux traités, {counts['duplicates']} doublons, "
+              f"{counts['failed']} abandonnés")
+
+    elif args.command == 'status':
+        stats = work_queue.stats()
+        print(f"📊 Campagne {args.campaign}: {stats['pending']} en attente, {stats['leased']} en cours, "
+              f"{stats['done']} traités, {stats['failed']} abandonnés")
+
+    else:
+        written = collect_results(work_queue, LeadStore(args.store))
+        print(f"💾 {written} leads copiés dans {args.store}")
+
+
+if __name__ == "__main__":
+    main()